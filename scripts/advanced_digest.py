@@ -5,58 +5,62 @@
 """
 
 import json
-import os
 from datetime import datetime, timedelta
 from pathlib import Path
+from zoneinfo import ZoneInfo
 
-import anthropic
-import pytz
-
+from digest_schema import load_digest, outline
+from llm_client import call_llm
+from models import Item
+from snapshot_store import save_snapshot
+from sources import Scheduler, commit_rss_marks
 from tech_digest import (
     PROJECT_ROOT,
     load_config,
-    fetch_v2ex_hot,
-    fetch_hn_top,
-    fetch_rss_feeds,
+    fetch_items,
     prepare_content_for_claude,
     save_digest,
+    select_items,
 )
 
 
-def load_recent_digests(config: dict, days: int = 7) -> list[str]:
-    """加载最近几天的简报内容"""
+def load_recent_digests(config: dict, days: int = 7, reference_date: str = None) -> list[str]:
+    """
+    加载最近几天的简报内容
+
+    Args:
+        config: 全局配置
+        days: 回溯天数
+        reference_date: 基准日期字符串，默认为北京时间今天（用于重新生成历史日期）
+    """
     digests_dir = PROJECT_ROOT / config["output"]["digests_dir"]
-    tz = pytz.timezone("Asia/Shanghai")
-    today = datetime.now(tz)
+    if reference_date:
+        today = datetime.strptime(reference_date, config["output"]["date_format"])
+    else:
+        tz = ZoneInfo("Asia/Shanghai")
+        today = datetime.now(tz)
 
     contents = []
     for i in range(1, days + 1):
         date = today - timedelta(days=i)
         date_str = date.strftime(config["output"]["date_format"])
+        # 优先使用结构化简报的提纲，无法解析时退回全文
+        digest = load_digest(date_str, digests_dir)
         file_path = digests_dir / f"{date_str}.md"
-        if file_path.exists():
+        if digest:
+            contents.append(f"### {date_str}\n{outline(digest)}")
+        elif file_path.exists():
             with open(file_path, "r", encoding="utf-8") as f:
                 contents.append(f"### {date_str}\n{f.read()}")
 
     return contents
 
 
-def analyze_trends_with_claude(
-    current_content: str,
-    historical_content: list[str],
-    config: dict,
-    today: str
-) -> str:
-    """使用 Claude 进行趋势分析"""
-    api_key = os.environ.get("ANTHROPIC_API_KEY")
-    if not api_key:
-        raise ValueError("请设置 ANTHROPIC_API_KEY 环境变量")
-
-    client = anthropic.Anthropic(api_key=api_key)
-
+def build_trends_prompt(current_content: str, historical_content: list[str], today: str) -> str:
+    """构建趋势分析提示词"""
     historical_text = "\n\n---\n\n".join(historical_content) if historical_content else "无历史数据"
 
-    prompt = f"""你是一位资深科技分析师，需要根据今日内容和历史简报进行深度分析。
+    return f"""你是一位资深科技分析师，需要根据今日内容和历史简报进行深度分析。
 
 今天日期: {today}
 
@@ -87,15 +91,37 @@ def analyze_trends_with_claude(
 
 直接输出简报内容。"""
 
-    message = client.messages.create(
-        model=config["claude"]["model"],
-        max_tokens=config["claude"]["max_tokens"] + 1024,
-        messages=[
-            {"role": "user", "content": prompt}
-        ]
-    )
 
-    return message.content[0].text
+def analyze_trends_with_claude(
+    current_content: str,
+    historical_content: list[str],
+    config: dict,
+    today: str
+) -> str:
+    """使用 Claude 进行趋势分析"""
+    prompt = build_trends_prompt(current_content, historical_content, today)
+    return call_llm(prompt, config, max_tokens=config["claude"]["max_tokens"] + 1024)
+
+
+def generate_trends_digest(items: list[Item], config: dict, today: str, scheduler: Scheduler = None) -> str:
+    """加载历史简报 → 筛选 → 生成增强版简报 → 保存，返回简报内容"""
+    # 加载历史数据
+    print("[2/4] 正在加载历史简报...")
+    historical = load_recent_digests(config, days=7, reference_date=today)
+    print(f"      找到 {len(historical)} 份历史简报")
+
+    # 排序挑选并准备内容
+    print("[3/4] 正在筛选排序...")
+    items = select_items(items, config, today, scheduler)
+    raw_content = prepare_content_for_claude(items)
+
+    # 生成增强版简报
+    print("[4/4] 正在使用 Claude 生成增强版简报...")
+    digest = analyze_trends_with_claude(raw_content, historical, config, today)
+
+    # 保存
+    save_digest(digest, config, today)
+    return digest
 
 
 def main():
@@ -108,37 +134,24 @@ def main():
     config = load_config()
 
     # 获取北京时间日期
-    tz = pytz.timezone("Asia/Shanghai")
+    tz = ZoneInfo("Asia/Shanghai")
     today = datetime.now(tz).strftime(config["output"]["date_format"])
     print(f"\n日期: {today}")
 
     # 抓取数据
-    print("\n[1/5] 正在抓取 V2EX 热门...")
-    v2ex = fetch_v2ex_hot(config)
-    print(f"      获取 {len(v2ex)} 条")
-
-    print("[2/5] 正在抓取 Hacker News...")
-    hn = fetch_hn_top(config)
-    print(f"      获取 {len(hn)} 条")
-
-    print("[3/5] 正在抓取 RSS 源...")
-    rss = fetch_rss_feeds(config)
-    print(f"      获取 {len(rss)} 条")
-
-    # 加载历史数据
-    print("[4/5] 正在加载历史简报...")
-    historical = load_recent_digests(config, days=7)
-    print(f"      找到 {len(historical)} 份历史简报")
-
-    # 准备内容
-    raw_content = prepare_content_for_claude(v2ex, hn, rss)
-
-    # 生成增强版简报
-    print("[5/5] 正在使用 Claude 生成增强版简报...")
-    digest = analyze_trends_with_claude(raw_content, historical, config, today)
-
-    # 保存
-    save_digest(digest, config, today)
+    print("\n[1/4] 正在抓取数据源...")
+    marks = {}
+    items = fetch_items(config, marks=marks)
+    print(f"      共获取 {len(items)} 条")
+
+    # 保存原始数据快照
+    try:
+        save_snapshot(config, today, items)
+    except Exception as e:
+        print(f"[警告] 原始数据快照保存失败: {e}")
+
+    generate_trends_digest(items, config, today)
+    commit_rss_marks(marks)
 
     print("\n" + "=" * 50)
     print("增强版生成完成!")
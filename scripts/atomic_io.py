@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+原子写入
+生成的简报和页面先写入同目录下的临时文件，fsync 后再 rename 覆盖目标，
+进程中途崩溃时目标文件要么是旧内容、要么是新内容，不会被截断。
+内容没有变化时不写入，避免无意义的 git 变更和 Pages 重新部署。
+"""
+
+import os
+import threading
+from pathlib import Path
+
+
+def _fsync_dir(directory: Path):
+    """rename 之后同步目录项，保证重启后能看到新文件（不支持的平台忽略）"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _tmp_path(path: Path) -> Path:
+    # 同目录下的隐藏临时文件，保证 rename 不跨文件系统；带线程号避免并发写同一目录时冲突
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def atomic_write(path: Path, content: str | bytes) -> bool:
+    """
+    原子写入文件
+
+    Args:
+        path: 目标文件
+        content: 文本（按 UTF-8 编码）或字节
+
+    Returns:
+        是否实际写入（内容未变化时返回 False）
+    """
+    path = Path(path)
+    data = content.encode("utf-8") if isinstance(content, str) else content
+
+    # 符号链接（如 latest.md）要替换为普通文件，不能比较其指向的内容
+    if path.exists() and not path.is_symlink() and path.stat().st_size == len(data):
+        if path.read_bytes() == data:
+            return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _tmp_path(path)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    _fsync_dir(path.parent)
+    return True
+
+
+def atomic_symlink(target: Path, link: Path) -> bool:
+    """
+    原子地将 link 指向 target（同目录下使用相对路径）
+
+    不支持符号链接的平台（如未开启开发者模式的 Windows）退回为原子写入一份副本。
+
+    Returns:
+        是否有变化
+    """
+    target, link = Path(target), Path(link)
+    relative = os.path.relpath(target, link.parent)
+    if link.is_symlink() and os.readlink(link) == relative:
+        return False
+
+    tmp_path = _tmp_path(link)
+    try:
+        os.symlink(relative, tmp_path)
+    except (OSError, NotImplementedError):
+        return atomic_write(link, target.read_bytes())
+    try:
+        os.replace(tmp_path, link)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    _fsync_dir(link.parent)
+    return True
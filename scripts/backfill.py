@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+历史简报回填
+按日期范围并发执行 抓取 → 生成 → 保存，支持断点续跑，结束后统一重建站点
+"""
+
+import argparse
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from atomic_io import atomic_symlink
+from digest_schema import parse_markdown_digest, save_digest_json
+from llm_client import CACHE_DIR
+from models import Item
+from snapshot_store import load_snapshot, snapshot_path
+from sources import Scheduler
+from tech_digest import (
+    PROJECT_ROOT,
+    load_config,
+    fetch_items,
+    generate_digest,
+    save_digest,
+    select_items,
+)
+
+
+CHECKPOINT_PATH = CACHE_DIR / "backfill_checkpoint.json"
+
+
+class Checkpoint:
+    """回填进度记录，线程安全，每次更新立即落盘"""
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = {"done": [], "failed": {}}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def is_done(self, date: str) -> bool:
+        return date in self.state["done"]
+
+    def mark_done(self, date: str):
+        with self.lock:
+            if date not in self.state["done"]:
+                self.state["done"].append(date)
+            self.state["failed"].pop(date, None)
+            self._flush()
+
+    def mark_failed(self, date: str, error: str):
+        with self.lock:
+            self.state["failed"][date] = error
+            self._flush()
+
+    def reset(self):
+        with self.lock:
+            self.state = {"done": [], "failed": {}}
+            self._flush()
+
+    def _flush(self):
+        self.path.parent.mkdir(exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+
+
+class ItemCache:
+    """
+    抓取结果缓存
+
+    读取当天的原始数据快照。没有快照的日期只有在 allow_live 时才使用当前抓取的内容
+    （内容与该日期无关，仅适合补齐空缺），同一次回填共用一次抓取，
+    首个请求的线程负责抓取，其余线程等待结果。
+    """
+
+    def __init__(self, config: dict, scheduler: Scheduler = None, allow_live: bool = False):
+        self.config = config
+        self.scheduler = scheduler
+        self.allow_live = allow_live
+        self.lock = threading.Lock()
+        self.items = None
+
+    def get(self, date: str) -> list[Item] | None:
+        snapshot = load_snapshot(self.config, date)
+        if snapshot or not self.allow_live:
+            return snapshot
+
+        with self.lock:
+            if self.items is None:
+                print("      正在抓取数据源（所有日期共用）...")
+                self.items = fetch_items(self.config, self.scheduler)
+            return self.items
+
+
+def date_range(start: str, end: str, date_format: str) -> list[str]:
+    """生成闭区间内的日期字符串列表"""
+    current = datetime.strptime(start, date_format)
+    last = datetime.strptime(end, date_format)
+    dates = []
+    while current <= last:
+        dates.append(current.strftime(date_format))
+        current += timedelta(days=1)
+    return dates
+
+
+def refresh_latest(config: dict):
+    """将 latest.md 指向日期最新的简报（不改写简报本身）"""
+    digests_dir = PROJECT_ROOT / config["output"]["digests_dir"]
+    dated = sorted(digests_dir.glob("[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9].md"))
+    if dated:
+        atomic_symlink(dated[-1], digests_dir / "latest.md")
+
+
+def export_json(dates: list[str], config: dict) -> int:
+    """为已有的 Markdown 简报补生成结构化 JSON（不调用模型）"""
+    digests_dir = PROJECT_ROOT / config["output"]["digests_dir"]
+    exported = 0
+    for date in dates:
+        md_file = digests_dir / f"{date}.md"
+        if not md_file.exists():
+            continue
+        try:
+            save_digest_json(parse_markdown_digest(md_file.read_text(encoding="utf-8"), date), digests_dir)
+            exported += 1
+        except ValueError as e:
+            print(f"[警告] {date} 解析失败: {e}")
+    return exported
+
+
+def backfill(dates: list[str], config: dict, workers: int, checkpoint: Checkpoint,
+             scheduler: Scheduler = None, allow_live: bool = False) -> list[str]:
+    """
+    并发回填指定日期，已存在的简报不会被覆盖
+
+    Returns:
+        成功生成的日期列表
+    """
+    cache = ItemCache(config, scheduler, allow_live)
+    digests_dir = PROJECT_ROOT / config["output"]["digests_dir"]
+
+    def run_day(date: str) -> str:
+        items = cache.get(date)
+        if not items:
+            raise RuntimeError("未获取到任何内容")
+        items = select_items(items, config, date, scheduler)
+        digest, structured = generate_digest(items, config, date)
+        # 生成期间可能已有其他进程写入了当天简报
+        if (digests_dir / f"{date}.md").exists():
+            raise RuntimeError("简报已存在，未覆盖")
+        save_digest(digest, config, date, update_latest=False, digest=structured)
+        return date
+
+    completed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_day, date): date for date in dates}
+        for future in as_completed(futures):
+            date = futures[future]
+            try:
+                future.result()
+                checkpoint.mark_done(date)
+                completed.append(date)
+            except Exception as e:
+                print(f"[警告] {date} 回填失败: {e}")
+                checkpoint.mark_failed(date, str(e))
+
+    return sorted(completed)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """回填参数（本脚本与 digest.py backfill 共用）"""
+    parser.add_argument("--start", required=True, help="起始日期，如 2026-01-17")
+    parser.add_argument("--end", required=True, help="结束日期（含），如 2026-03-02")
+    parser.add_argument("--allow-live", action="store_true",
+                        help="没有原始数据快照的日期使用当前抓取的内容生成（默认跳过这些日期）")
+    parser.add_argument("--restart", action="store_true", help="忽略断点记录重新开始")
+    parser.add_argument("--workers", type=int, help="并发天数")
+    parser.add_argument("--no-site", action="store_true", help="结束后不重建站点")
+    parser.add_argument("--json-only", action="store_true", help="只为已有简报补生成结构化 JSON")
+
+
+def run_backfill(args: argparse.Namespace, config: dict, scheduler: Scheduler = None):
+    """按参数执行回填，scheduler 为共享调度器（抓取时使用）"""
+    date_format = config["output"]["date_format"]
+    digests_dir = PROJECT_ROOT / config["output"]["digests_dir"]
+    workers = args.workers or config["backfill"]["max_workers"]
+
+    if args.json_only:
+        dates = date_range(args.start, args.end, date_format)
+        print(f"\n已生成 {export_json(dates, config)}/{len(dates)} 天的结构化简报")
+        return
+
+    checkpoint = Checkpoint()
+    if args.restart:
+        checkpoint.reset()
+
+    # 已存在的简报不会被覆盖，需要重新生成时先手动删除对应文件
+    pending = []
+    for date in date_range(args.start, args.end, date_format):
+        if checkpoint.is_done(date):
+            continue
+        if (digests_dir / f"{date}.md").exists():
+            continue
+        pending.append(date)
+
+    missing = [date for date in pending if not snapshot_path(config, date).exists()]
+    if missing and not args.allow_live:
+        print(f"[跳过] {len(missing)} 天没有原始数据快照（可用 --allow-live 以当前内容生成）: {', '.join(missing)}")
+        pending = [date for date in pending if date not in missing]
+    elif missing:
+        print(f"[警告] {len(missing)} 天没有原始数据快照，将使用当前抓取的内容: {', '.join(missing)}")
+
+    print(f"\n待回填 {len(pending)} 天，并发 {workers}")
+    if not pending:
+        print("无需回填")
+        return
+
+    completed = backfill(pending, config, workers, checkpoint, scheduler, args.allow_live)
+    print(f"\n成功 {len(completed)}/{len(pending)} 天")
+    if len(completed) == len(pending):
+        # 全部完成后清除断点，下次回填从头开始
+        checkpoint.reset()
+
+    if completed:
+        refresh_latest(config)
+        if not args.no_site:
+            from digest import build_site
+            print("\n正在重建站点...")
+            build_site(config)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="回填历史科技简报")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("历史简报回填")
+    print("=" * 50)
+
+    run_backfill(args, load_config())
+
+    print("\n" + "=" * 50)
+    print("回填完成!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
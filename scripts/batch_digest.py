@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+批量简报生成器
+通过 Message Batches API（或本地等效实现）批量提交简报/趋势分析任务，
+适用于回填、历史日期重新生成等非交互场景
+
+简报写入 digests/{date}.md，趋势分析写入 digests/trends/{date}.md；
+已存在的文件默认不覆盖（--force 覆盖）。
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from advanced_digest import build_trends_prompt, load_recent_digests
+from atomic_io import atomic_write
+from llm_client import CACHE_DIR, call_llm, get_client
+from snapshot_store import load_snapshot
+from tech_digest import (
+    PROJECT_ROOT,
+    build_digest_prompt,
+    fetch_items,
+    load_config,
+    prepare_content_for_claude,
+    report_write,
+    save_digest,
+    select_items,
+)
+
+
+BATCH_STATE_DIR = CACHE_DIR / "batches"
+
+
+class AnthropicBatchBackend:
+    """Anthropic Message Batches API 后端"""
+
+    name = "api"
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.client = get_client()
+
+    def submit(self, jobs: list[dict]) -> str:
+        """提交任务，返回批次 ID"""
+        batch_requests = [{
+            "custom_id": job["custom_id"],
+            "params": {
+                "model": self.config["claude"]["model"],
+                "max_tokens": job["max_tokens"],
+                "messages": [{"role": "user", "content": job["prompt"]}],
+            },
+        } for job in jobs]
+        batch = self.client.messages.batches.create(requests=batch_requests)
+        return batch.id
+
+    def is_done(self, batch_id: str) -> bool:
+        """批次是否已处理完成"""
+        batch = self.client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(f"      [{batch.processing_status}] 处理中 {counts.processing}，"
+              f"成功 {counts.succeeded}，失败 {counts.errored}")
+        return batch.processing_status == "ended"
+
+    def results(self, batch_id: str) -> dict:
+        """获取结果，返回 custom_id -> 文本（失败为 None）"""
+        output = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                output[entry.custom_id] = entry.result.message.content[0].text
+            else:
+                print(f"[警告] 任务 {entry.custom_id} 未成功: {entry.result.type}")
+                output[entry.custom_id] = None
+        return output
+
+
+class LocalBatchBackend:
+    """
+    本地批处理后端
+
+    与 AnthropicBatchBackend 接口一致，在后台线程池中逐个调用 messages.create，
+    用于不支持 Batches API 的兼容端点（如智谱 BigModel）。
+    """
+
+    name = "local"
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.executor = ThreadPoolExecutor(max_workers=config["batch"]["max_workers"])
+        self.batches = {}
+
+    def submit(self, jobs: list[dict]) -> str:
+        batch_id = f"local_{int(time.time() * 1000)}"
+        self.batches[batch_id] = {
+            job["custom_id"]: self.executor.submit(call_llm, job["prompt"], self.config, job["max_tokens"])
+            for job in jobs
+        }
+        return batch_id
+
+    def is_done(self, batch_id: str) -> bool:
+        futures = self.batches[batch_id].values()
+        done = sum(1 for f in futures if f.done())
+        print(f"      [local] 已完成 {done}/{len(futures)}")
+        return done == len(futures)
+
+    def results(self, batch_id: str) -> dict:
+        output = {}
+        for custom_id, future in self.batches[batch_id].items():
+            try:
+                output[custom_id] = future.result()
+            except Exception as e:
+                print(f"[警告] 任务 {custom_id} 失败: {e}")
+                output[custom_id] = None
+        return output
+
+
+def get_backend(config: dict, name: str = None):
+    """
+    选择批处理后端
+
+    auto: 使用兼容端点（设置了 ANTHROPIC_BASE_URL）时走本地实现，否则走 Batches API
+    """
+    name = name or config["batch"]["backend"]
+    if name == "auto":
+        name = "local" if os.environ.get("ANTHROPIC_BASE_URL") else "api"
+    if name == "api":
+        return AnthropicBatchBackend(config)
+    return LocalBatchBackend(config)
+
+
+def output_path(config: dict, kind: str, date: str) -> Path:
+    """任务结果的保存位置：趋势分析单独存放，不替换当天的简报"""
+    digests_dir = PROJECT_ROOT / config["output"]["digests_dir"]
+    if kind == "trends":
+        return digests_dir / "trends" / f"{date}.md"
+    return digests_dir / f"{date}.md"
+
+
+def build_jobs(dates: list[str], kind: str, config: dict, allow_live: bool = False, force: bool = False) -> list[dict]:
+    """
+    构建批量任务
+
+    有原始数据快照的日期使用快照内容；没有快照的日期默认不加入批次并列出，
+    allow_live 时这些日期共用一次实时抓取（内容与该日期无关）。
+    结果文件已存在的日期不提交（force 时重新生成）。
+
+    Args:
+        dates: 日期列表
+        kind: "digest" 或 "trends"
+        config: 全局配置
+        allow_live: 没有快照的日期是否使用当前抓取的内容
+        force: 是否覆盖已存在的结果
+    """
+    live_items = None
+    skipped = []
+    existing = []
+    jobs = []
+    for date in dates:
+        if not force and output_path(config, kind, date).exists():
+            existing.append(date)
+            continue
+        items = load_snapshot(config, date)
+        if not items:
+            if not allow_live:
+                skipped.append(date)
+                continue
+            if live_items is None:
+                print("      正在抓取数据源（无快照的日期共用）...")
+                live_items = fetch_items(config)
+            items = live_items
+        content = prepare_content_for_claude(select_items(items, config, date))
+
+        if kind == "trends":
+            historical = load_recent_digests(config, days=7, reference_date=date)
+            prompt = build_trends_prompt(content, historical, date)
+            max_tokens = config["claude"]["max_tokens"] + 1024
+        else:
+            prompt = build_digest_prompt(content, date)
+            max_tokens = config["claude"]["max_tokens"]
+        jobs.append({
+            "custom_id": f"{kind}-{date}",
+            "date": date,
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+        })
+    if existing:
+        print(f"[跳过] {len(existing)} 天已有结果（可用 --force 覆盖）: {', '.join(existing)}")
+    if skipped:
+        print(f"[跳过] {len(skipped)} 天没有原始数据快照（可用 --allow-live 以当前内容生成）: {', '.join(skipped)}")
+    return jobs
+
+
+def _state_path(batch_id: str) -> Path:
+    return BATCH_STATE_DIR / f"{batch_id}.json"
+
+
+def save_batch_state(batch_id: str, backend: str, jobs: list[dict]):
+    """记录远端批次与日期的对应关系，便于进程退出后继续轮询"""
+    BATCH_STATE_DIR.mkdir(parents=True, exist_ok=True)
+    state = {
+        "batch_id": batch_id,
+        "backend": backend,
+        "jobs": {job["custom_id"]: job["date"] for job in jobs},
+    }
+    with open(_state_path(batch_id), "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+def load_batch_state(batch_id: str) -> dict:
+    """读取批次记录"""
+    with open(_state_path(batch_id), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def wait_and_save(backend, batch_id: str, job_dates: dict, config: dict, force: bool = False) -> int:
+    """
+    轮询批次直至完成，并将结果写入 digests/（见 output_path）
+
+    批次运行期间出现的同名文件同样不覆盖，除非 force。
+
+    Returns:
+        成功保存的数量
+    """
+    interval = config["batch"]["poll_interval"] if backend.name == "api" else 2
+    while not backend.is_done(batch_id):
+        time.sleep(interval)
+
+    results = backend.results(batch_id)
+
+    digests_dir = PROJECT_ROOT / config["output"]["digests_dir"]
+    pattern = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9].md"
+    existing = [f.stem for f in digests_dir.glob(pattern)]
+    newest = max(existing + list(job_dates.values()))
+
+    saved = 0
+    for custom_id, text in sorted(results.items()):
+        if not text:
+            continue
+        date = job_dates[custom_id]
+        kind = custom_id.split("-", 1)[0]
+        path = output_path(config, kind, date)
+        if path.exists() and not force:
+            print(f"[跳过] 已存在，未覆盖（可用 --force 覆盖）: {path}")
+            continue
+        if kind == "trends":
+            path.parent.mkdir(parents=True, exist_ok=True)
+            report_write(path, atomic_write(path, text))
+        else:
+            save_digest(text, config, date, update_latest=(date == newest))
+        saved += 1
+
+    if _state_path(batch_id).exists():
+        _state_path(batch_id).unlink()
+    return saved
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="批量生成科技简报")
+    parser.add_argument("--dates", nargs="+", help="要生成的日期列表，如 2026-02-03 2026-02-04")
+    parser.add_argument("--kind", choices=["digest", "trends"], default="digest", help="任务类型")
+    parser.add_argument("--backend", choices=["auto", "api", "local"], help="批处理后端")
+    parser.add_argument("--resume", metavar="BATCH_ID", help="继续轮询已提交的批次")
+    parser.add_argument("--allow-live", action="store_true",
+                        help="没有原始数据快照的日期使用当前抓取的内容生成（默认跳过这些日期）")
+    parser.add_argument("--force", action="store_true", help="覆盖已存在的简报或趋势分析")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("批量简报生成器")
+    print("=" * 50)
+
+    config = load_config()
+
+    if args.resume:
+        state = load_batch_state(args.resume)
+        backend = get_backend(config, state["backend"])
+        print(f"\n继续轮询批次: {args.resume}")
+        saved = wait_and_save(backend, args.resume, state["jobs"], config, args.force)
+        print(f"\n共保存 {saved} 份")
+        return
+
+    if not args.dates:
+        parser.error("请指定 --dates 或 --resume")
+
+    print("\n[1/3] 正在准备任务内容...")
+    jobs = build_jobs(args.dates, args.kind, config, args.allow_live, args.force)
+    if not jobs:
+        print("\n没有可提交的任务")
+        return
+    backend = get_backend(config, args.backend)
+
+    print(f"[2/3] 正在提交 {len(jobs)} 个任务 (后端: {backend.name})...")
+    batch_id = backend.submit(jobs)
+    print(f"      批次 ID: {batch_id}")
+    if backend.name == "api":
+        # 远端批次可能需要较长时间，记录状态以便 --resume
+        save_batch_state(batch_id, backend.name, jobs)
+        print(f"      中断后可使用 --resume {batch_id} 继续")
+
+    print("[3/3] 等待批次完成...")
+    saved = wait_and_save(backend, batch_id, {job["custom_id"]: job["date"] for job in jobs}, config, args.force)
+
+    print("\n" + "=" * 50)
+    print(f"批量生成完成! 共保存 {saved} 份")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
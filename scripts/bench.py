@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+性能基准
+用合成数据测量各处理阶段的吞吐量
+
+用法:
+    python scripts/bench.py clean --items 20000 --processes 1 2 4 8
+    python scripts/bench.py startup --modules tech_digest generate_page
+    python scripts/bench.py pipeline --rounds 3 --requests 8 --llm-latency 1 --llm-429-rate 0.2
+"""
+
+import argparse
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from html_clean import clean_texts, shutdown_pool
+from stub_servers import add_stub_arguments, make_article, point_config_at, start_server, stub_options
+
+
+def make_summaries(count: int, plain_ratio: float, seed: int = 42) -> list[str]:
+    """生成 RSS 摘要，其中 plain_ratio 比例为纯文本"""
+    rng = random.Random(seed)
+    summaries = []
+    for i in range(count):
+        text = f"第 {i} 条：新版本发布，性能提升 {rng.randrange(5, 80)}%，并修复了若干问题。" * 4
+        if rng.random() < plain_ratio:
+            summaries.append(text)
+        else:
+            summaries.append(
+                f'<div class="summary"><p>{text}</p><img src="https://example.com/{i}.png"/>'
+                f'<p><a href="https://example.com/{i}">阅读全文 &raquo;</a></p></div>'
+            )
+    return summaries
+
+
+def bench_clean(args):
+    """HTML 清洗在不同进程数下的吞吐量"""
+    summaries = make_summaries(args.items, args.plain_ratio)
+    articles = [make_article(str(i)) for i in range(max(args.items // 20, 1))]
+    print(f"摘要 {len(summaries)} 条（纯文本占 {args.plain_ratio:.0%}），文章 {len(articles)} 篇，CPU {os.cpu_count()} 核")
+    print(f"{'进程数':>6} {'摘要/秒':>10} {'文章/秒':>10} {'加速比':>8}")
+
+    baseline = None
+    for processes in args.processes:
+        config = {"cleaning": {"processes": processes, "batch_size": args.batch_size, "min_parallel": 0}}
+        # 预热进程池，不计入耗时
+        clean_texts("summary", summaries[:processes * 4], 200, config)
+
+        start = time.perf_counter()
+        clean_texts("summary", summaries, 200, config)
+        summary_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        clean_texts("article", articles, 300, config)
+        article_elapsed = time.perf_counter() - start
+
+        total = summary_elapsed + article_elapsed
+        baseline = baseline or total
+        print(
+            f"{processes:>6} {len(summaries) / summary_elapsed:>10.0f} "
+            f"{len(articles) / article_elapsed:>10.0f} {baseline / total:>7.2f}x"
+        )
+    shutdown_pool()
+
+
+SCRIPTS_DIR = Path(__file__).parent
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+STARTUP_MODULES = [
+    "tech_digest", "advanced_digest", "generate_html", "generate_page",
+    "notifiers", "backfill", "digest",
+]
+
+
+def import_profile(module: str) -> tuple[float, list[tuple[str, int]]]:
+    """
+    在新解释器中以 -X importtime 导入模块
+
+    Returns:
+        (总耗时毫秒, [(顶层依赖包, 累计微秒)])，依赖包按耗时降序
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True,
+    )
+    # 输出按导入完成顺序排列，子模块在父模块之前、缩进多一级；
+    # 被测模块之前、缩进为 3 的行即其直接依赖（解释器启动时的导入在更早的顶层行下面）
+    children = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 3:
+            children.append((name, cumulative))
+        elif indent == 1:
+            if name == module:
+                packages = {}
+                for child, us in children:
+                    top = child.split(".")[0]
+                    packages[top] = max(packages.get(top, 0), us)
+                return cumulative / 1000, sorted(packages.items(), key=lambda kv: kv[1], reverse=True)
+            children = []
+    raise RuntimeError(f"未找到模块 {module} 的导入记录")
+
+
+def bench_startup(args):
+    """各入口模块的导入耗时（取多次运行的最小值）"""
+    print(f"Python {sys.version.split()[0]}，每个模块运行 {args.repeat} 次取最小值")
+    print(f"{'模块':<18} {'导入耗时':>10}  最慢的依赖")
+    for module in args.modules:
+        best, packages = None, []
+        for _ in range(args.repeat):
+            total, deps = import_profile(module)
+            if best is None or total < best:
+                best, packages = total, deps
+        heaviest = "，".join(f"{name} {us / 1000:.0f}ms" for name, us in packages[:args.top] if us >= 1000)
+        print(f"{module:<18} {best:>8.0f}ms  {heaviest}")
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def bench_pipeline(args):
+    """
+    在本地桩服务上压测 抓取 → 筛选 → 生成（数据源和 LLM 都是模拟的，不需要网络）
+
+    每轮先抓取一次，再以 --concurrency 并发发起 --requests 次生成，
+    统计生成耗时分位数、成功/失败次数，以及桩服务看到的请求（含 SDK 重试）与 304 次数。
+    """
+    import sources
+    import tech_digest
+    from llm_client import get_client
+
+    server = start_server(0, args.stories, args.latency, **stub_options(args))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    stats = server.RequestHandlerClass.stats
+
+    config = point_config_at(tech_digest.load_config(), base_url)
+    for name, options in config["sources"].items():
+        if isinstance(options, dict):
+            options["enabled"] = name in ("v2ex", "hackernews", "rss")
+    config["enrichment"]["enabled"] = False
+    config["claude"]["multi_model"]["enabled"] = False
+    # 桩数据不能写进真实的数据源缓存（RSS 高水位、HN 条目缓存会影响正式运行）
+    cache_dir = Path(tempfile.mkdtemp(prefix="bench-sources-"))
+    sources.SOURCE_CACHE_DIR, sources.HTTP_CACHE_DIR = cache_dir, cache_dir / "http"
+    os.environ["ANTHROPIC_BASE_URL"] = f"{base_url}/llm"
+    os.environ.setdefault("ANTHROPIC_API_KEY", "stub")
+    get_client()  # 预先创建共享客户端（导入 anthropic），不计入首轮耗时
+
+    today = tech_digest.today_str(config)
+    scheduler = sources.Scheduler(config["sources"]["max_workers"])
+    print(f"桩服务 {base_url}，每轮 {args.requests} 次生成，并发 {args.concurrency}")
+    print(f"{'轮次':>4} {'抓取':>7} {'条目':>5} {'p50':>7} {'p95':>7} {'成功':>5} {'失败':>5}")
+
+    def generate(content: str) -> float:
+        start = time.perf_counter()
+        tech_digest.generate_digest_with_claude(content, config, today)
+        return time.perf_counter() - start
+
+    try:
+        for round_no in range(1, args.rounds + 1):
+            start = time.perf_counter()
+            items = tech_digest.fetch_items(config, scheduler)
+            fetch_elapsed = time.perf_counter() - start
+            content = tech_digest.prepare_content_for_claude(tech_digest.select_items(items, config, today, scheduler))
+
+            latencies, failed = [], 0
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                futures = [executor.submit(generate, content) for _ in range(args.requests)]
+                for future in futures:
+                    try:
+                        latencies.append(future.result())
+                    except Exception as e:
+                        failed += 1
+                        print(f"[警告] 生成失败: {type(e).__name__}: {e}")
+            p50, p95 = percentile(latencies, 50), percentile(latencies, 95)
+            print(f"{round_no:>4} {fetch_elapsed:>6.2f}s {len(items):>5} {p50:>6.2f}s {p95:>6.2f}s "
+                  f"{len(latencies):>5} {failed:>5}")
+    finally:
+        scheduler.close()
+        server.shutdown()
+
+    print("\n桩服务请求统计:")
+    for key in sorted(stats):
+        print(f"  {key:<18} {stats[key]}")
+
+
+def add_subcommands(subparsers):
+    """基准子命令（本脚本与 digest.py bench 共用）"""
+    clean = subparsers.add_parser("clean", help="HTML 清洗吞吐量")
+    clean.add_argument("--items", type=int, default=20000, help="摘要条数")
+    clean.add_argument("--plain-ratio", type=float, default=0.3, help="纯文本摘要比例")
+    clean.add_argument("--batch-size", type=int, default=64)
+    clean.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    clean.set_defaults(bench=bench_clean)
+
+    startup = subparsers.add_parser("startup", help="入口模块导入耗时（-X importtime）")
+    startup.add_argument("--modules", nargs="+", default=STARTUP_MODULES)
+    startup.add_argument("--repeat", type=int, default=3)
+    startup.add_argument("--top", type=int, default=3, help="列出最慢的依赖个数")
+    startup.set_defaults(bench=bench_startup)
+
+    pipeline = subparsers.add_parser("pipeline", help="在本地桩服务（数据源 + 模拟 LLM）上压测抓取与生成")
+    pipeline.add_argument("--rounds", type=int, default=3, help="轮数（第二轮起可观察条件请求与缓存）")
+    pipeline.add_argument("--requests", type=int, default=8, help="每轮生成次数")
+    pipeline.add_argument("--concurrency", type=int, default=4, help="同时进行的生成数")
+    pipeline.add_argument("--stories", type=int, default=500, help="HN 故事数量")
+    pipeline.add_argument("--latency", type=float, default=0.0, help="数据源每个请求的额外延迟（秒）")
+    add_stub_arguments(pipeline)
+    pipeline.set_defaults(bench=bench_pipeline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="性能基准")
+    add_subcommands(parser.add_subparsers(dest="command", required=True))
+    args = parser.parse_args()
+    args.bench(args)
+
+
+if __name__ == "__main__":
+    main()
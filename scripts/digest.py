@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+简报命令行入口
+各子命令共用一个 DigestContext（配置、HTTP 连接池、抓取结果缓存），LLM 客户端由 llm_client.get_client 在进程内共享，
+完整流程 run 在一个进程中完成 抓取 → 生成 → 站点 → 通知，不重复加载配置和创建客户端。
+
+用法:
+    python scripts/digest.py run                     # 完整流程（GitHub Actions 使用）
+    python scripts/digest.py fetch                   # 只抓取并保存快照
+    python scripts/digest.py generate --date 2026-03-02
+    python scripts/digest.py generate --date 2026-03-02 --allow-live   # 没有快照时用当前内容生成
+    python scripts/digest.py trends                  # 增强版（趋势分析）
+    python scripts/digest.py build-site
+    python scripts/digest.py notify --date 2026-03-02
+    python scripts/digest.py update                  # 日内增量更新（只处理新条目）
+    python scripts/digest.py backfill --start 2026-01-17 --end 2026-03-02
+    python scripts/digest.py bench startup
+"""
+
+import argparse
+import sys
+import time
+from functools import cached_property
+
+from models import Item
+from sources import Scheduler, commit_rss_marks
+from tech_digest import (
+    PROJECT_ROOT,
+    fetch_items,
+    generate_digest,
+    load_config,
+    save_digest,
+    select_items,
+    start_notify,
+    today_str,
+)
+
+
+class DigestContext:
+    """
+    一次命令行运行内共享的状态
+
+    config 只加载一次；HTTP 调度器（线程池 + 连接池）在首次使用时创建，
+    之后所有步骤复用；抓取结果按日期缓存，后续步骤不再重复抓取或读取快照。
+    现场抓取只能得到当前内容，因此只用于今天；历史日期需要 allow_live 才会用当前内容代替。
+    """
+
+    def __init__(self, config: dict = None, allow_live: bool = False):
+        self.config = config or load_config()
+        self.allow_live = allow_live
+        self.items: dict[str, list[Item]] = {}
+        # 本进程抓取今天的数据时暂存的 RSS 高水位，今天的简报保存后提交
+        self.rss_marks: dict[str, dict] = {}
+        self.digests: dict[str, str] = {}
+
+    @cached_property
+    def today(self) -> str:
+        return today_str(self.config)
+
+    @cached_property
+    def digests_dir(self):
+        return PROJECT_ROOT / self.config["output"]["digests_dir"]
+
+    @cached_property
+    def scheduler(self) -> Scheduler:
+        return Scheduler(self.config["sources"]["max_workers"])
+
+    def fetch(self, date: str) -> list[Item]:
+        """
+        抓取并保存快照，结果缓存在上下文中
+
+        历史日期没有 allow_live 时抛出 ValueError；允许时也不把当前内容存为该日快照。
+        """
+        live = date != self.today
+        if live and not self.allow_live:
+            raise ValueError(f"{date} 没有原始数据快照，现场抓取只能得到当前内容（可用 --allow-live 以当前内容生成）")
+        print("\n正在抓取数据源...")
+        if live:
+            print(f"[警告] {date} 没有原始数据快照，使用当前抓取的内容")
+        items = fetch_items(self.config, self.scheduler, None if live else self.rss_marks)
+        print(f"      共获取 {len(items)} 条")
+        if items and not live:
+            try:
+                from snapshot_store import save_snapshot
+                save_snapshot(self.config, date, items)
+            except Exception as e:
+                print(f"[警告] 原始数据快照保存失败: {e}")
+        self.items[date] = items
+        return items
+
+    def items_for(self, date: str) -> list[Item]:
+        """本进程已抓取的结果 → 当天快照 → 现场抓取"""
+        if date in self.items:
+            return self.items[date]
+        from snapshot_store import load_snapshot
+        snapshot = load_snapshot(self.config, date)
+        if snapshot:
+            print(f"\n使用 {date} 的原始数据快照（{len(snapshot)} 条）")
+            self.items[date] = snapshot
+            return snapshot
+        return self.fetch(date)
+
+    def commit_rss_marks(self, date: str):
+        """保存 date 的简报后调用：只有今天的简报才推进 RSS 高水位"""
+        if date == self.today and self.rss_marks:
+            commit_rss_marks(self.rss_marks)
+            self.rss_marks = {}
+
+    def digest_for(self, date: str) -> str | None:
+        """本进程生成的简报，否则读取已保存的文件"""
+        if date not in self.digests:
+            path = self.digests_dir / f"{date}.md"
+            if not path.exists():
+                return None
+            self.digests[date] = path.read_text(encoding="utf-8")
+        return self.digests[date]
+
+    def close(self):
+        if "scheduler" in self.__dict__:
+            self.scheduler.close()
+
+
+def build_site(config: dict):
+    """重建 HTML 索引页和 GitHub Pages 页面"""
+    import generate_html
+    import generate_page
+
+    digests_dir = PROJECT_ROOT / config["output"]["digests_dir"]
+    generate_html.generate_html(generate_html.get_digest_files(digests_dir), digests_dir / "index.html")
+    generate_page.generate_page(generate_page.get_digest_files(digests_dir), PROJECT_ROOT / "index.html")
+
+
+def cmd_fetch(args, ctx: DigestContext):
+    ctx.fetch(ctx.today)
+
+
+def load_items(ctx: DigestContext, date: str) -> list[Item]:
+    """读取简报所需的条目，历史日期缺少快照或没有任何内容时退出"""
+    try:
+        items = ctx.items_for(date)
+    except ValueError as e:
+        print(f"\n[错误] {e}")
+        sys.exit(1)
+    if not items:
+        print("\n[错误] 未获取到任何内容，退出")
+        sys.exit(1)
+    return items
+
+
+def cmd_generate(args, ctx: DigestContext):
+    date = args.date or ctx.today
+    items = load_items(ctx, date)
+
+    print("\n正在筛选排序...")
+    items = select_items(items, ctx.config, date, ctx.scheduler)
+    print(f"      保留 {len(items)} 条")
+
+    print("正在生成简报...")
+    digest, structured = generate_digest(items, ctx.config, date)
+    # 重新生成历史日期时不改动 latest.md
+    save_digest(digest, ctx.config, date, update_latest=(date == ctx.today), digest=structured)
+    ctx.commit_rss_marks(date)
+    ctx.digests[date] = digest
+
+
+def cmd_trends(args, ctx: DigestContext):
+    from advanced_digest import generate_trends_digest
+
+    date = args.date or ctx.today
+    items = load_items(ctx, date)
+    ctx.digests[date] = generate_trends_digest(items, ctx.config, date, ctx.scheduler)
+    ctx.commit_rss_marks(date)
+
+
+def cmd_build_site(args, ctx: DigestContext):
+    print("\n正在重建站点...")
+    build_site(ctx.config)
+
+
+def cmd_notify(args, ctx: DigestContext):
+    date = args.date or ctx.today
+    digest = ctx.digest_for(date)
+    if digest is None:
+        print(f"\n[错误] 未找到 {date} 的简报")
+        sys.exit(1)
+    print("\n正在发送通知...")
+    dispatcher = start_notify(digest, ctx.config, date)
+    if dispatcher:
+        dispatcher.wait()
+
+
+def cmd_run(args, ctx: DigestContext):
+    """完整流程：通知在后台发送，同时重建站点"""
+    print(f"\n日期: {ctx.today}")
+    cmd_fetch(args, ctx)
+    (cmd_trends if args.trends else cmd_generate)(args, ctx)
+
+    dispatcher = None
+    if not args.no_notify:
+        print("\n正在发送通知（后台），同时重建站点...")
+        dispatcher = start_notify(ctx.digests[ctx.today], ctx.config, ctx.today)
+    cmd_build_site(args, ctx)
+    if dispatcher:
+        dispatcher.wait()
+
+
+def cmd_update(args, ctx: DigestContext):
+    from incremental import run_update
+
+    date = args.date or ctx.today
+    if date != ctx.today:
+        # 增量更新依赖现场抓取，只能用于今天
+        print(f"\n[错误] 增量更新只能用于今天（{ctx.today}）")
+        sys.exit(1)
+    print(f"\n日期: {date}（增量更新）")
+    if run_update(ctx, date):
+        print("[完成] 简报已更新")
+
+
+def cmd_backfill(args, ctx: DigestContext):
+    from backfill import run_backfill
+    run_backfill(args, ctx.config, ctx.scheduler)
+
+
+def cmd_bench(args, ctx: DigestContext):
+    args.bench(args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="每日科技简报")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="抓取、生成、重建站点并发送通知")
+    run.add_argument("--trends", action="store_true", help="生成增强版（趋势分析）简报")
+    run.add_argument("--no-notify", action="store_true", help="不发送通知")
+    run.set_defaults(func=cmd_run, date=None)
+
+    fetch = subparsers.add_parser("fetch", help="抓取数据源并保存当天快照")
+    fetch.set_defaults(func=cmd_fetch)
+
+    for name, func, help_text in [
+        ("generate", cmd_generate, "生成简报（优先使用快照）"),
+        ("trends", cmd_trends, "生成增强版简报（含趋势分析）"),
+        ("notify", cmd_notify, "发送已生成的简报"),
+        ("update", cmd_update, "增量更新当天简报（只处理新条目，不发送通知）"),
+    ]:
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--date", help="简报日期，默认北京时间今天")
+        if name in ("generate", "trends"):
+            sub.add_argument("--allow-live", action="store_true",
+                             help="历史日期没有原始数据快照时使用当前抓取的内容（默认报错退出）")
+        sub.set_defaults(func=func)
+
+    build = subparsers.add_parser("build-site", help="重建 HTML 索引页和 GitHub Pages 页面")
+    build.set_defaults(func=cmd_build_site)
+
+    from backfill import add_arguments
+    backfill = subparsers.add_parser("backfill", help="回填历史简报")
+    add_arguments(backfill)
+    backfill.set_defaults(func=cmd_backfill)
+
+    from bench import add_subcommands
+    bench = subparsers.add_parser("bench", help="性能基准")
+    add_subcommands(bench.add_subparsers(dest="bench_command", required=True))
+    bench.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args()
+    start = time.perf_counter()
+    ctx = DigestContext(allow_live=getattr(args, "allow_live", False))
+    try:
+        args.func(args, ctx)
+    finally:
+        ctx.close()
+    print(f"\n完成，耗时 {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+结构化简报
+简报除 Markdown 外另存一份 JSON（digests/{date}.json），通知、页面生成、趋势分析直接读取，
+不必各自用正则解析 Markdown。
+
+格式:
+    {
+        "date": "2026-03-02",
+        "title": "2026-03-02 科技简报",
+        "intro": "导语",
+        "sections": [
+            {"name": "今日热点", "items": [
+                {"title": "...", "summary": "...",
+                 "links": [{"title": "...", "url": "https://..."}],
+                 "sources": ["news.ycombinator.com"]}
+            ]}
+        ]
+    }
+
+生成时优先让模型通过工具调用直接输出该结构（见 DIGEST_TOOL），
+否则用 parse_markdown_digest 从 Markdown 解析。
+"""
+
+import json
+import re
+from pathlib import Path
+from urllib.parse import urlparse
+
+from atomic_io import atomic_write
+
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).parent.parent
+DIGESTS_DIR = PROJECT_ROOT / "digests"
+
+# 与 llm_client.DIGEST_SECTIONS 保持一致
+SECTION_NAMES = ["今日热点", "技术趋势", "产品观察", "推荐阅读"]
+
+_LINK = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "url": {"type": "string"},
+    },
+    "required": ["title", "url"],
+}
+
+DIGEST_TOOL = {
+    "name": "record_digest",
+    "description": "记录生成好的每日科技简报（结构化）",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string", "description": "简报标题，如 2026-03-02 科技简报"},
+            "intro": {"type": "string", "description": "一段简短导语"},
+            "sections": {
+                "type": "array",
+                "description": "按 今日热点、技术趋势、产品观察、推荐阅读 的顺序",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string", "enum": SECTION_NAMES},
+                        "items": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "title": {"type": "string"},
+                                    "summary": {"type": "string", "description": "要点及为什么重要"},
+                                    "links": {"type": "array", "items": _LINK},
+                                },
+                                "required": ["title", "summary", "links"],
+                            },
+                        },
+                    },
+                    "required": ["name", "items"],
+                },
+            },
+        },
+        "required": ["title", "intro", "sections"],
+    },
+}
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+LINK = re.compile(r"\[((?:[^\[\]]|\[[^\]]*\])*)\]\((https?://[^)\s]+)\)")
+BOLD = re.compile(r"\*\*(.+?)\*\*")
+LIST_MARKER = re.compile(r"^(?:[-*+]|\d+[.)、])\s+")
+NUMBERING = re.compile(r"^\d+[.)、]\s*")
+INTRO_LABEL = re.compile(r"^\*\*导语[:：]\*\*\s*|^导语[:：]\s*")
+
+
+def validate_digest(digest: dict) -> dict:
+    """
+    校验结构化简报
+
+    Returns:
+        原样返回，便于链式调用
+
+    Raises:
+        ValueError: 缺少字段、类型错误、没有任何条目或链接不是 http(s)
+    """
+    if not isinstance(digest, dict):
+        raise ValueError("简报必须是对象")
+    for key in ("date", "title", "intro"):
+        if not isinstance(digest.get(key), str):
+            raise ValueError(f"缺少字段: {key}")
+    sections = digest.get("sections")
+    if not isinstance(sections, list) or not sections:
+        raise ValueError("简报没有任何板块")
+
+    total = 0
+    for section in sections:
+        if not isinstance(section.get("name"), str) or not isinstance(section.get("items"), list):
+            raise ValueError(f"板块格式错误: {section!r:.80}")
+        for item in section["items"]:
+            if not isinstance(item.get("title"), str) or not item["title"].strip():
+                raise ValueError(f"{section['name']} 中有条目缺少标题")
+            if not isinstance(item.get("summary", ""), str):
+                raise ValueError(f"条目摘要格式错误: {item['title']}")
+            for link in item.get("links", []):
+                if not str(link.get("url", "")).startswith(("http://", "https://")):
+                    raise ValueError(f"条目链接无效: {item['title']}")
+            total += 1
+    if total == 0:
+        raise ValueError("简报没有任何条目")
+    return digest
+
+
+def normalize_digest(data: dict, date: str) -> dict:
+    """整理工具调用的输出：补全可选字段，来源由链接域名得出（与解析 Markdown 的结果一致）"""
+    sections = []
+    for section in data.get("sections", []):
+        items = []
+        for item in section.get("items", []):
+            links = [
+                {"title": str(link.get("title") or item.get("title", "")), "url": str(link.get("url", ""))}
+                for link in item.get("links", [])
+            ]
+            items.append({
+                "title": str(item.get("title", "")).strip(),
+                "summary": str(item.get("summary", "")).strip(),
+                "links": links,
+                "sources": _sources_from_links(links),
+            })
+        sections.append({"name": str(section.get("name", "")).strip(), "items": items})
+    return validate_digest({
+        "date": date,
+        "title": str(data.get("title") or f"{date} 科技简报").strip(),
+        "intro": str(data.get("intro", "")).strip(),
+        "sections": sections,
+    })
+
+
+def _sources_from_links(links: list[dict]) -> list[str]:
+    sources = []
+    for link in links:
+        host = urlparse(link["url"]).netloc.removeprefix("www.")
+        if host and host not in sources:
+            sources.append(host)
+    return sources
+
+
+def _section_name(heading: str) -> str:
+    """去掉 emoji、编号和加粗，能对上标准板块名时返回标准名"""
+    text = heading.replace("*", "").strip()
+    for name in SECTION_NAMES:
+        if name in text:
+            return name
+    text = NUMBERING.sub("", text)
+    return re.sub(r"^[^\w一-鿿]+", "", text).strip()
+
+
+def parse_markdown_digest(markdown: str, date: str) -> dict:
+    """
+    从 Markdown 简报解析出结构化简报（模型未按工具调用输出或历史简报时使用）
+
+    兼容历史简报中的几种写法：### / ## 板块标题（可带编号、emoji、加粗），
+    条目以加粗标题开头（可带列表符号或编号），其后为链接与说明。
+
+    Raises:
+        ValueError: 解析结果未通过校验
+    """
+    title = ""
+    intro_lines = []
+    sections = []
+    item = None
+    item_indent = 0
+
+    def finish_item():
+        if item is not None:
+            item["summary"] = " ".join(item.pop("_lines")).strip()
+            item["sources"] = _sources_from_links(item["links"])
+            sections[-1]["items"].append(item)
+
+    for raw in markdown.splitlines():
+        line = raw.strip()
+        heading = HEADING.match(line)
+        if heading and len(heading.group(1)) == 1 and not title:
+            title = heading.group(2).strip()
+            continue
+        if heading:
+            finish_item()
+            item = None
+            sections.append({"name": _section_name(heading.group(2)), "items": []})
+            continue
+        if not line or line == "---":
+            continue
+        if not sections:
+            intro_lines.append(INTRO_LABEL.sub("", line))
+            continue
+
+        indent = len(raw) - len(raw.lstrip())
+        body = LIST_MARKER.sub("", line)
+        bold = BOLD.match(body)
+        # 缩进在条目标题之下的加粗（如 **理由：**）属于条目说明
+        head = item is None or indent <= item_indent
+        # 紧跟在标题后、以冒号结尾的加粗（如 **⚡ 重要原因：**）是说明的引子
+        label_only = bold and item is not None and not item["_lines"] and bold.group(1).rstrip().endswith(("：", ":"))
+        if bold and head and not label_only:
+            finish_item()
+            item_indent = indent
+            label = NUMBERING.sub("", bold.group(1).strip())
+            link = LINK.fullmatch(label)
+            item = {
+                "title": (link.group(1) if link else label).strip().rstrip("：:"),
+                "links": [{"title": link.group(1), "url": link.group(2)}] if link else [],
+                "_lines": [],
+            }
+            body = body[bold.end():].lstrip(" -—–:：")
+            if not body:
+                continue
+        elif head and body != line and LINK.match(body):
+            # 只有链接的列表项：以链接文字为标题
+            finish_item()
+            item_indent = indent
+            link = LINK.match(body)
+            item = {"title": link.group(1).strip(), "links": [], "_lines": []}
+        if item is None:
+            continue
+
+        for link_title, url in LINK.findall(body):
+            if link_title in ("链接", "原文", "阅读原文", "link"):
+                link_title = item["title"]
+            item["links"].append({"title": link_title, "url": url})
+        text = LINK.sub(lambda m: m.group(1), body).replace("**", "").strip()
+        # 单独一行的链接不计入说明
+        if LINK.fullmatch(body) is None and text:
+            item["_lines"].append(text)
+
+    finish_item()
+    digest = {
+        "date": date,
+        "title": title or f"{date} 科技简报",
+        "intro": " ".join(intro_lines).strip(),
+        "sections": [section for section in sections if section["items"]],
+    }
+    return validate_digest(digest)
+
+
+def render_markdown(digest: dict) -> str:
+    """结构化简报渲染为 Markdown（与 parse_markdown_digest 互逆）"""
+    parts = [f"# {digest['title']}", ""]
+    if digest["intro"]:
+        parts += [digest["intro"], ""]
+    for section in digest["sections"]:
+        parts += ["---", "", f"### {section['name']}", ""]
+        for index, item in enumerate(section["items"], 1):
+            parts.append(f"**{index}. {item['title']}**")
+            parts += [f"[{link['title']}]({link['url']})" for link in item["links"]]
+            if item["summary"]:
+                parts.append(item["summary"])
+            parts.append("")
+    return "\n".join(parts).rstrip() + "\n"
+
+
+def get_highlights(digest: dict, limit: int = 5) -> list[str]:
+    """今日热点的标题"""
+    for section in digest["sections"]:
+        if section["name"] == "今日热点":
+            return [item["title"] for item in section["items"][:limit]]
+    return []
+
+
+def outline(digest: dict) -> str:
+    """简报提纲：每个板块一行条目标题，用作历史上下文时比全文省 token"""
+    return "\n".join(
+        f"- {section['name']}: " + "；".join(item["title"] for item in section["items"])
+        for section in digest["sections"]
+    )
+
+
+def digest_json_path(date: str, digests_dir: Path = DIGESTS_DIR) -> Path:
+    return digests_dir / f"{date}.json"
+
+
+def save_digest_json(digest: dict, digests_dir: Path = DIGESTS_DIR) -> bool:
+    """
+    保存结构化简报（原子写入）
+
+    Returns:
+        是否实际写入（内容未变化时返回 False）
+    """
+    path = digest_json_path(digest["date"], digests_dir)
+    return atomic_write(path, json.dumps(digest, ensure_ascii=False, indent=2) + "\n")
+
+
+def load_digest(date: str, digests_dir: Path = DIGESTS_DIR) -> dict | None:
+    """
+    读取结构化简报
+
+    JSON 不存在时尝试解析同名 Markdown，两者都没有或解析失败时返回 None。
+    """
+    path = digest_json_path(date, digests_dir)
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    md_path = digests_dir / f"{date}.md"
+    if not md_path.exists():
+        return None
+    try:
+        return parse_markdown_digest(md_path.read_text(encoding="utf-8"), date)
+    except ValueError:
+        return None
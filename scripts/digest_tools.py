@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+简报流水线的进程内 Agent 工具
+把 抓取 / 生成 / 保存 三步包装为 Agent SDK 的进程内 MCP 工具（create_sdk_mcp_server），
+Agent 直接以结构化参数调用并拿到 JSON 结果，不再经 Bash 启动 tech_digest.py 再解析输出。
+
+Agent 会话失败、提前结束或未安装 claude-agent-sdk 时，按固定顺序直接执行尚未完成的步骤，
+已抓取的条目和已生成的简报沿用，不重复请求。
+"""
+
+import asyncio
+import json
+from pathlib import Path
+
+from digest import DigestContext, build_site as rebuild_site
+from digest_schema import digest_json_path, parse_markdown_digest
+from sources import section_for
+from tech_digest import PROJECT_ROOT, generate_digest, save_digest, select_items
+
+
+SERVER_NAME = "digest"
+STEPS = ("fetch_items", "generate_digest", "save_digest")
+TOOL_NAMES = [f"mcp__{SERVER_NAME}__{step}" for step in STEPS]
+
+HYBRID_PROMPT = """请生成今日科技简报，依次调用 digest 工具：
+1. fetch_items 抓取数据源
+2. generate_digest 生成简报
+3. save_digest 保存简报并重建站点
+
+每一步都返回 JSON 结果；某一步返回错误时说明原因后停止。全部完成后用一两句话总结今日简报。"""
+
+FETCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "use_snapshot": {"type": "boolean", "description": "有当天快照时直接使用，默认 true"},
+    },
+}
+GENERATE_SCHEMA = {"type": "object", "properties": {}}
+SAVE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "update_latest": {"type": "boolean", "description": "是否更新 latest.md，默认 true"},
+        "build_site": {"type": "boolean", "description": "是否重建 HTML 索引页和 Pages 页面，默认 true"},
+    },
+}
+
+
+class DigestTools:
+    """
+    一次运行内的简报流水线步骤
+
+    每一步返回可 JSON 序列化的结构化结果并记录在 results 中；
+    Agent 工具和直接执行共用这些方法，中途切换时已完成的步骤不会重做。
+    """
+
+    def __init__(self, ctx: DigestContext, date: str = None):
+        self.ctx = ctx
+        self.date = date or ctx.today
+        self.results: dict[str, dict] = {}
+        # 工具调用输出的结构化简报，保存时直接写入 JSON；文本输出时为 None
+        self.structured: dict | None = None
+
+    def fetch_items(self, use_snapshot: bool = True) -> dict:
+        items = self.ctx.items_for(self.date) if use_snapshot else self.ctx.fetch(self.date)
+        if not items:
+            raise ValueError("未获取到任何内容")
+        sections = {}
+        for item in items:
+            name = section_for(item)
+            sections[name] = sections.get(name, 0) + 1
+        result = {"date": self.date, "total": len(items), "sections": sections}
+        self.results["fetch_items"] = result
+        return result
+
+    def generate_digest(self) -> dict:
+        if "fetch_items" not in self.results:
+            self.fetch_items()
+        items = select_items(self.ctx.items_for(self.date), self.ctx.config, self.date, self.ctx.scheduler)
+        content, self.structured = generate_digest(items, self.ctx.config, self.date)
+        self.ctx.digests[self.date] = content
+        result = {"date": self.date, "selected": len(items), "chars": len(content)}
+        try:
+            digest = self.structured or parse_markdown_digest(content, self.date)
+            result.update(
+                title=digest["title"],
+                intro=digest["intro"],
+                sections={s["name"]: [item["title"] for item in s["items"]] for s in digest["sections"]},
+            )
+        except ValueError as e:
+            result["warning"] = f"简报结构解析失败: {e}"
+        self.results["generate_digest"] = result
+        return result
+
+    def save_digest(self, update_latest: bool = True, build_site: bool = True) -> dict:
+        content = self.ctx.digests.get(self.date)
+        if content is None:
+            raise ValueError("尚未生成简报，请先调用 generate_digest")
+        save_digest(content, self.ctx.config, self.date, update_latest=update_latest, digest=self.structured)
+        self.ctx.commit_rss_marks(self.date)
+        files = [self.ctx.digests_dir / f"{self.date}.md", digest_json_path(self.date, self.ctx.digests_dir)]
+        if build_site:
+            rebuild_site(self.ctx.config)
+            files += [self.ctx.digests_dir / "index.html", PROJECT_ROOT / "index.html"]
+        result = {"date": self.date, "files": [_relative(path) for path in files if path.exists()]}
+        self.results["save_digest"] = result
+        return result
+
+    def run_direct(self) -> dict[str, dict]:
+        """按固定顺序执行尚未完成的步骤（确定性的回退路径）"""
+        for step in STEPS:
+            if step not in self.results:
+                print(f"[直接执行] {step}")
+                getattr(self, step)()
+        return self.results
+
+    def create_server(self):
+        """创建进程内 MCP 服务器，工具在线程中执行阻塞的流水线步骤"""
+        from claude_agent_sdk import create_sdk_mcp_server, tool
+
+        def wrap(name: str, description: str, schema: dict):
+            @tool(name, description, schema)
+            async def handler(args: dict) -> dict:
+                try:
+                    result = await asyncio.to_thread(getattr(self, name), **args)
+                except Exception as e:
+                    return {"content": [{"type": "text", "text": f"{type(e).__name__}: {e}"}], "is_error": True}
+                return {"content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False)}]}
+            return handler
+
+        tools = [
+            wrap("fetch_items", "抓取 V2EX、Hacker News、RSS 等数据源并保存快照，返回各板块条目数", FETCH_SCHEMA),
+            wrap("generate_digest", "筛选排序条目并生成简报，返回标题、导语和各板块条目标题", GENERATE_SCHEMA),
+            wrap("save_digest", "保存简报（Markdown + JSON）并重建站点，返回写入的文件", SAVE_SCHEMA),
+        ]
+        return create_sdk_mcp_server(name=SERVER_NAME, version="1.0.0", tools=tools)
+
+
+def _relative(path: Path) -> str:
+    return path.relative_to(PROJECT_ROOT).as_posix()
+
+
+async def run_hybrid(ctx: DigestContext, date: str = None, env: dict = None) -> dict[str, dict]:
+    """
+    Agent 通过进程内工具执行流水线，未完成的步骤直接执行补齐
+
+    Args:
+        ctx: 共享的运行上下文
+        date: 简报日期，默认北京时间今天
+        env: 传给 Claude Code CLI 的环境变量（API Key、兼容端点）
+
+    Returns:
+        各步骤的结构化结果
+    """
+    tools = DigestTools(ctx, date)
+    try:
+        from claude_agent_sdk import AssistantMessage, ClaudeAgentOptions, ResultMessage, TextBlock, ToolUseBlock, query
+    except ImportError:
+        print("[警告] 未安装 claude-agent-sdk，直接执行流水线")
+        return await asyncio.to_thread(tools.run_direct)
+
+    options = ClaudeAgentOptions(
+        cwd=str(PROJECT_ROOT),
+        mcp_servers={SERVER_NAME: tools.create_server()},
+        allowed_tools=TOOL_NAMES,
+        # 流水线只通过工具执行，不让 Agent 自行运行脚本或改文件
+        disallowed_tools=["Bash", "Write", "Edit", "NotebookEdit"],
+        max_turns=len(STEPS) + 2,
+        env=env or {},
+    )
+
+    try:
+        async for message in query(prompt=HYBRID_PROMPT, options=options):
+            if isinstance(message, AssistantMessage):
+                for block in message.content:
+                    if isinstance(block, TextBlock):
+                        print(block.text)
+                    elif isinstance(block, ToolUseBlock):
+                        print(f"[工具调用] {block.name} {json.dumps(block.input, ensure_ascii=False)}")
+            elif isinstance(message, ResultMessage) and message.is_error:
+                print(f"[警告] Agent 会话异常结束: {message.subtype}")
+    except Exception as e:
+        print(f"[警告] Agent 会话失败: {e}")
+
+    missing = [step for step in STEPS if step not in tools.results]
+    if missing:
+        print(f"[警告] Agent 未完成 {', '.join(missing)}，直接执行剩余步骤")
+        await asyncio.to_thread(tools.run_direct)
+    return tools.results
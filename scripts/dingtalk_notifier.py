@@ -2,38 +2,103 @@
 """
 钉钉通知模块
 发送每日科技简报到钉钉群
+
+支持多个机器人：DINGTALK_WEBHOOK_URL/DINGTALK_SECRET 为第一个，
+DINGTALK_WEBHOOKS 可追加更多（JSON 数组 [{"url": ..., "secret": ...}]）。
+后台发送、重试与发件箱由 notifiers.py 的分发器负责。
 """
 import os
 import time
 import hmac
 import hashlib
 import base64
+import json
+import threading
 import urllib.parse
 import re
+from collections import deque
+
 import requests
-from typing import Optional
+from requests.adapters import HTTPAdapter
+
+from digest_schema import digest_json_path, get_highlights, load_digest, parse_markdown_digest
+
+
+# 环境变量（DINGTALK_WEBHOOK_URL、DINGTALK_SECRET、DINGTALK_WEBHOOKS、ENABLE_DINGTALK、GITHUB_PAGES_URL）
+# 在调用时读取，常驻进程中修改环境变量或测试中临时设置都能生效
+
+
+def dingtalk_enabled() -> bool:
+    return os.environ.get("ENABLE_DINGTALK", "false").lower() == "true"
+
+# 默认发送参数，可由 config["notifications"]["channels"]["dingtalk"] 覆盖
+DEFAULT_OPTIONS = {
+    "pool_size": 4,
+    "rate_per_minute": 20,
+    "timeout": 10,
+    "sign_ttl": 1800,
+}
 
+# 发送过快，稍后重试即可
+RETRYABLE_ERRCODES = {130101}
 
-# 环境变量配置
-DINGTALK_WEBHOOK_URL = os.environ.get("DINGTALK_WEBHOOK_URL")
-DINGTALK_SECRET = os.environ.get("DINGTALK_SECRET")
-ENABLE_DINGTALK = os.environ.get("ENABLE_DINGTALK", "false").lower() == "true"
-GITHUB_PAGES_URL = os.environ.get("GITHUB_PAGES_URL", "")
+
+class RetryableError(Exception):
+    """可重试的发送失败（网络错误、服务端 5xx、限流）"""
+
+
+class RateLimiter:
+    """滑动窗口限速：period 秒内最多 rate 次"""
+
+    def __init__(self, rate: int, period: float = 60.0):
+        self.rate = rate
+        self.period = period
+        self.lock = threading.Lock()
+        self.sent = deque()
+
+    def acquire(self, stop: threading.Event = None) -> bool:
+        """等待到可以发送为止；stop 被设置时放弃并返回 False"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.sent and now - self.sent[0] >= self.period:
+                    self.sent.popleft()
+                if len(self.sent) < self.rate:
+                    self.sent.append(now)
+                    return True
+                wait = self.period - (now - self.sent[0])
+            if stop is None:
+                time.sleep(wait)
+            elif stop.wait(wait):
+                return False
 
 
 class DingTalkNotifier:
     """钉钉机器人通知器"""
 
-    def __init__(self, webhook_url: str = None, secret: str = None):
+    def __init__(self, webhook_url: str = None, secret: str = None, options: dict = None,
+                 session: requests.Session = None):
         """
         初始化钉钉通知器
 
         Args:
             webhook_url: Webhook URL，以 https://oapi.dingtalk.com/robot/send?access_token= 开头
             secret: 加签密钥，以 SEC 开头
+            options: 发送参数，见 DEFAULT_OPTIONS
+            session: 共享的 HTTP 会话，默认新建
         """
-        self.webhook_url = webhook_url or DINGTALK_WEBHOOK_URL
-        self.secret = secret or DINGTALK_SECRET
+        self.webhook_url = webhook_url or os.environ.get("DINGTALK_WEBHOOK_URL")
+        self.secret = secret or os.environ.get("DINGTALK_SECRET")
+        self.options = {**DEFAULT_OPTIONS, **(options or {})}
+        self.session = session or requests.Session()
+        self.rate_limiter = RateLimiter(self.options["rate_per_minute"])
+        self._sign_cache = None
+        self._sign_lock = threading.Lock()
+
+    @property
+    def robot_id(self) -> str:
+        """机器人标识（Webhook 的哈希，发件箱中不保存 access_token）"""
+        return hashlib.sha1((self.webhook_url or "").encode("utf-8")).hexdigest()[:12]
 
     def _generate_sign(self) -> tuple:
         """
@@ -55,15 +120,22 @@ class DingTalkNotifier:
         return timestamp, sign
 
     def _get_webhook_url(self) -> str:
-        """获取带签名的 Webhook URL"""
+        """
+        获取带签名的 Webhook URL
+
+        钉钉要求时间戳与服务器时间相差不超过 1 小时，签名在 sign_ttl 秒内复用。
+        """
         if not self.secret:
             return self.webhook_url
-        timestamp, sign = self._generate_sign()
+        with self._sign_lock:
+            if self._sign_cache is None or time.time() - self._sign_cache[0] > self.options["sign_ttl"]:
+                self._sign_cache = (time.time(), *self._generate_sign())
+            _, timestamp, sign = self._sign_cache
         return f"{self.webhook_url}&timestamp={timestamp}&sign={sign}"
 
     def _is_configured(self) -> bool:
         """检查是否已配置"""
-        return bool(self.webhook_url and ENABLE_DINGTALK)
+        return bool(self.webhook_url and dingtalk_enabled())
 
     def send_markdown(self, title: str, content: str) -> bool:
         """
@@ -80,7 +152,23 @@ class DingTalkNotifier:
             print("[钉钉] 未配置或未启用，跳过发送")
             return False
 
-        url = self._get_webhook_url()
+        try:
+            self.rate_limiter.acquire()
+            self.post_markdown(title, content)
+            print(f"✅ 钉钉消息发送成功: {title}")
+            return True
+        except Exception as e:
+            print(f"❌ 钉钉消息发送失败: {e}")
+            return False
+
+    def post_markdown(self, title: str, content: str):
+        """
+        发送一条 Markdown 消息（不做限速，由调用方控制）
+
+        Raises:
+            RetryableError: 网络错误、429、5xx 或钉钉限流
+            RuntimeError: 其他不可重试的错误（如签名、token 无效）
+        """
         data = {
             "msgtype": "markdown",
             "markdown": {
@@ -90,17 +178,57 @@ class DingTalkNotifier:
         }
 
         try:
-            response = requests.post(url, json=data, timeout=10)
+            response = self.session.post(self._get_webhook_url(), json=data, timeout=self.options["timeout"])
+        except requests.RequestException as e:
+            raise RetryableError(str(e)) from e
+        # 先按状态码判断是否重试：限流或网关错误时响应体往往不是 JSON
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableError(f"HTTP {response.status_code}")
+        try:
             result = response.json()
-            if result.get("errcode") == 0:
-                print(f"✅ 钉钉消息发送成功: {title}")
-                return True
-            else:
-                print(f"❌ 钉钉消息发送失败: {result.get('errmsg')}")
-                return False
-        except Exception as e:
-            print(f"❌ 钉钉消息发送异常: {e}")
-            return False
+        except ValueError:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+        if result.get("errcode") == 0:
+            return
+        if result.get("errcode") in RETRYABLE_ERRCODES:
+            raise RetryableError(result.get("errmsg"))
+        raise RuntimeError(f"{result.get('errcode')}: {result.get('errmsg')}")
+
+
+def load_robots(options: dict = None, session: requests.Session = None) -> list[DingTalkNotifier]:
+    """
+    读取所有已配置的钉钉机器人，共用一个连接池
+
+    Args:
+        options: 发送参数，见 DEFAULT_OPTIONS
+        session: 共享的 HTTP 会话（如通知渠道自己的连接池），默认新建
+
+    Returns:
+        未启用（ENABLE_DINGTALK 不为 true）时返回空列表
+    """
+    if not dingtalk_enabled():
+        return []
+
+    entries = []
+    if os.environ.get("DINGTALK_WEBHOOK_URL"):
+        entries.append({"url": os.environ["DINGTALK_WEBHOOK_URL"], "secret": os.environ.get("DINGTALK_SECRET")})
+    webhooks = os.environ.get("DINGTALK_WEBHOOKS", "")
+    if webhooks.strip():
+        entries.extend(json.loads(webhooks))
+
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=options["pool_size"], pool_maxsize=options["pool_size"])
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+    robots, seen = [], set()
+    for entry in entries:
+        if entry.get("url") and entry["url"] not in seen:
+            seen.add(entry["url"])
+            robots.append(DingTalkNotifier(entry["url"], entry.get("secret"), options, session))
+    return robots
 
 
 def extract_highlights(digest_content: str) -> list:
@@ -139,25 +267,21 @@ def extract_highlights(digest_content: str) -> list:
     return highlights[:5]  # 最多返回5条
 
 
-def send_dingtalk_digest(digest_content: str, date: str) -> bool:
+def build_digest_message(digest_content: str, date: str) -> tuple[str, str]:
     """
-    发送简报到钉钉
-
-    Args:
-        digest_content: Markdown 格式的简报内容
-        date: 日期字符串，如 "2026-01-18"
+    构建简报通知消息
 
     Returns:
-        是否发送成功
+        (标题, Markdown 内容)
     """
-    notifier = DingTalkNotifier()
-    
-    if not notifier._is_configured():
-        print("[钉钉] 未配置或未启用，跳过发送")
-        return False
-
-    # 提取今日热点
-    highlights = extract_highlights(digest_content)
+    # 提取今日热点：优先读取结构化简报，其次解析传入的 Markdown，最后按旧规则匹配
+    digest = load_digest(date) if digest_json_path(date).exists() else None
+    if digest is None:
+        try:
+            digest = parse_markdown_digest(digest_content, date)
+        except ValueError:
+            digest = None
+    highlights = get_highlights(digest) if digest else extract_highlights(digest_content)
     
     # 构建钉钉消息
     content = f"## 📰 每日科技简报 · {date}\n\n"
@@ -169,12 +293,32 @@ def send_dingtalk_digest(digest_content: str, date: str) -> bool:
             content += f"- {h}\n"
     
     # 添加链接
-    if GITHUB_PAGES_URL:
-        page_url = GITHUB_PAGES_URL.rstrip('/')
+    page_url = os.environ.get("GITHUB_PAGES_URL", "").rstrip('/')
+    if page_url:
         content += f"\n---\n\n[🔗 点击查看完整简报]({page_url})"
     
     title = f"📰 每日科技简报 · {date}"
-    return notifier.send_markdown(title, content)
+    return title, content
+
+
+def send_dingtalk_digest(digest_content: str, date: str, options: dict = None) -> bool:
+    """
+    发送简报到钉钉并等待结果（只使用钉钉渠道的 notifiers 分发器）
+
+    Args:
+        digest_content: Markdown 格式的简报内容
+        date: 日期字符串，如 "2026-01-18"
+        options: 分发参数（config["notifications"]）
+
+    Returns:
+        是否全部发送成功
+    """
+    from notifiers import start_notifications
+
+    dispatcher = start_notifications(digest_content, date, options, channels=["dingtalk"])
+    if dispatcher is None:
+        return False
+    return dispatcher.wait()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+正文补全
+为排名靠前的条目抓取原文并提取正文，截断到 token 预算后随条目一起送入提示词。
+按域名限制并发，正文按 URL 缓存在 .cache/articles/ 下，超出容量时淘汰最久未用的条目。
+"""
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError, as_completed
+from dataclasses import replace
+from pathlib import Path
+from urllib.parse import urlparse
+
+from html_clean import clean_texts
+from models import Item
+from sources import Scheduler, response_encoding
+
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).parent.parent
+ARTICLE_CACHE_DIR = PROJECT_ROOT / ".cache" / "articles"
+
+# 讨论页本身没有正文，跳过
+SKIP_DOMAINS = {"news.ycombinator.com"}
+
+
+class ArticleCache:
+    """
+    正文缓存
+
+    每个 URL 一个文本文件，命中时刷新修改时间；写入后超出 max_entries 时
+    按修改时间淘汰最久未用的条目，超过 ttl 的条目视为失效。
+    """
+
+    def __init__(self, max_entries: int, ttl: int, cache_dir: Path = ARTICLE_CACHE_DIR):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.writes = 0
+
+    def path_for(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.txt"
+
+    def get(self, url: str) -> str | None:
+        path = self.path_for(url)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                return None
+            text = path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+        os.utime(path)
+        return text
+
+    def put(self, url: str, text: str):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path_for(url).write_text(text, encoding="utf-8")
+        self.writes += 1
+
+    def evict(self):
+        """淘汰超出容量的最旧条目"""
+        if not self.cache_dir.exists():
+            return
+        entries = sorted(self.cache_dir.glob("*.txt"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in entries[self.max_entries:]:
+            path.unlink(missing_ok=True)
+
+
+class DomainLimiter:
+    """按域名限制同时进行的请求数"""
+
+    def __init__(self, per_domain: int):
+        self.per_domain = per_domain
+        self.lock = threading.Lock()
+        self.semaphores: dict[str, threading.Semaphore] = {}
+
+    def __call__(self, domain: str) -> threading.Semaphore:
+        with self.lock:
+            if domain not in self.semaphores:
+                self.semaphores[domain] = threading.Semaphore(self.per_domain)
+            return self.semaphores[domain]
+
+
+def fetch_article(scheduler: Scheduler, limiter: DomainLimiter, url: str, enrich_config: dict,
+                  deadline: float = None) -> str:
+    """
+    抓取单篇文章的 HTML，最多读取 max_bytes，非 HTML 时返回空字符串
+
+    deadline 为 time.monotonic() 的截止时刻，等到域名配额时已过截止时间则不再发请求。
+    """
+    with limiter(urlparse(url).netloc):
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("正文补全已超过总时限")
+        with scheduler.session.get(url, timeout=enrich_config["timeout"], stream=True) as resp:
+            resp.raise_for_status()
+            if "html" not in resp.headers.get("Content-Type", "html"):
+                return ""
+            raw = resp.raw.read(enrich_config["max_bytes"], decode_content=True)
+            encoding = response_encoding(resp, raw)
+
+    return raw.decode(encoding, errors="replace")
+
+
+def enrich_items(items: list[Item], config: dict, scheduler: Scheduler = None) -> list[Item]:
+    """
+    为前 top_k 个条目补全正文（config["enrichment"]，未启用时原样返回）
+
+    Args:
+        items: 按得分降序的条目
+        config: 全局配置
+        scheduler: 共享调度器（由调用方关闭），默认临时创建一个
+
+    Returns:
+        新的条目列表，顺序不变，补全成功的条目带有 body
+    """
+    enrich_config = config.get("enrichment", {})
+    if not enrich_config.get("enabled"):
+        return items
+
+    start = time.perf_counter()
+    cache = ArticleCache(enrich_config["cache_max_entries"], enrich_config["cache_ttl"])
+    targets = {}
+    for index, item in enumerate(items[:enrich_config["top_k"]]):
+        if item.body or not item.url.startswith("http") or urlparse(item.url).netloc in SKIP_DOMAINS:
+            continue
+        targets[index] = item.url
+
+    bodies = {}
+    pending = {}
+    for index, url in targets.items():
+        cached = cache.get(url)
+        if cached is not None:
+            bodies[index] = cached
+        else:
+            pending[index] = url
+    hits = len(bodies)
+
+    pages = {}
+    owned = scheduler is None
+    if owned:
+        scheduler = Scheduler(enrich_config["max_workers"])
+    limiter = DomainLimiter(enrich_config["per_domain"])
+    # 总时限：到期后不再等待未完成的抓取，已拿到的正文照常使用
+    deadline = enrich_config.get("deadline")
+    deadline_at = time.monotonic() + deadline if deadline else None
+    try:
+        futures = {
+            scheduler.io_pool.submit(fetch_article, scheduler, limiter, url, enrich_config, deadline_at): index
+            for index, url in pending.items()
+        }
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                try:
+                    pages[futures[future]] = future.result()
+                except Exception:
+                    continue
+        except TimeoutError:
+            print(f"[警告] 正文补全超过 {deadline}s，放弃 {len(futures) - len(pages)} 条未完成的抓取")
+            for future in futures:
+                future.cancel()
+    finally:
+        if owned:
+            scheduler.close()
+
+    # 正文提取在进程池中批量进行（见 html_clean）
+    fetched = list(pages)
+    texts = clean_texts("article", [pages[i] for i in fetched], enrich_config["max_tokens"], config)
+    for index, body in zip(fetched, texts):
+        cache.put(pending[index], body)
+        bodies[index] = body
+    if cache.writes:
+        cache.evict()
+
+    filled = sum(1 for body in bodies.values() if body)
+    print(
+        f"      正文补全 {filled}/{len(targets)} 条"
+        f"（缓存命中 {hits}，耗时 {time.perf_counter() - start:.1f}s）"
+    )
+    return [replace(item, body=bodies[i]) if bodies.get(i) else item for i, item in enumerate(items)]
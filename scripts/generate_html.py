@@ -8,14 +8,18 @@ import json
 import re
 from datetime import datetime
 from pathlib import Path
+from zoneinfo import ZoneInfo
 
-import pytz
+from atomic_io import atomic_write
 
 
 # 项目根目录
 PROJECT_ROOT = Path(__file__).parent.parent
 CONFIG_PATH = Path(__file__).parent / "config.json"
 
+# 页脚的生成时间，判断页面是否有变化时忽略
+UPDATED_AT = re.compile(r"<p>最后更新: [^<]*</p>")
+
 
 def load_config() -> dict:
     """加载配置文件"""
@@ -36,6 +40,12 @@ def get_digest_files(digests_dir: Path) -> list[dict]:
                 # 提取第一行作为标题
                 first_line = content.split("\n")[0].strip("# ").strip()
 
+            # 有结构化简报时以其中的标题为准
+            json_file = file.with_suffix(".json")
+            if json_file.exists():
+                with open(json_file, "r", encoding="utf-8") as f:
+                    first_line = json.load(f)["title"]
+
             files.append({
                 "date": date_str,
                 "filename": file.name,
@@ -49,8 +59,8 @@ def get_digest_files(digests_dir: Path) -> list[dict]:
 
 
 def generate_html(files: list[dict], output_path: Path):
-    """生成 HTML 索引页"""
-    tz = pytz.timezone("Asia/Shanghai")
+    """生成 HTML 索引页，除生成时间外内容未变化时不重写"""
+    tz = ZoneInfo("Asia/Shanghai")
     now = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
 
     html = f"""<!DOCTYPE html>
@@ -222,9 +232,10 @@ def generate_html(files: list[dict], output_path: Path):
 </html>
 """
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html)
-
+    if output_path.exists() and UPDATED_AT.sub("", output_path.read_text(encoding="utf-8")) == UPDATED_AT.sub("", html):
+        print(f"[跳过] 内容未变化: {output_path}")
+        return
+    atomic_write(output_path, html)
     print(f"[完成] 已生成: {output_path}")
 
 
@@ -8,8 +8,7 @@ import json
 import re
 from datetime import datetime
 from pathlib import Path
-
-import pytz
+from zoneinfo import ZoneInfo
 
 try:
     import markdown
@@ -18,6 +17,8 @@ except ImportError:
     print("运行: pip install markdown")
     exit(1)
 
+from atomic_io import atomic_write
+
 
 PROJECT_ROOT = Path(__file__).parent.parent
 CONFIG_PATH = Path(__file__).parent / "config.json"
@@ -43,6 +44,12 @@ def get_digest_files(digests_dir: Path) -> list[dict]:
                 title_match = re.search(r"^#\s+(.+)$", content, re.MULTILINE)
                 title = title_match.group(1) if title_match else f"{date_str} 科技简报"
 
+            # 有结构化简报时以其中的标题为准
+            json_file = file.with_suffix(".json")
+            if json_file.exists():
+                with open(json_file, "r", encoding="utf-8") as f:
+                    title = json.load(f)["title"]
+
             files.append({
                 "date": date_str,
                 "filename": file.name,
@@ -79,7 +86,7 @@ def markdown_to_html(md_content: str) -> str:
 
 def generate_page(files: list[dict], output_path: Path):
     """生成完整的 HTML 页面"""
-    tz = pytz.timezone("Asia/Shanghai")
+    tz = ZoneInfo("Asia/Shanghai")
     now = datetime.now(tz).strftime("%Y年%m月%d日")
 
     # 为每个文件生成 HTML
@@ -549,10 +556,10 @@ def generate_page(files: list[dict], output_path: Path):
 </html>
 """
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html)
-
-    print(f"[完成] 已生成: {output_path}")
+    if atomic_write(output_path, html):
+        print(f"[完成] 已生成: {output_path}")
+    else:
+        print(f"[跳过] 内容未变化: {output_path}")
 
 
 def main():
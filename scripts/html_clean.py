@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+HTML 清洗
+RSS 摘要与文章正文的解析清洗是 CPU 密集型任务，在抓取线程中会被 GIL 串行化，
+这里统一交给进程池按批处理；已经是纯文本的摘要走正则快速路径，不进入进程池。
+"""
+
+import atexit
+import html
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+MARKUP = re.compile(r"<[a-zA-Z/!]|&#?\w+;")
+WHITESPACE = re.compile(r"\s+")
+DROP_BLOCKS = re.compile(
+    r"<(script|style|noscript|svg|nav|header|footer|aside|form|figure|iframe)\b.*?</\1\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+COMMENTS = re.compile(r"<!--.*?-->", re.DOTALL)
+MAIN_BLOCK = re.compile(r"<(article|main)\b[^>]*>(.*?)</\1\s*>", re.IGNORECASE | re.DOTALL)
+PARAGRAPH = re.compile(r"<(p|pre|li|h[1-3])\b[^>]*>(.*?)</\1\s*>", re.IGNORECASE | re.DOTALL)
+TAG = re.compile(r"<[^>]+>")
+CJK = re.compile(r"[⺀-鿿가-힯＀-￯]")
+SENTENCE_END = re.compile(r"[。！？.!?]")
+
+# 摘要只解析前若干字符，避免个别源把全文塞进 summary
+SUMMARY_INPUT_LIMIT = 2000
+
+_pool: ProcessPoolExecutor | None = None
+_pool_size = 0
+# 多个抓取线程可能同时首次清洗，进程池的创建与关闭需要互斥（可重入：get_pool 内会调用 shutdown_pool）
+_pool_lock = threading.RLock()
+
+
+def is_plain_text(text: str) -> bool:
+    """不含标签和 HTML 实体的文本"""
+    return MARKUP.search(text) is None
+
+
+def clean_summary(text: str, limit: int = 200) -> str:
+    """RSS 摘要转为纯文本并截断"""
+    if is_plain_text(text):
+        return WHITESPACE.sub(" ", text).strip()[:limit]
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(text[:SUMMARY_INPUT_LIMIT], "html.parser")
+    return WHITESPACE.sub(" ", html.unescape(soup.get_text(" "))).strip()[:limit]
+
+
+def extract_main_text(page: str, min_paragraph: int = 30) -> str:
+    """
+    轻量正文提取
+
+    去掉脚本、导航等区块，优先取 <article>/<main> 内的内容，
+    再保留足够长的段落（中文按字计，英文按字符计）。
+    """
+    page = COMMENTS.sub(" ", page)
+    page = DROP_BLOCKS.sub(" ", page)
+    blocks = [body for _, body in MAIN_BLOCK.findall(page)]
+    scope = max(blocks, key=len) if blocks else page
+
+    paragraphs = []
+    for _, fragment in PARAGRAPH.findall(scope):
+        text = WHITESPACE.sub(" ", html.unescape(TAG.sub(" ", fragment))).strip()
+        weight = len(text) + len(CJK.findall(text))
+        if weight >= min_paragraph:
+            paragraphs.append(text)
+    return "\n".join(paragraphs)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日韩字符约 1 token，其余约 4 字符 1 token"""
+    cjk = len(CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """截断到 token 预算内，尽量在句末断开"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = float(max_tokens)
+    cut = 0
+    for cut, ch in enumerate(text):
+        budget -= 1.0 if CJK.match(ch) else 0.25
+        if budget < 0:
+            break
+
+    head = text[:cut]
+    ends = [m.end() for m in SENTENCE_END.finditer(head)]
+    if ends and ends[-1] > cut // 2:
+        head = head[:ends[-1]]
+    return head.rstrip() + "…"
+
+
+def clean_batch(kind: str, texts: list[str], param: int) -> list[str]:
+    """进程池中执行的一批清洗任务"""
+    if kind == "summary":
+        return [clean_summary(text, param) for text in texts]
+    if kind == "article":
+        return [truncate_to_tokens(extract_main_text(text), param) for text in texts]
+    raise ValueError(f"未知清洗类型: {kind}")
+
+
+def get_pool(processes: int) -> ProcessPoolExecutor:
+    """
+    获取共享进程池，进程数变化时重建
+
+    使用 forkserver 启动子进程，避免在抓取线程运行时 fork。
+    """
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != processes:
+            shutdown_pool()
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(max_workers=processes, mp_context=context)
+            _pool_size = processes
+        return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool, _pool_size = None, 0
+
+
+atexit.register(shutdown_pool)
+
+
+def clean_texts(kind: str, texts: list[str], param: int, config: dict) -> list[str]:
+    """
+    批量清洗文本，结果顺序与输入一致
+
+    Args:
+        kind: "summary"（param 为截断长度）或 "article"（param 为 token 预算）
+        texts: 原始文本
+        param: 见 kind
+        config: 全局配置，使用 config["cleaning"]
+
+    数量低于 min_parallel 或只有一个进程时在当前进程处理，省去进程间传输的开销。
+    """
+    clean_config = config.get("cleaning", {})
+    results = [None] * len(texts)
+
+    pending = []
+    for index, text in enumerate(texts):
+        if not text:
+            results[index] = ""
+        elif kind == "summary" and is_plain_text(text):
+            results[index] = WHITESPACE.sub(" ", text).strip()[:param]
+        else:
+            pending.append(index)
+
+    processes = clean_config.get("processes") or os.cpu_count() or 1
+    if len(pending) < clean_config.get("min_parallel", 200) or processes <= 1:
+        for index, value in zip(pending, clean_batch(kind, [texts[i] for i in pending], param)):
+            results[index] = value
+        return results
+
+    batch_size = clean_config.get("batch_size", 64)
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    pool = get_pool(processes)
+    futures = [pool.submit(clean_batch, kind, [texts[i] for i in batch], param) for batch in batches]
+    for batch, future in zip(batches, futures):
+        for index, value in zip(batch, future.result()):
+            results[index] = value
+    return results
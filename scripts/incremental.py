@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+日内增量更新
+当天简报发布后每小时运行一次：只处理自上次运行以来新出现的条目，让模型为这部分增量
+补充或更新板块条目，再合并进 digests/{date}.md（及 JSON）并重建页面，不重新生成整份简报。
+
+每天已处理过的条目记录在 data/incremental/{date}.json（首次运行时由当天的原始数据快照初始化），
+抓取时 RSS / V2EX / HN 榜单使用条件请求（ETag / Last-Modified），HN 故事元数据使用条目缓存，
+没有新条目时不调用模型。增量更新不发送通知。
+
+用法:
+    python scripts/digest.py update
+    python scripts/digest.py update --date 2026-03-02
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+from atomic_io import atomic_write
+from digest import DigestContext, build_site
+from digest_schema import (
+    DIGEST_TOOL,
+    SECTION_NAMES,
+    load_digest,
+    normalize_digest,
+    parse_markdown_digest,
+    render_markdown,
+)
+from llm_client import call_llm, call_llm_tool
+from models import Item
+from snapshot_store import load_snapshot
+from tech_digest import PROJECT_ROOT, generate_digest, prepare_content_for_claude, save_digest, select_items
+
+
+# 只输出需要新增或更新的条目；板块与条目结构与 DIGEST_TOOL 相同
+DIGEST_UPDATE_TOOL = {
+    "name": "record_digest_update",
+    "description": "记录对今日简报的增量更新（只包含新增或需要更新的条目）",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "intro": {"type": "string", "description": "新的导语；今日重点没有变化时留空"},
+            "sections": {
+                **DIGEST_TOOL["input_schema"]["properties"]["sections"],
+                "description": "需要新增或更新条目的板块，没有值得加入的内容时为空数组",
+            },
+        },
+        "required": ["sections"],
+    },
+}
+
+NO_UPDATE = "无更新"
+
+
+def item_key(item: Item) -> str:
+    """条目的去重键（与快照去重一致）"""
+    return f"{item.kind}:{item.url or item.title}"
+
+
+def state_path(config: dict, date: str) -> Path:
+    return PROJECT_ROOT / config["output"]["incremental_dir"] / f"{date}.json"
+
+
+def load_state(config: dict, date: str) -> dict:
+    """
+    读取当天的增量状态
+
+    还没有状态文件时，以当天快照中的条目（即当天完整运行时处理过的条目）作为已处理集合。
+    """
+    path = state_path(config, date)
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    snapshot = load_snapshot(config, date) or []
+    return {"date": date, "seen": sorted({item_key(item) for item in snapshot}), "updates": []}
+
+
+def save_state(config: dict, state: dict):
+    atomic_write(state_path(config, state["date"]), json.dumps(state, ensure_ascii=False, indent=2) + "\n")
+
+
+def link_key(item: dict) -> str:
+    """简报条目的匹配键：第一个链接，没有链接时用标题"""
+    links = item.get("links") or []
+    return str(links[0].get("url", "")).strip() if links and links[0].get("url") else str(item.get("title", "")).strip()
+
+
+def current_items(digest: dict) -> str:
+    """当前简报各板块的条目标题与链接（模型据此判断更新哪一条）"""
+    return "\n".join(
+        f"- {section['name']}: " + "；".join(f"{item['title']} <{link_key(item)}>" for item in section["items"])
+        for section in digest["sections"]
+    )
+
+
+def build_update_prompt(digest: dict, content: str, date: str, max_items: int, text_output: bool = False) -> str:
+    """构建增量更新提示词：当前简报只给标题和链接，原始内容只给增量"""
+    prompt = f"""你是一位资深科技编辑，正在更新今天（{date}）已发布的科技简报。
+
+当前简报各板块已有条目:
+{current_items(digest)}
+
+当前导语: {digest["intro"]}
+
+自上次更新以来的新内容:
+{content}
+
+请从新内容中挑选真正值得加入的条目（宁缺毋滥，可以一条都不加）:
+- 只输出需要新增或更新的条目，不要重复已有条目
+- 更新已有条目时，第一个链接必须与原条目的链接（尖括号内）完全一致
+- 每个板块最多 {max_items} 条，已满的板块只能更新已有条目
+- 板块只能是: {"、".join(SECTION_NAMES)}
+- 每条保留原始链接，语言简洁有力
+- 新内容改变了今天的重点时才给出新的导语"""
+    if text_output:
+        prompt += f"""
+
+以 Markdown 输出，每个板块用 "### 板块名" 作标题，条目格式为 "**标题**"、链接、摘要各占一行；
+没有值得加入的内容时只输出"{NO_UPDATE}"。"""
+    return prompt
+
+
+def request_update(items: list[Item], digest: dict, config: dict, date: str) -> dict:
+    """
+    让模型只针对增量给出更新
+
+    Returns:
+        {"intro": str, "sections": [...]}，没有更新时 sections 为空
+    """
+    content = prepare_content_for_claude(items)
+    max_items = config["incremental"]["max_items_per_section"]
+    if config["claude"].get("structured_output") == "tool":
+        try:
+            return call_llm_tool(build_update_prompt(digest, content, date, max_items), config, DIGEST_UPDATE_TOOL)
+        except Exception as e:
+            print(f"[警告] 结构化输出失败，改用 Markdown 输出: {e}")
+
+    text = call_llm(build_update_prompt(digest, content, date, max_items, text_output=True), config)
+    if text.strip() == NO_UPDATE:
+        return {"intro": "", "sections": []}
+    try:
+        return {"intro": "", "sections": parse_markdown_digest(text, date)["sections"]}
+    except ValueError as e:
+        print(f"[警告] 增量更新解析失败，忽略本次更新: {e}")
+        return {"intro": "", "sections": []}
+
+
+def merge_update(digest: dict, update: dict, max_items: int) -> tuple[dict, int, int]:
+    """
+    合并增量更新
+
+    按链接匹配已有条目（见 link_key）：匹配到的原位覆盖，其余按模型给出的顺序追加到对应板块末尾，
+    板块已有 max_items 条时不再追加（已发布的条目优先保留）；新板块按 SECTION_NAMES 排序。
+
+    Returns:
+        (合并后的简报, 新增条数, 更新条数)
+    """
+    sections = {section["name"]: [dict(item) for item in section["items"]] for section in digest["sections"]}
+    added = updated = dropped = 0
+    for section in update.get("sections", []):
+        name = str(section.get("name", "")).strip()
+        if name not in SECTION_NAMES:
+            continue
+        existing = sections.setdefault(name, [])
+        positions = {link_key(item): i for i, item in enumerate(existing)}
+        for item in section.get("items", []):
+            key = link_key(item)
+            if not key or not str(item.get("title", "")).strip():
+                continue
+            if key in positions:
+                existing[positions[key]] = item
+                updated += 1
+            elif len(existing) < max_items:
+                positions[key] = len(existing)
+                existing.append(item)
+                added += 1
+            else:
+                dropped += 1
+    if dropped:
+        print(f"[跳过] {dropped} 条新条目所在板块已满 {max_items} 条，未加入")
+
+    order = {name: i for i, name in enumerate(SECTION_NAMES)}
+    merged = {
+        "title": digest["title"],
+        "intro": str(update.get("intro") or "").strip() or digest["intro"],
+        "sections": [
+            {"name": name, "items": items}
+            for name, items in sorted(sections.items(), key=lambda kv: order.get(kv[0], len(order)))
+            if items
+        ],
+    }
+    return normalize_digest(merged, digest["date"]), added, updated
+
+
+def changed_items(digest: dict, merged: dict) -> dict[str, list[dict]]:
+    """merged 中相对 digest 新增或内容有变化的条目，按板块分组"""
+    before = {link_key(item): item for section in digest["sections"] for item in section["items"]}
+    changes = {}
+    for section in merged["sections"]:
+        items = [item for item in section["items"] if before.get(link_key(item)) != item]
+        if items:
+            changes[section["name"]] = items
+    return changes
+
+
+def append_update(markdown: str, digest: dict, merged: dict, time: str) -> str:
+    """
+    在简报末尾追加本次新增或更新的条目，原有内容一字不改
+
+    用于不是由 render_markdown 生成的简报（模型直接输出的 Markdown），
+    整份重新渲染会丢掉解析不到的格式；导语的更新只写入 JSON。
+    """
+    parts = [markdown.rstrip(), ""]
+    for name, items in changed_items(digest, merged).items():
+        parts += ["---", "", f"### {name}（{time} 更新）", ""]
+        for item in items:
+            parts.append(f"**{item['title']}**")
+            parts += [f"[{link['title']}]({link['url']})" for link in item["links"]]
+            if item["summary"]:
+                parts.append(item["summary"])
+            parts.append("")
+    return "\n".join(parts).rstrip() + "\n"
+
+
+def update_markdown(markdown: str, digest: dict, merged: dict, time: str) -> str:
+    """已有简报由 render_markdown 生成（工具调用输出）时整份重新渲染，否则追加变化的条目"""
+    if render_markdown(digest) == markdown:
+        return render_markdown(merged)
+    return append_update(markdown, digest, merged, time)
+
+
+def run_update(ctx: DigestContext, date: str = None) -> bool:
+    """
+    增量更新当天简报
+
+    当天还没有 {date}.md 时按完整流程生成一份（每天至多尝试一次），并把抓到的条目记为已处理；
+    简报存在但无法解析时跳过本次更新，不覆盖已发布的简报；合并结果写回 Markdown 的方式见 update_markdown。
+
+    Returns:
+        简报是否有变化
+    """
+    date = date or ctx.today
+    config = ctx.config
+    # 状态必须在抓取前读取：抓取会把本次条目追加进当天快照
+    state = load_state(config, date)
+    if not state_path(config, date).exists():
+        save_state(config, state)
+    seen = set(state["seen"])
+
+    full = not (ctx.digests_dir / f"{date}.md").exists()
+    digest = None if full else load_digest(date, ctx.digests_dir)
+    if not full and digest is None:
+        print(f"\n[警告] {date}.md 无法解析，跳过本次增量更新")
+        return False
+    if full and state.get("full_at"):
+        print(f"\n[跳过] {date} 已在 {state['full_at']} 尝试过完整生成，今天不再重试")
+        return False
+
+    items = ctx.fetch(date)
+    if not items:
+        print("\n[错误] 未获取到任何内容，退出")
+        return False
+    delta = [item for item in items if item_key(item) not in seen]
+    state["seen"] = sorted(seen | {item_key(item) for item in items})
+    record = {"time": datetime.now().isoformat(timespec="seconds"), "fetched": len(items), "new": len(delta)}
+
+    if full:
+        print(f"\n{date} 还没有简报，按完整流程生成")
+        # 先记下尝试时间：生成失败时后续每小时的运行不再重复完整生成
+        state["full_at"] = record["time"]
+        save_state(config, state)
+        selected = select_items(items, config, date, ctx.scheduler)
+        content, structured = generate_digest(selected, config, date)
+        record["full"] = True
+    else:
+        print(f"      新条目 {len(delta)} 条")
+        selected = select_items(delta, config, date, ctx.scheduler) if delta else []
+        if not selected:
+            print("[跳过] 没有新条目，不调用模型")
+            state["updates"].append({**record, "added": 0, "updated": 0})
+            save_state(config, state)
+            return False
+
+        print(f"正在为 {len(selected)} 条新内容生成增量更新...")
+        update = request_update(selected, digest, config, date)
+        merged, added, updated = merge_update(digest, update, config["incremental"]["max_items_per_section"])
+        record.update(added=added, updated=updated)
+        print(f"      新增 {added} 条，更新 {updated} 条")
+        if not added and not updated:
+            state["updates"].append(record)
+            save_state(config, state)
+            return False
+        content = update_markdown(ctx.digest_for(date), digest, merged, record["time"][11:16])
+        structured = merged
+
+    save_digest(content, config, date, update_latest=(date == ctx.today), digest=structured)
+    ctx.commit_rss_marks(date)
+    ctx.digests[date] = content
+    state["updates"].append(record)
+    save_state(config, state)
+
+    print("\n正在重建站点...")
+    build_site(config)
+    return True
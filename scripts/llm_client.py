@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+LLM 调用模块
+统一创建 Anthropic 兼容客户端，支持多模型并发生成（最快优先 / 法定数择优）
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+# anthropic 导入较慢（约 1 秒），在创建客户端时再导入
+if TYPE_CHECKING:
+    import anthropic
+
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).parent.parent
+CACHE_DIR = PROJECT_ROOT / ".cache"
+LATENCY_LOG = CACHE_DIR / "llm_latency.jsonl"
+
+# 简报必须包含的板块，用于质量评分
+DIGEST_SECTIONS = ["今日热点", "技术趋势", "产品观察", "推荐阅读"]
+
+
+def create_client(api_key: str = None, base_url: str = None, timeout: float = None) -> "anthropic.Anthropic":
+    """
+    创建 Anthropic 兼容客户端
+
+    Args:
+        api_key: API Key，默认读取 ANTHROPIC_API_KEY
+        base_url: API 端点，默认读取 ANTHROPIC_BASE_URL（如智谱 BigModel）
+        timeout: 请求超时秒数
+
+    Returns:
+        Anthropic 客户端
+    """
+    import anthropic
+
+    return anthropic.Anthropic(**_client_kwargs(api_key, base_url, timeout))
+
+
+def create_async_client(api_key: str = None, base_url: str = None,
+                        timeout: float = None) -> "anthropic.AsyncAnthropic":
+    """创建异步客户端（参数同 create_client），取消任务时会中断进行中的请求"""
+    import anthropic
+
+    return anthropic.AsyncAnthropic(**_client_kwargs(api_key, base_url, timeout))
+
+
+def _client_kwargs(api_key: str = None, base_url: str = None, timeout: float = None) -> dict:
+    api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
+    if not api_key:
+        raise ValueError("请设置 ANTHROPIC_API_KEY 环境变量")
+
+    base_url = base_url or os.environ.get("ANTHROPIC_BASE_URL")
+
+    kwargs = {"api_key": api_key}
+    # 如果设置了 base_url，则使用兼容 API（如智谱 BigModel）
+    if base_url:
+        kwargs["base_url"] = base_url
+    if timeout:
+        kwargs["timeout"] = timeout
+    return kwargs
+
+
+_clients: dict[tuple, "anthropic.Anthropic"] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str = None, base_url: str = None, timeout: float = None) -> "anthropic.Anthropic":
+    """
+    获取共享客户端：参数相同的调用复用同一个客户端及其连接池
+
+    同一进程内多次生成（如单进程完整流程、回填、map-reduce）不再重复创建客户端。
+    """
+    key = (api_key, base_url, timeout)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = create_client(api_key, base_url, timeout)
+        return _clients[key]
+
+
+def _resolve_providers(multi_config: dict) -> list[dict]:
+    """解析多模型配置，跳过未配置 API Key 的提供方"""
+    providers = []
+    for provider in multi_config.get("providers", []):
+        api_key = os.environ.get(provider.get("api_key_env", "ANTHROPIC_API_KEY"))
+        if not api_key:
+            print(f"[警告] 提供方 {provider['name']} 未配置 API Key，跳过")
+            continue
+        base_url = provider.get("base_url")
+        if not base_url and provider.get("base_url_env"):
+            base_url = os.environ.get(provider["base_url_env"])
+        providers.append({
+            "name": provider["name"],
+            "model": provider["model"],
+            "api_key": api_key,
+            "base_url": base_url,
+        })
+    return providers
+
+
+def score_digest(text: str) -> float:
+    """
+    简报质量启发式评分
+
+    板块完整度为主，其次是链接数量，过短或过长会被扣分。
+    """
+    if not text:
+        return 0.0
+
+    score = 0.0
+    for section in DIGEST_SECTIONS:
+        if section in text:
+            score += 10
+
+    links = re.findall(r"\]\((https?://[^)]+)\)", text)
+    score += min(len(set(links)), 15)
+
+    length = len(text)
+    if length < 300:
+        score -= 20
+    elif length > 3000:
+        score -= (length - 3000) / 200
+
+    return score
+
+
+def _record_latencies(records: list[dict]):
+    """追加写入各提供方的延迟记录"""
+    CACHE_DIR.mkdir(exist_ok=True)
+    with open(LATENCY_LOG, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+async def _race(providers: list[dict], prompt: str, max_tokens: int, timeout: float,
+                quorum: int, latencies: dict) -> list[tuple[dict, str, float]]:
+    """
+    用异步客户端并发请求各提供方，得到 quorum 个成功结果或超时后取消其余请求
+
+    取消会关闭进行中的 HTTP 连接，落后的提供方不会拖住进程退出。
+
+    Returns:
+        [(提供方, 生成结果, 耗时)]，按完成先后排序
+    """
+    async def call(provider: dict, client) -> tuple[str, float]:
+        start = time.perf_counter()
+        message = await client.messages.create(
+            model=provider["model"],
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return message.content[0].text, time.perf_counter() - start
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    clients = [create_async_client(p["api_key"], p["base_url"], timeout=timeout) for p in providers]
+    tasks = {asyncio.create_task(call(p, c)): p for p, c in zip(providers, clients)}
+    pending = set(tasks)
+    results = []
+    try:
+        while pending and len(results) < quorum:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(deadline - loop.time(), 0), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                print(f"[警告] 多模型生成超时 ({timeout}s)，已获得 {len(results)} 个结果")
+                break
+            for task in done:
+                provider = tasks[task]
+                record = latencies[provider["name"]]
+                try:
+                    text, elapsed = task.result()
+                except Exception as e:
+                    record.update(status="error", error=str(e)[:200])
+                    print(f"[警告] 提供方 {provider['name']} 生成失败: {e}")
+                    continue
+                record.update(status="ok", latency=round(elapsed, 3))
+                print(f"      {provider['name']} ({provider['model']}) 完成，耗时 {elapsed:.1f}s")
+                results.append((provider, text, elapsed))
+    finally:
+        # 取消落后的提供方（中断其 HTTP 请求），不等待其完成
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for client in clients:
+            await client.close()
+    return results
+
+
+def generate_with_providers(prompt: str, config: dict, max_tokens: int = None) -> str:
+    """
+    向多个提供方并发发送同一 prompt 并选取结果
+
+    mode = "fastest": 返回第一个成功的结果
+    mode = "quorum":  等待 quorum 个成功结果，按 score_digest 择优
+
+    Args:
+        prompt: 提示词
+        config: 全局配置
+        max_tokens: 最大输出 token 数，默认使用 config["claude"]["max_tokens"]
+
+    Returns:
+        选中的生成结果
+    """
+    multi_config = config["claude"]["multi_model"]
+    mode = multi_config.get("mode", "fastest")
+    timeout = multi_config.get("timeout", 180)
+    max_tokens = max_tokens or config["claude"]["max_tokens"]
+
+    providers = _resolve_providers(multi_config)
+    if not providers:
+        raise ValueError("多模型模式下没有可用的提供方")
+    quorum = min(multi_config.get("quorum", 2), len(providers)) if mode == "quorum" else 1
+
+    started_at = datetime.now().isoformat(timespec="seconds")
+    latencies = {p["name"]: {"provider": p["name"], "model": p["model"], "status": "abandoned"} for p in providers}
+    results = asyncio.run(_race(providers, prompt, max_tokens, timeout, quorum, latencies))
+
+    if not results:
+        _record_latencies([dict(r, run=started_at, selected=False) for r in latencies.values()])
+        raise RuntimeError("所有提供方均生成失败")
+
+    if mode == "quorum":
+        best = max(results, key=lambda r: (score_digest(r[1]), -r[2]))
+    else:
+        best = min(results, key=lambda r: r[2])
+
+    _record_latencies([
+        dict(r, run=started_at, mode=mode, selected=(r["provider"] == best[0]["name"]))
+        for r in latencies.values()
+    ])
+    print(f"      选中 {best[0]['name']} ({best[0]['model']})")
+    return best[1]
+
+
+def call_llm(prompt: str, config: dict, max_tokens: int = None) -> str:
+    """
+    调用 LLM 生成文本
+
+    启用 config["claude"]["multi_model"] 时并发调用多个提供方，否则使用单一模型。
+    """
+    multi_config = config["claude"].get("multi_model", {})
+    if multi_config.get("enabled"):
+        return generate_with_providers(prompt, config, max_tokens)
+
+    client = get_client()
+    message = client.messages.create(
+        model=config["claude"]["model"],
+        max_tokens=max_tokens or config["claude"]["max_tokens"],
+        messages=[
+            {"role": "user", "content": prompt}
+        ]
+    )
+    return message.content[0].text
+
+
+def call_llm_tool(prompt: str, config: dict, tool: dict, max_tokens: int = None) -> dict:
+    """
+    强制模型调用指定工具，返回工具参数（结构化输出）
+
+    只使用主模型（config["claude"]["model"]），多模型竞速仍走 call_llm 的文本输出。
+
+    Raises:
+        ValueError: 模型没有调用该工具
+    """
+    client = get_client()
+    message = client.messages.create(
+        model=config["claude"]["model"],
+        max_tokens=max_tokens or config["claude"]["max_tokens"],
+        tools=[tool],
+        tool_choice={"type": "tool", "name": tool["name"]},
+        messages=[
+            {"role": "user", "content": prompt}
+        ]
+    )
+    for block in message.content:
+        if block.type == "tool_use" and block.name == tool["name"]:
+            return block.input
+    raise ValueError(f"模型未调用工具 {tool['name']}（stop_reason={message.stop_reason}）")
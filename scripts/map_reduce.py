@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Map-Reduce 简报生成
+内容过多时按来源/分类切块并发提炼（map），再汇总生成四板块简报（reduce）
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from llm_client import call_llm
+from models import Item
+from tech_digest import generate_digest_with_claude, group_into_sections, prepare_content_for_claude
+
+
+def split_into_chunks(items: list[Item], chunk_size: int) -> list[tuple[str, str]]:
+    """
+    按板块（来源/RSS 分类）切块
+
+    Returns:
+        (块名称, 块内容) 列表，块内容与 prepare_content_for_claude 格式一致
+    """
+    chunks = []
+    for name, section_items in group_into_sections(items).items():
+        for i in range(0, len(section_items), chunk_size):
+            part = section_items[i:i + chunk_size]
+            chunks.append((name, prepare_content_for_claude(part, per_category_limit=len(part))))
+    return chunks
+
+
+def build_map_prompt(name: str, content: str, picks: int) -> str:
+    """构建 map 阶段的提炼提示词"""
+    return f"""你是一位资深科技编辑，正在为每日科技简报做初筛。
+
+以下是来自「{name}」的一批原始内容:
+{content}
+
+请从中挑选最值得关注的至多 {picks} 条，按重要性排序，输出 Markdown 列表:
+- 每条格式: `- [标题](原始链接) 一句话说明要点及为什么重要 [来源]`
+- 必须保留原始链接，不要编造内容
+- 明显的水帖、广告、重复内容直接舍弃
+
+直接输出列表，不需要额外说明。"""
+
+
+def generate_digest_map_reduce(items: list[Item], config: dict, today: str) -> tuple[str, dict | None]:
+    """
+    使用 map-reduce 方式生成简报
+
+    Args:
+        items: 所有条目
+        config: 全局配置
+        today: 日期字符串
+
+    Returns:
+        (简报 Markdown, 结构化简报)，同 generate_digest_with_claude
+    """
+    mr_config = config["claude"]["map_reduce"]
+    chunks = split_into_chunks(items, mr_config["chunk_size"])
+    print(f"      切分为 {len(chunks)} 块，并发度 {mr_config['max_workers']}")
+
+    summaries = [None] * len(chunks)
+
+    def map_chunk(index: int) -> str:
+        name, content = chunks[index]
+        prompt = build_map_prompt(name, content, mr_config["picks_per_chunk"])
+        return call_llm(prompt, config, max_tokens=mr_config["map_max_tokens"])
+
+    with ThreadPoolExecutor(max_workers=mr_config["max_workers"]) as executor:
+        futures = {executor.submit(map_chunk, i): i for i in range(len(chunks))}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                summaries[index] = future.result()
+            except Exception as e:
+                print(f"[警告] 分块 {chunks[index][0]} 提炼失败: {e}")
+
+    # 保持分块原有顺序，按块名称归组
+    sections = {}
+    for (name, _), summary in zip(chunks, summaries):
+        if summary:
+            sections.setdefault(name, []).append(summary.strip())
+    if not sections:
+        raise RuntimeError("所有分块提炼均失败")
+
+    reduced_content = "\n\n".join(
+        f"## {name}\n" + "\n".join(parts) for name, parts in sections.items()
+    )
+    print(f"      提炼完成 {sum(1 for s in summaries if s)}/{len(chunks)} 块，正在汇总...")
+
+    return generate_digest_with_claude(reduced_content, config, today)
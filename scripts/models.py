@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+条目数据模型
+所有数据源统一产出的紧凑条目记录
+"""
+
+import sys
+from dataclasses import dataclass, fields, replace
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+
+TZ = ZoneInfo("Asia/Shanghai")
+
+
+@dataclass(slots=True)
+class Item:
+    """
+    抓取到的单个条目
+
+    kind/source/category/node 会被 intern，大量条目共享同一份字符串；
+    created 为解析后的 Unix 时间戳（秒），未知时为 None。
+    """
+
+    kind: str                      # "v2ex" / "hn" / "rss"
+    source: str                    # 展示用来源名称，如 "V2EX"、"36氪"
+    title: str
+    url: str
+    category: str = ""             # RSS 分类
+    node: str = ""                 # V2EX 节点
+    replies: int = 0               # V2EX 回复数
+    score: int = 0                 # HN 得分
+    comments: int = 0              # HN 评论数
+    created: float | None = None
+    summary: str = ""
+    body: str = ""                 # 原文正文摘录（见 enrichment），未补全时为空
+    novelty: float = 1.0           # 1 表示全新，越小与近期简报越相似
+
+    def __post_init__(self):
+        self.kind = sys.intern(self.kind)
+        self.source = sys.intern(self.source)
+        self.category = sys.intern(self.category)
+        self.node = sys.intern(self.node)
+
+    @property
+    def published_at(self) -> datetime | None:
+        """发布时间（北京时间）"""
+        if self.created is None:
+            return None
+        return datetime.fromtimestamp(self.created, TZ)
+
+    def to_dict(self) -> dict:
+        """转为普通字典，便于 JSON 序列化"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Item":
+        """从字典还原，忽略未知字段及 None 值"""
+        names = ITEM_FIELDS
+        return cls(**{k: v for k, v in data.items() if k in names and v is not None})
+
+    def with_novelty(self, novelty: float) -> "Item":
+        """返回设置了新颖度的副本"""
+        return replace(self, novelty=novelty)
+
+
+ITEM_FIELDS = frozenset(f.name for f in fields(Item))
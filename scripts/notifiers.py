@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+多渠道通知
+钉钉、企业微信、飞书、Telegram、邮件共用一个分发器：简报消息只渲染一次，
+各渠道并行发送，每个渠道有独立的连接池和按目标的限速，发送结束后输出各渠道耗时。
+
+渠道的启用与参数见 config.json 的 "notifications"，密钥通过环境变量提供；
+各渠道的接口地址（base_url / smtp_host）可以改为本地桩服务用于测试。
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import smtplib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from atomic_io import atomic_write
+from dingtalk_notifier import RateLimiter, RetryableError, build_digest_message, load_robots
+
+
+# 项目根目录，发件箱在 data/ 下（不提交，CI 通过 actions/cache 保留），下一次运行也能补发
+PROJECT_ROOT = Path(__file__).parent.parent
+OUTBOX_PATH = PROJECT_ROOT / "data" / "outbox" / "notifications.json"
+
+# 未传入 config["notifications"] 时的默认分发参数
+DEFAULT_OPTIONS = {
+    "max_workers": 8,
+    "max_retries": 3,
+    "backoff": 2.0,
+    "timeout": 10,
+    "wait_timeout": 60,
+    "outbox_max_age_hours": 48,
+    "channels": {},
+}
+
+CHANNEL_REGISTRY: dict[str, type["Channel"]] = {}
+
+
+def register_channel(name: str):
+    """注册通知渠道的装饰器"""
+    def decorator(cls):
+        cls.name = name
+        CHANNEL_REGISTRY[name] = cls
+        return cls
+    return decorator
+
+
+@dataclass
+class DigestMessage:
+    """渲染好的通知消息，各渠道按需取用不同格式"""
+
+    title: str
+    markdown: str
+
+    @cached_property
+    def text(self) -> str:
+        """去掉 Markdown 标记的纯文本"""
+        lines = []
+        for line in self.markdown.splitlines():
+            line = line.lstrip("#").strip().replace("**", "")
+            if line and line != "---":
+                lines.append(line)
+        return "\n".join(lines)
+
+    @cached_property
+    def html(self) -> str:
+        import markdown
+        return markdown.markdown(self.markdown)
+
+
+class Channel:
+    """
+    通知渠道基类
+
+    子类实现 targets() 和 send()；send() 遇到可重试的错误抛出 RetryableError，
+    其他错误抛出 RuntimeError。rate_per_minute 为每个目标的默认限速，
+    可在 config["notifications"]["channels"][name] 中覆盖。
+    """
+
+    name = ""
+    rate_per_minute = 20
+
+    def __init__(self, options: dict, timeout: float):
+        self.options = options
+        self.timeout = timeout
+        self.session = requests.Session()
+        pool_size = options.get("pool_size", 4)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.rate = options.get("rate_per_minute", self.rate_per_minute)
+        self.limiters: dict[str, RateLimiter] = {}
+        self.lock = threading.Lock()
+
+    def targets(self) -> list[str]:
+        """已配置的发送目标标识，未配置时返回空列表"""
+        raise NotImplementedError
+
+    def send(self, target: str, message: DigestMessage):
+        raise NotImplementedError
+
+    def acquire(self, target: str, stop: threading.Event) -> bool:
+        with self.lock:
+            limiter = self.limiters.setdefault(target, RateLimiter(self.rate))
+        return limiter.acquire(stop)
+
+    def post_json(self, url: str, data: dict) -> dict:
+        """POST JSON，网络错误、429 和 5xx 视为可重试"""
+        try:
+            response = self.session.post(url, json=data, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise RetryableError(str(e)) from e
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableError(f"HTTP {response.status_code}")
+        try:
+            return response.json()
+        except ValueError:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+    def close(self):
+        self.session.close()
+
+
+def target_id(secret: str) -> str:
+    """目标标识（地址或 token 的哈希，发件箱中不保存密钥）"""
+    return hashlib.sha1(secret.encode("utf-8")).hexdigest()[:12]
+
+
+@register_channel("dingtalk")
+class DingTalkChannel(Channel):
+    """钉钉群机器人（DINGTALK_WEBHOOK_URL / DINGTALK_SECRET / DINGTALK_WEBHOOKS）"""
+
+    def __init__(self, options: dict, timeout: float):
+        super().__init__(options, timeout)
+        # 机器人共用本渠道的连接池
+        robots = load_robots({**options, "timeout": timeout}, self.session)
+        self.robots = {robot.robot_id: robot for robot in robots}
+
+    def targets(self) -> list[str]:
+        return list(self.robots)
+
+    def send(self, target: str, message: DigestMessage):
+        self.robots[target].post_markdown(message.title, message.markdown)
+
+
+@register_channel("wecom")
+class WeComChannel(Channel):
+    """企业微信群机器人（WECOM_WEBHOOK_URL，多个地址用逗号分隔）"""
+
+    # 企业微信机器人限频 20 条/分钟
+    RETRYABLE_ERRCODES = {45009}
+
+    def __init__(self, options: dict, timeout: float):
+        super().__init__(options, timeout)
+        self.urls = {target_id(url): url for url in _split_env("WECOM_WEBHOOK_URL")}
+
+    def targets(self) -> list[str]:
+        return list(self.urls)
+
+    def send(self, target: str, message: DigestMessage):
+        result = self.post_json(self.urls[target], {
+            "msgtype": "markdown",
+            "markdown": {"content": message.markdown},
+        })
+        if result.get("errcode") == 0:
+            return
+        if result.get("errcode") in self.RETRYABLE_ERRCODES:
+            raise RetryableError(result.get("errmsg"))
+        raise RuntimeError(f"{result.get('errcode')}: {result.get('errmsg')}")
+
+
+@register_channel("feishu")
+class FeishuChannel(Channel):
+    """飞书群机器人（FEISHU_WEBHOOK_URL，可选 FEISHU_SECRET 加签）"""
+
+    rate_per_minute = 100
+    # 飞书机器人限频 100 条/分钟、5 条/秒
+    RETRYABLE_CODES = {9499, 11232}
+
+    def __init__(self, options: dict, timeout: float):
+        super().__init__(options, timeout)
+        self.urls = {target_id(url): url for url in _split_env("FEISHU_WEBHOOK_URL")}
+        self.secret = os.environ.get("FEISHU_SECRET")
+
+    def targets(self) -> list[str]:
+        return list(self.urls)
+
+    def sign(self) -> dict:
+        """飞书加签：以 "timestamp\\nsecret" 为密钥对空串做 HMAC-SHA256"""
+        timestamp = str(int(time.time()))
+        key = f"{timestamp}\n{self.secret}".encode("utf-8")
+        sign = base64.b64encode(hmac.new(key, digestmod=hashlib.sha256).digest()).decode("utf-8")
+        return {"timestamp": timestamp, "sign": sign}
+
+    def send(self, target: str, message: DigestMessage):
+        data = {"msg_type": "text", "content": {"text": message.text}}
+        if self.secret:
+            data.update(self.sign())
+        result = self.post_json(self.urls[target], data)
+        code = result.get("code", result.get("StatusCode", 0))
+        if code == 0:
+            return
+        if code in self.RETRYABLE_CODES:
+            raise RetryableError(result.get("msg"))
+        raise RuntimeError(f"{code}: {result.get('msg')}")
+
+
+@register_channel("telegram")
+class TelegramChannel(Channel):
+    """Telegram Bot（TELEGRAM_BOT_TOKEN / TELEGRAM_CHAT_ID，多个会话用逗号分隔）"""
+
+    def __init__(self, options: dict, timeout: float):
+        super().__init__(options, timeout)
+        self.token = os.environ.get("TELEGRAM_BOT_TOKEN", "")
+        self.base_url = options.get("base_url", "https://api.telegram.org").rstrip("/")
+        self.chats = {target_id(chat_id): chat_id for chat_id in _split_env("TELEGRAM_CHAT_ID")}
+
+    def targets(self) -> list[str]:
+        return list(self.chats) if self.token else []
+
+    def send(self, target: str, message: DigestMessage):
+        result = self.post_json(f"{self.base_url}/bot{self.token}/sendMessage", {
+            "chat_id": self.chats[target],
+            "text": message.text,
+            "disable_web_page_preview": True,
+        })
+        if not result.get("ok"):
+            raise RuntimeError(f"{result.get('error_code')}: {result.get('description')}")
+
+
+@register_channel("email")
+class EmailChannel(Channel):
+    """
+    邮件（SMTP_HOST / SMTP_PORT / SMTP_USER / SMTP_PASSWORD / EMAIL_FROM / EMAIL_TO）
+
+    每个收件人单独发送一封，同一批次复用一个 SMTP 连接。
+    """
+
+    rate_per_minute = 30
+
+    def __init__(self, options: dict, timeout: float):
+        super().__init__(options, timeout)
+        self.smtp = None
+        self.host = os.environ.get("SMTP_HOST") or options.get("smtp_host")
+        self.recipients = {target_id(addr): addr for addr in _split_env("EMAIL_TO")}
+
+    def targets(self) -> list[str]:
+        return list(self.recipients) if self.host else []
+
+    def connect(self) -> smtplib.SMTP:
+        if self.smtp is None:
+            port = int(os.environ.get("SMTP_PORT") or self.options.get("smtp_port", 465))
+            if port == 465:
+                self.smtp = smtplib.SMTP_SSL(self.host, port, timeout=self.timeout)
+            else:
+                self.smtp = smtplib.SMTP(self.host, port, timeout=self.timeout)
+                if self.options.get("starttls", True) and self.smtp.has_extn("starttls"):
+                    self.smtp.starttls()
+            if os.environ.get("SMTP_USER"):
+                self.smtp.login(os.environ["SMTP_USER"], os.environ.get("SMTP_PASSWORD", ""))
+        return self.smtp
+
+    def send(self, target: str, message: DigestMessage):
+        mail = MIMEMultipart("alternative")
+        mail["Subject"] = message.title
+        mail["From"] = os.environ.get("EMAIL_FROM") or os.environ.get("SMTP_USER", "")
+        mail["To"] = self.recipients[target]
+        mail.attach(MIMEText(message.text, "plain", "utf-8"))
+        mail.attach(MIMEText(message.html, "html", "utf-8"))
+        with self.lock:
+            try:
+                self.connect().send_message(mail)
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                self.smtp = None
+                raise RetryableError(str(e)) from e
+
+    def close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except smtplib.SMTPException:
+                pass
+        super().close()
+
+
+def _split_env(name: str) -> list[str]:
+    return [value.strip() for value in os.environ.get(name, "").split(",") if value.strip()]
+
+
+class Outbox:
+    """
+    发件箱：未送达的消息，格式为
+    [{"id", "channel", "target", "title", "markdown", "attempts", "created"}]
+    """
+
+    def __init__(self, path: Path = OUTBOX_PATH):
+        self.path = path
+
+    def load(self, max_age_hours: float) -> list[dict]:
+        """读取未过期的消息"""
+        if not self.path.exists():
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            messages = json.load(f)
+        cutoff = time.time() - max_age_hours * 3600
+        fresh = [m for m in messages if m["created"] >= cutoff]
+        if len(fresh) < len(messages):
+            print(f"[通知] 丢弃 {len(messages) - len(fresh)} 条过期的待发消息")
+        return fresh
+
+    def save(self, messages: list[dict]):
+        if not messages and not self.path.exists():
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(self.path, json.dumps(messages, ensure_ascii=False, indent=2))
+
+
+class NotificationDispatcher:
+    """
+    通知分发器
+
+    每个 (渠道, 目标) 一个任务，按消息入队顺序发送，所有渠道共用 max_workers 个线程。
+    start() 立即返回；wait() 等待至多 wait_timeout 秒，未送达的消息（含超时未发的）
+    写回发件箱，下次运行时与新消息一起发送。发件箱中属于其他渠道的消息原样保留，
+    不参与本次发送，也不计入是否全部送达。
+    """
+
+    def __init__(self, channels: list[Channel], options: dict = None, outbox: Outbox = None):
+        self.options = {**DEFAULT_OPTIONS, **(options or {})}
+        self.channels = {}
+        for channel in channels:
+            targets = channel.targets()
+            if targets:
+                self.channels[channel.name] = (channel, set(targets))
+        self.outbox = outbox or Outbox()
+        saved = self.outbox.load(self.options["outbox_max_age_hours"]) if self.channels else []
+        self.pending = [entry for entry in saved if entry["channel"] in self.channels]
+        self.others = [entry for entry in saved if entry["channel"] not in self.channels]
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.executor = None
+        self.futures = []
+        self.latencies: dict[str, list[float]] = {}
+        self.failed: dict[str, int] = {}
+        self.started = 0.0
+
+    def enqueue(self, message: DigestMessage):
+        """向所有渠道的所有目标投递一条消息"""
+        for name, (_, targets) in self.channels.items():
+            for target in sorted(targets):
+                self.pending.append({
+                    "id": uuid.uuid4().hex,
+                    "channel": name,
+                    "target": target,
+                    "title": message.title,
+                    "markdown": message.markdown,
+                    "attempts": 0,
+                    "created": time.time(),
+                })
+
+    def send_with_retry(self, channel: Channel, target: str, message: DigestMessage):
+        """可重试的错误按指数退避重试，用尽次数后抛出最后一次的异常"""
+        for attempt in range(self.options["max_retries"] + 1):
+            if not channel.acquire(target, self.stop):
+                raise RetryableError("投递已停止")
+            try:
+                return channel.send(target, message)
+            except RetryableError:
+                if attempt == self.options["max_retries"] or self.stop.is_set():
+                    raise
+                delay = self.options["backoff"] * 2 ** attempt * (0.5 + random.random())
+                if self.stop.wait(delay):
+                    raise
+
+    def _deliver(self, channel: Channel, target: str, messages: list[dict]):
+        rendered = {}
+        for entry in messages:
+            if self.stop.is_set():
+                return
+            key = (entry["title"], entry["markdown"])
+            message = rendered.setdefault(key, DigestMessage(*key))
+            start = time.perf_counter()
+            try:
+                self.send_with_retry(channel, target, message)
+                delivered = True
+            except RetryableError as e:
+                entry["attempts"] += 1
+                print(f"❌ {channel.name} 发送失败（目标 {target}，稍后补发）: {e}")
+                with self.lock:
+                    self.failed[channel.name] = self.failed.get(channel.name, 0) + 1
+                continue
+            except Exception as e:
+                delivered = False
+                print(f"❌ {channel.name} 发送失败（目标 {target}，不再重试）: {e}")
+            with self.lock:
+                self.pending.remove(entry)
+                if delivered:
+                    self.latencies.setdefault(channel.name, []).append(time.perf_counter() - start)
+                else:
+                    self.failed[channel.name] = self.failed.get(channel.name, 0) + 1
+
+    def start(self) -> "NotificationDispatcher":
+        """在后台开始投递"""
+        groups = {}
+        for entry in self.pending:
+            channel = self.channels.get(entry["channel"])
+            if channel and entry["target"] in channel[1]:
+                groups.setdefault((entry["channel"], entry["target"]), []).append(entry)
+        if not groups:
+            return self
+        self.started = time.perf_counter()
+        self.executor = ThreadPoolExecutor(max_workers=self.options["max_workers"])
+        self.futures = [
+            self.executor.submit(self._deliver, self.channels[name][0], target, entries)
+            for (name, target), entries in groups.items()
+        ]
+        return self
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        等待投递结束，输出各渠道耗时并持久化发件箱
+
+        Returns:
+            是否全部送达
+        """
+        timeout = self.options["wait_timeout"] if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        for future in self.futures:
+            try:
+                future.result(timeout=max(deadline - time.monotonic(), 0))
+            except Exception:
+                break
+        self.stop.set()
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+        with self.lock:
+            remaining = list(self.pending)
+        if self.channels:
+            self.outbox.save(self.others + remaining)
+        if self.futures:
+            self.report(remaining)
+        for channel, _ in self.channels.values():
+            channel.close()
+        return not remaining
+
+    def report(self, remaining: list[dict]):
+        """输出各渠道的发送结果与延迟"""
+        print(f"[通知] 总耗时 {time.perf_counter() - self.started:.2f}s")
+        for name in self.channels:
+            latencies = sorted(self.latencies.get(name, []))
+            pending = sum(1 for entry in remaining if entry["channel"] == name)
+            line = f"      {name}: 成功 {len(latencies)} 条，失败 {self.failed.get(name, 0)} 次，待补发 {pending} 条"
+            if latencies:
+                p50 = latencies[len(latencies) // 2]
+                line += f"，延迟 p50 {p50 * 1000:.0f}ms / 最大 {latencies[-1] * 1000:.0f}ms"
+            print(line)
+
+
+def create_channels(options: dict, names: list[str] = None) -> list[Channel]:
+    """创建 options["channels"] 中启用的渠道（未列出的渠道默认启用，无凭据时自动跳过），names 指定时只创建这些渠道"""
+    channels = []
+    for name, cls in CHANNEL_REGISTRY.items():
+        if names and name not in names:
+            continue
+        channel_options = options["channels"].get(name, {})
+        if channel_options.get("enabled", True):
+            channels.append(cls(channel_options, options["timeout"]))
+    return channels
+
+
+def start_notifications(digest_content: str, date: str, options: dict = None,
+                        channels: list[str] = None) -> NotificationDispatcher | None:
+    """
+    在后台开始向所有渠道发送简报（连同发件箱中待补发的消息）
+
+    Args:
+        digest_content: Markdown 格式的简报内容
+        date: 日期字符串，如 "2026-01-18"
+        options: 分发参数（config["notifications"]），见 DEFAULT_OPTIONS
+        channels: 只使用指定的渠道
+
+    Returns:
+        分发器，调用方在结束前调用 wait()；没有可用渠道时返回 None
+    """
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    dispatcher = NotificationDispatcher(create_channels(options, channels), options)
+    if not dispatcher.channels:
+        print("[通知] 没有已配置的渠道，跳过发送")
+        return None
+
+    # 热点只提取、渲染一次，所有渠道共用
+    dispatcher.enqueue(DigestMessage(*build_digest_message(digest_content, date)))
+    print(f"[通知] 开始后台发送: {', '.join(dispatcher.channels)}，共 {len(dispatcher.pending)} 条消息")
+    return dispatcher.start()
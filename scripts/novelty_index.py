@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+新颖度索引
+基于近几天简报中的标题和链接构建哈希 n-gram 向量索引，
+在抓取阶段剔除或降权已经报道过的条目，同时缩减提示词长度
+"""
+
+import io
+import re
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from atomic_io import atomic_write
+from models import Item
+
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).parent.parent
+INDEX_DIR = PROJECT_ROOT / ".cache" / "novelty"
+
+LINK_PATTERN = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+BOLD_PATTERN = re.compile(r"\*\*([^*\[\]]+?)\*\*")
+NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+LATIN_WORD = re.compile(r"[a-z0-9]+")
+
+
+def extract_entries(markdown: str) -> list[tuple[str, str]]:
+    """
+    提取简报中的条目
+
+    Returns:
+        (标题, 链接) 列表，未带链接的加粗标题链接为空字符串
+    """
+    entries = [(title.strip(), url) for title, url in LINK_PATTERN.findall(markdown)]
+    for title in BOLD_PATTERN.findall(markdown):
+        title = title.strip()
+        # 跳过 "导语：" 之类的短标签
+        if len(title) >= 6 and not title.endswith(("：", ":")):
+            entries.append((title, ""))
+    return entries
+
+
+def vectorize(titles: list[str], dim: int, ngram: int) -> np.ndarray:
+    """
+    将标题转为 L2 归一化的哈希 n-gram 向量
+
+    中文按字符 n-gram，英文额外加入整词特征；使用 crc32 保证跨进程哈希稳定。
+    """
+    vectors = np.zeros((len(titles), dim), dtype=np.float32)
+    for row, title in enumerate(titles):
+        text = NON_WORD.sub(" ", title.lower()).strip()
+        compact = text.replace(" ", "")
+        features = [compact[i:i + ngram] for i in range(max(len(compact) - ngram + 1, 1))]
+        features.extend(LATIN_WORD.findall(text))
+        for feature in features:
+            vectors[row, zlib.crc32(feature.encode("utf-8")) % dim] += 1.0
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+class NoveltyIndex:
+    """近几天简报条目的向量索引"""
+
+    def __init__(self, titles: list[str], urls: list[str], vectors: np.ndarray, dim: int, ngram: int):
+        self.titles = titles
+        self.urls = {url for url in urls if url}
+        self.vectors = vectors
+        self.dim = dim
+        self.ngram = ngram
+
+    @classmethod
+    def build(cls, config: dict, reference_date: str = None) -> "NoveltyIndex":
+        """
+        加载基准日期之前 N 天的简报构建索引
+
+        每份简报的向量缓存在 .cache/novelty/ 下，简报未修改时直接读取。
+        """
+        novelty_config = config["novelty"]
+        dim, ngram = novelty_config["dim"], novelty_config["ngram"]
+        digests_dir = PROJECT_ROOT / config["output"]["digests_dir"]
+        date_format = config["output"]["date_format"]
+        today = datetime.strptime(reference_date, date_format) if reference_date else datetime.now()
+
+        titles, urls, blocks = [], [], []
+        for i in range(1, novelty_config["days"] + 1):
+            date_str = (today - timedelta(days=i)).strftime(date_format)
+            digest_file = digests_dir / f"{date_str}.md"
+            if not digest_file.exists():
+                continue
+            day_titles, day_urls, day_vectors = _load_day(digest_file, dim, ngram)
+            titles.extend(day_titles)
+            urls.extend(day_urls)
+            blocks.append(day_vectors)
+
+        vectors = np.vstack(blocks) if blocks else np.zeros((0, dim), dtype=np.float32)
+        return cls(titles, urls, vectors, dim, ngram)
+
+    def similarity(self, items: list[Item]) -> np.ndarray:
+        """每个条目与索引中最相近条目的余弦相似度，链接完全相同记为 1"""
+        if not items:
+            return np.zeros(0)
+        if len(self.vectors) == 0:
+            sims = np.zeros(len(items))
+        else:
+            query = vectorize([item.title for item in items], self.dim, self.ngram)
+            sims = (query @ self.vectors.T).max(axis=1).astype(np.float64)
+        same_url = np.fromiter((item.url in self.urls for item in items), dtype=bool, count=len(items))
+        return np.where(same_url, 1.0, sims)
+
+
+def _load_day(digest_file: Path, dim: int, ngram: int) -> tuple[list, list, np.ndarray]:
+    """读取单日简报的向量缓存，缺失或过期时重建"""
+    cache_file = INDEX_DIR / f"{digest_file.stem}.npz"
+    mtime = digest_file.stat().st_mtime
+    if cache_file.exists():
+        cached = np.load(cache_file, allow_pickle=False)
+        if cached["mtime"] == mtime and cached["vectors"].shape[1] == dim and cached["ngram"] == ngram:
+            return cached["titles"].tolist(), cached["urls"].tolist(), cached["vectors"]
+
+    with open(digest_file, "r", encoding="utf-8") as f:
+        entries = extract_entries(f.read())
+    titles = [title for title, _ in entries]
+    urls = [url for _, url in entries]
+    vectors = vectorize(titles, dim, ngram)
+
+    # 先在内存中打包再原子写入，并发运行或中途崩溃时不会留下截断的缓存
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        titles=np.array(titles, dtype=str),
+        urls=np.array(urls, dtype=str),
+        vectors=vectors,
+        mtime=mtime,
+        ngram=ngram,
+    )
+    atomic_write(cache_file, buffer.getvalue())
+    return titles, urls, vectors
+
+
+def filter_covered_items(items: list[Item], config: dict, reference_date: str = None) -> list[Item]:
+    """
+    剔除或降权已被近几天简报覆盖的条目
+
+    相似度 >= drop_threshold 直接剔除；>= downweight_threshold 时写入
+    novelty = 1 - 相似度，供排序引擎降权。返回新的条目，不修改输入。
+    """
+    novelty_config = config["novelty"]
+    index = NoveltyIndex.build(config, reference_date)
+
+    kept = []
+    for item, sim in zip(items, index.similarity(items)):
+        if sim >= novelty_config["drop_threshold"]:
+            continue
+        if sim >= novelty_config["downweight_threshold"]:
+            item = item.with_novelty(round(1.0 - float(sim), 3))
+        kept.append(item)
+
+    if len(kept) < len(items):
+        print(f"      剔除 {len(items) - len(kept)} 条近期已报道的内容")
+    return kept
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+条目排序引擎
+将所有来源的条目放在一起，用 NumPy 一次性计算特征与得分，决定哪些条目进入简报
+"""
+
+import numpy as np
+
+from models import Item
+
+
+def _normalize(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """对 mask 内的值做 log1p 后按最大值归一化到 [0, 1]"""
+    out = np.zeros_like(values)
+    if not mask.any():
+        return out
+    logged = np.log1p(np.clip(values[mask], 0, None))
+    peak = logged.max()
+    if peak > 0:
+        out[mask] = logged / peak
+    return out
+
+
+def _kind_codes(items: list[Item]) -> np.ndarray:
+    """将条目来源类型编码为整数数组"""
+    codes = {}
+    return np.fromiter((codes.setdefault(item.kind, len(codes)) for item in items), dtype=np.int64, count=len(items))
+
+
+def score_items(items: list[Item], config: dict) -> np.ndarray:
+    """
+    计算所有条目的得分
+
+    特征:
+        - engagement: 得分（HN 等）/ 回复数（V2EX），各自来源内归一化
+        - velocity: 评论速度（评论数 / 小时），各自来源内归一化
+        - recency: 按半衰期指数衰减
+        - source weight: config["ranking"]["source_weights"]
+        - novelty: Item.novelty（见 novelty_index），与近期简报越相似越降权
+
+    Returns:
+        得分数组，顺序与 items 一致
+    """
+    rank_config = config["ranking"]
+    weights = rank_config["weights"]
+    n = len(items)
+    if n == 0:
+        return np.zeros(0)
+
+    kind = _kind_codes(items)
+    is_rss = np.fromiter((item.kind == "rss" for item in items), dtype=bool, count=n)
+    engagement_raw = np.fromiter(
+        (item.score or item.replies for item in items), dtype=np.float64, count=n
+    )
+    comments = np.fromiter((item.comments for item in items), dtype=np.float64, count=n)
+    created = np.fromiter(
+        (item.created or np.nan for item in items), dtype=np.float64, count=n
+    )
+
+    # 以最新条目时间为基准，快照数据重放时同样适用
+    has_time = ~np.isnan(created)
+    now = created[has_time].max() if has_time.any() else 0.0
+    age_hours = np.where(has_time, np.maximum(now - created, 0) / 3600, np.nan)
+
+    comment_rate = np.where(has_time, comments / np.maximum(np.nan_to_num(age_hours, nan=1.0), 1.0), 0.0)
+    engagement = np.zeros(n)
+    velocity = np.zeros(n)
+    for k in np.unique(kind):
+        mask = kind == k
+        engagement += _normalize(engagement_raw, mask)
+        velocity += _normalize(comment_rate, mask)
+
+    half_life = rank_config["half_life_hours"]
+    recency = np.where(has_time, np.exp(-np.log(2) * np.nan_to_num(age_hours) / half_life), 0.5)
+
+    source_weights = rank_config.get("source_weights", {})
+    source_weight = np.fromiter(
+        (source_weights.get(item.source, 1.0) for item in items), dtype=np.float64, count=n
+    )
+
+    novelty = np.fromiter((item.novelty for item in items), dtype=np.float64, count=n)
+    novelty_factor = 1.0 - weights["novelty"] * (1.0 - novelty)
+
+    # RSS 没有互动数据，给一个基础分避免总被排到最后
+    base = np.where(is_rss, weights["rss_base"], 0.0)
+
+    scores = (
+        weights["engagement"] * engagement
+        + weights["velocity"] * velocity
+        + weights["recency"] * recency
+        + base
+    )
+    return scores * source_weight * novelty_factor
+
+
+def filter_stale_items(items: list[Item], config: dict, reference: float) -> list[Item]:
+    """
+    剔除新鲜度窗口之外的条目（config["ranking"]["freshness"]）
+
+    只作用于 kinds 中列出的来源；没有发布时间的条目按 keep_undated 决定去留。
+
+    Args:
+        items: 条目
+        config: 全局配置
+        reference: 窗口终点的 Unix 时间戳
+    """
+    freshness = config["ranking"].get("freshness")
+    if not freshness or not items:
+        return items
+
+    cutoff = reference - freshness["window_hours"] * 3600
+    kinds = set(freshness["kinds"])
+    keep_undated = freshness.get("keep_undated", True)
+    kept = [
+        item for item in items
+        if item.kind not in kinds
+        or (keep_undated if item.created is None else cutoff <= item.created <= reference)
+    ]
+    if len(kept) < len(items):
+        print(f"      剔除 {len(items) - len(kept)} 条超出 {freshness['window_hours']} 小时窗口的内容")
+    return kept
+
+
+def select_top_items(items: list[Item], config: dict, max_items: int = None) -> list[Item]:
+    """
+    按得分挑选进入简报的条目
+
+    每个来源先保底 min_per_kind 条，剩余名额按全局得分分配。
+
+    Returns:
+        按得分降序的条目，总数不超过 max_items（默认 config["ranking"]["max_items"]）
+    """
+    if not items:
+        return []
+
+    rank_config = config["ranking"]
+    if max_items is None:
+        max_items = rank_config["max_items"]
+    scores = score_items(items, config)
+    kind = _kind_codes(items)
+    order = np.argsort(-scores, kind="stable")
+
+    # 各来源内的名次
+    rank_in_kind = np.empty(len(items), dtype=np.int64)
+    for k in np.unique(kind):
+        members = order[kind[order] == k]
+        rank_in_kind[members] = np.arange(len(members))
+
+    guaranteed = rank_in_kind[order] < rank_config["min_per_kind"]
+    chosen = np.zeros(len(items), dtype=bool)
+    chosen[np.concatenate([order[guaranteed], order[~guaranteed]])[:max_items]] = True
+
+    return [items[index] for index in order[chosen[order]]]
@@ -5,20 +5,145 @@
 这是完全通过 Agent Skills 方式运行的版本。
 Claude 会自动发现并调用 .claude/skills/daily-tech-digest/ 中的 Skill。
 
+Skill 配置在本地解析 .claude/skills/*/SKILL.md 的 frontmatter 校验，不再单独发起一轮
+"What Skills are available?" 查询；随后只运行一个会话直接调用 Skill，流式打印进度和耗时。
+
+--mode hybrid 时 Agent 通过进程内 MCP 工具（digest_tools.py）调用 抓取 / 生成 / 保存，
+未完成的步骤直接执行补齐；--mode direct 不经过 Agent，直接按固定顺序执行流水线。
+
+用法:
+    python scripts/run_with_sdk.py                  # Skill 方式
+    python scripts/run_with_sdk.py --mode hybrid
+    python scripts/run_with_sdk.py --mode direct
+
 注意：claude-agent-sdk 底层调用 Claude Code CLI，需要：
 - 原生 Anthropic API Key（设置 ANTHROPIC_API_KEY）
 - 或者通过 ANTHROPIC_BASE_URL 使用兼容 API（如智谱 BigModel）
 """
 
+import argparse
 import asyncio
+import json
 import os
+import re
+import time
 from pathlib import Path
 
-from claude_agent_sdk import query, ClaudeAgentOptions
+from claude_agent_sdk import (
+    AssistantMessage,
+    ClaudeAgentOptions,
+    ResultMessage,
+    TextBlock,
+    ToolUseBlock,
+    query,
+)
 
 
 # 项目根目录
 PROJECT_ROOT = Path(__file__).parent.parent
+SKILLS_DIR = PROJECT_ROOT / ".claude" / "skills"
+SKILL_NAME = "daily-tech-digest"
+
+# Skill frontmatter 的约束（与 Agent Skills 文档一致）
+SKILL_NAME_PATTERN = re.compile(r"^[a-z0-9-]{1,64}$")
+MAX_DESCRIPTION_LENGTH = 1024
+
+
+def parse_frontmatter(text: str) -> dict:
+    """
+    解析 SKILL.md 开头 --- 包围的 frontmatter（只支持单行 key: value）
+
+    Raises:
+        ValueError: 没有 frontmatter 或未闭合
+    """
+    lines = text.splitlines()
+    if not lines or lines[0].strip() != "---":
+        raise ValueError("缺少 frontmatter")
+    fields = {}
+    for line in lines[1:]:
+        if line.strip() == "---":
+            return fields
+        key, sep, value = line.partition(":")
+        if sep and key.strip():
+            fields[key.strip()] = value.strip().strip("\"'")
+    raise ValueError("frontmatter 未闭合")
+
+
+def load_local_skills(skills_dir: Path = SKILLS_DIR) -> dict[str, dict]:
+    """
+    读取并校验 .claude/skills/*/SKILL.md
+
+    Returns:
+        {目录名: {"name", "description", "path", "errors"}}，errors 为空表示校验通过
+    """
+    skills = {}
+    for path in sorted(skills_dir.glob("*/SKILL.md")):
+        errors = []
+        try:
+            fields = parse_frontmatter(path.read_text(encoding="utf-8"))
+        except ValueError as e:
+            fields, errors = {}, [str(e)]
+        name = fields.get("name", "")
+        description = fields.get("description", "")
+        if fields and not SKILL_NAME_PATTERN.match(name):
+            errors.append(f"name 不合法: {name!r}")
+        if fields and not description:
+            errors.append("缺少 description")
+        elif len(description) > MAX_DESCRIPTION_LENGTH:
+            errors.append(f"description 超过 {MAX_DESCRIPTION_LENGTH} 字符")
+        skills[path.parent.name] = {"name": name, "description": description, "path": path, "errors": errors}
+    return skills
+
+
+def check_skill_setup(skill_name: str = SKILL_NAME, skills_dir: Path = SKILLS_DIR) -> bool:
+    """本地校验 Skill 配置并打印可用 Skills，代替一轮 Agent 查询"""
+    skills = load_local_skills(skills_dir)
+    if not skills:
+        print(f"\n[错误] {skills_dir} 下没有 Skill，请先运行 python scripts/use_agent_sdk.py 完成设置")
+        return False
+
+    print("\n[可用 Skills]")
+    for directory, skill in skills.items():
+        status = "；".join(skill["errors"]) or skill["description"][:60]
+        print(f"  - {skill['name'] or directory}: {status}")
+
+    skill = skills.get(skill_name)
+    if skill is None:
+        print(f"\n[错误] Skill 不存在: {skills_dir / skill_name / 'SKILL.md'}")
+        return False
+    if skill["errors"]:
+        print(f"\n[错误] Skill 配置无效: {'；'.join(skill['errors'])}")
+        return False
+    if skill["name"] != skill_name:
+        print(f"[警告] Skill 名称 {skill['name']!r} 与目录名 {skill_name!r} 不一致")
+
+    source = PROJECT_ROOT / "SKILL.md"
+    if source.exists() and source.read_bytes() != skill["path"].read_bytes():
+        print("[警告] .claude/skills 中的 SKILL.md 与项目根目录不一致，可运行 use_agent_sdk.py 重新同步")
+    return True
+
+
+def api_env() -> dict:
+    """传给 Claude Code CLI 的环境变量（包括可能的 ANTHROPIC_BASE_URL）"""
+    env_vars = {"ANTHROPIC_API_KEY": os.environ["ANTHROPIC_API_KEY"]}
+    if os.environ.get("ANTHROPIC_BASE_URL"):
+        env_vars["ANTHROPIC_BASE_URL"] = os.environ["ANTHROPIC_BASE_URL"]
+    return env_vars
+
+
+def print_message(message, start: float):
+    """流式打印 Agent 消息，带相对开始时间"""
+    elapsed = time.perf_counter() - start
+    if isinstance(message, AssistantMessage):
+        for block in message.content:
+            if isinstance(block, TextBlock):
+                print(f"[+{elapsed:5.1f}s] {block.text}")
+            elif isinstance(block, ToolUseBlock):
+                print(f"[+{elapsed:5.1f}s] [工具调用] {block.name}")
+    elif isinstance(message, ResultMessage):
+        cost = f"，费用 ${message.total_cost_usd:.4f}" if message.total_cost_usd else ""
+        print(f"[+{elapsed:5.1f}s] [结束] {message.subtype}，{message.num_turns} 轮，"
+              f"API 耗时 {message.duration_api_ms / 1000:.1f}s{cost}")
 
 
 async def run_with_skill():
@@ -29,20 +154,19 @@ async def run_with_skill():
     print("=" * 60)
 
     # 检查 API Key
-    api_key = os.environ.get("ANTHROPIC_API_KEY")
-    if not api_key:
+    if not os.environ.get("ANTHROPIC_API_KEY"):
         print("\n[错误] 请设置 ANTHROPIC_API_KEY 环境变量")
         return
 
-    # 检查 Skill 文件是否存在
-    skill_path = PROJECT_ROOT / ".claude" / "skills" / "daily-tech-digest" / "SKILL.md"
-    if not skill_path.exists():
-        print(f"\n[错误] Skill 文件不存在: {skill_path}")
+    # 本地校验 Skill（解析 frontmatter），不额外发起一轮 Agent 查询
+    start = time.perf_counter()
+    if not check_skill_setup():
         return
+    print(f"  本地校验耗时: {(time.perf_counter() - start) * 1000:.0f}ms")
 
     print(f"\n[配置]")
     print(f"  项目目录: {PROJECT_ROOT}")
-    print(f"  Skill 路径: {skill_path}")
+    print(f"  Skill 路径: {SKILLS_DIR / SKILL_NAME / 'SKILL.md'}")
 
     # 检查是否使用智谱 BigModel 兼容 API
     base_url = os.environ.get("ANTHROPIC_BASE_URL", "")
@@ -54,11 +178,7 @@ async def run_with_skill():
     # - setting_sources: 从项目目录加载 Skills
     # - allowed_tools: 启用 Skill 工具和其他必要工具
     # - env: 传递环境变量（包括可能的 ANTHROPIC_BASE_URL）
-    env_vars = {
-        "ANTHROPIC_API_KEY": api_key,
-    }
-    if base_url:
-        env_vars["ANTHROPIC_BASE_URL"] = base_url
+    env_vars = api_env()
 
     options = ClaudeAgentOptions(
         cwd=str(PROJECT_ROOT),
@@ -68,25 +188,7 @@ async def run_with_skill():
         permission_mode="bypassPermissions",  # 自动批准工具使用
     )
 
-    print(f"\n[1/2] 查询可用的 Skills...")
-
-    # 先列出可用的 Skills
-    try:
-        async for message in query(
-            prompt="What Skills are available? Please list them briefly.",
-            options=options
-        ):
-            if hasattr(message, 'content'):
-                for block in message.content:
-                    if hasattr(block, 'text'):
-                        print(f"  {block.text}")
-            elif isinstance(message, str):
-                print(f"  {message}")
-    except Exception as e:
-        print(f"  [错误] {e}")
-        return
-
-    print(f"\n[2/2] 使用 Skill 生成科技简报...")
+    print(f"\n使用 Skill 生成科技简报...")
 
     # 使用 Skill 生成简报
     prompt = """请使用 daily-tech-digest Skill 生成今日科技简报。
@@ -99,33 +201,69 @@ async def run_with_skill():
 
 请开始执行。"""
 
+    session_start = time.perf_counter()
+    first_message = None
     try:
         async for message in query(
             prompt=prompt,
             options=options
         ):
-            if hasattr(message, 'content'):
-                for block in message.content:
-                    if hasattr(block, 'text'):
-                        print(block.text)
-            elif hasattr(message, 'type'):
-                if message.type == 'text':
-                    print(message.text if hasattr(message, 'text') else str(message))
-                elif message.type == 'tool_use':
-                    print(f"[工具调用] {message.name if hasattr(message, 'name') else 'unknown'}")
-            elif isinstance(message, str):
-                print(message)
+            if first_message is None:
+                first_message = time.perf_counter() - session_start
+            print_message(message, session_start)
     except Exception as e:
         print(f"[错误] {e}")
 
+    print("\n[耗时]")
+    if first_message is not None:
+        print(f"  首条消息: {first_message:.1f}s")
+    print(f"  会话: {time.perf_counter() - session_start:.1f}s")
+    print(f"  总计: {time.perf_counter() - start:.1f}s")
+
     print("\n" + "=" * 60)
     print("完成!")
     print("=" * 60)
 
 
+async def run_with_tools(direct: bool = False):
+    """Agent 调用进程内工具执行流水线（direct 时不经过 Agent）"""
+    from digest import DigestContext
+    from digest_tools import DigestTools, run_hybrid
+
+    print("=" * 60)
+    print(f"Claude Agent SDK - {'直接执行' if direct else '进程内工具'}方式生成科技简报")
+    print("=" * 60)
+
+    if not direct and not os.environ.get("ANTHROPIC_API_KEY"):
+        print("\n[错误] 请设置 ANTHROPIC_API_KEY 环境变量")
+        return
+
+    start = time.perf_counter()
+    ctx = DigestContext()
+    try:
+        if direct:
+            results = await asyncio.to_thread(DigestTools(ctx).run_direct)
+        else:
+            results = await run_hybrid(ctx, env=api_env())
+    finally:
+        ctx.close()
+
+    print("\n[结果]")
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    print(f"\n完成，耗时 {time.perf_counter() - start:.1f}s")
+
+
 async def main():
     """主函数"""
-    await run_with_skill()
+    parser = argparse.ArgumentParser(description="通过 Claude Agent SDK 生成简报")
+    parser.add_argument("--mode", choices=["skill", "hybrid", "direct"], default="skill",
+                        help="skill: Agent 调用 Skill；hybrid: Agent 调用进程内工具；direct: 直接执行流水线")
+    args = parser.parse_args()
+
+    if args.mode == "skill":
+        await run_with_skill()
+    else:
+        await run_with_tools(direct=(args.mode == "direct"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+原始数据快照存储
+每次运行将抓取到的条目按天追加写入紧凑的 JSONL 文件，
+供重新生成、趋势分析和离线基准测试在无网络情况下读取
+"""
+
+import json
+import mmap
+from datetime import datetime
+from pathlib import Path
+
+from models import Item
+
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).parent.parent
+
+SCHEMA_VERSION = 1
+
+# 列顺序即存储顺序，每行只保存值数组，首行为表头
+COLUMNS = [
+    "kind", "source", "title", "url", "category", "node",
+    "replies", "score", "comments", "created", "summary", "fetched_at",
+]
+
+
+def snapshot_path(config: dict, date: str) -> Path:
+    """某天快照文件路径"""
+    return PROJECT_ROOT / config["output"]["snapshots_dir"] / f"{date}.jsonl"
+
+
+def save_snapshot(config: dict, date: str, items: list[Item]) -> int:
+    """
+    追加保存当次抓取的条目
+
+    Args:
+        config: 全局配置
+        date: 日期字符串
+        items: 所有数据源的条目
+
+    Returns:
+        写入条数
+    """
+    path = snapshot_path(config, date)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fetched_at = datetime.now().isoformat(timespec="seconds")
+
+    lines = []
+    if not path.exists() or path.stat().st_size == 0:
+        columns = COLUMNS
+        lines.append(json.dumps({"schema": SCHEMA_VERSION, "columns": columns}))
+    else:
+        # 追加时沿用文件表头的列顺序
+        with open(path, "r", encoding="utf-8") as f:
+            columns = json.loads(f.readline())["columns"]
+
+    for item in items:
+        row = [fetched_at if col == "fetched_at" else getattr(item, col, None) for col in columns]
+        lines.append(json.dumps(row, ensure_ascii=False, separators=(",", ":")))
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+    return len(items)
+
+
+def iter_snapshot_rows(path: Path):
+    """
+    以内存映射方式逐行读取快照，产出 {列名: 值} 字典
+
+    按表头中的列名解码，旧版本写入的文件同样可读。
+    """
+    if not path.exists() or path.stat().st_size == 0:
+        return
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header = json.loads(mm.readline())
+        columns = header["columns"]
+        for line in iter(mm.readline, b""):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                values = json.loads(line)
+            except json.JSONDecodeError:
+                # 写入中断产生的残行
+                continue
+            yield dict(zip(columns, values))
+
+
+def load_snapshot(config: dict, date: str) -> list[Item] | None:
+    """
+    读取某天快照，还原为条目列表
+
+    同一天多次运行的重复条目按 URL 去重，保留最后一次抓取的数据。
+
+    Returns:
+        条目列表，快照不存在时返回 None
+    """
+    path = snapshot_path(config, date)
+    if not path.exists():
+        return None
+
+    latest = {}
+    for row in iter_snapshot_rows(path):
+        if not row.get("kind"):
+            continue
+        item = Item.from_dict(row)
+        key = (item.kind, item.url or item.title)
+        # 先删除再插入，使顺序跟随最后一次出现的位置
+        latest.pop(key, None)
+        latest[key] = item
+
+    return list(latest.values())
+
+
+def list_snapshot_dates(config: dict) -> list[str]:
+    """列出已有快照的日期"""
+    snapshots_dir = PROJECT_ROOT / config["output"]["snapshots_dir"]
+    return sorted(p.stem for p in snapshots_dir.glob("*.jsonl"))
@@ -0,0 +1,706 @@
+#!/usr/bin/env python3
+"""
+数据源插件
+所有数据源以插件形式注册，由 config.json 的 "sources" 启用，
+在同一个调度器中并发运行，各自声明并发度、限速和缓存策略
+"""
+
+import calendar
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from dataclasses import replace
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo
+
+from atomic_io import atomic_write
+from html_clean import clean_texts
+from models import Item
+
+# requests / feedparser / bs4 在用到时再导入，只生成页面或发通知的进程不必加载
+if TYPE_CHECKING:
+    import requests
+
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).parent.parent
+SOURCE_CACHE_DIR = PROJECT_ROOT / ".cache" / "sources"
+HTTP_CACHE_DIR = SOURCE_CACHE_DIR / "http"
+
+USER_AGENT = "TechDigest/1.0"
+
+SHANGHAI = ZoneInfo("Asia/Shanghai")
+
+SOURCE_REGISTRY: dict[str, type["SourcePlugin"]] = {}
+
+
+def register_source(name: str):
+    """注册数据源插件的装饰器"""
+    def decorator(cls):
+        cls.name = name
+        SOURCE_REGISTRY[name] = cls
+        return cls
+    return decorator
+
+
+class Throttle:
+    """单个数据源的并发与限速控制"""
+
+    def __init__(self, concurrency: int, min_interval: float):
+        self.concurrency = concurrency
+        self.semaphore = threading.Semaphore(concurrency)
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_allowed = 0.0
+
+    def __enter__(self):
+        self.semaphore.acquire()
+        if self.min_interval > 0:
+            with self.lock:
+                now = time.monotonic()
+                wait = self.next_allowed - now
+                self.next_allowed = max(now, self.next_allowed) + self.min_interval
+            if wait > 0:
+                time.sleep(wait)
+        return self
+
+    def __exit__(self, *exc):
+        self.semaphore.release()
+
+
+class Scheduler:
+    """
+    共享调度器
+
+    每个插件的 fetch 在独立线程中运行，插件内部的子请求统一提交到共享 I/O 线程池，
+    并共用一个带连接池的 requests.Session。
+    """
+
+    def __init__(self, max_workers: int):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.io_pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+
+    def close(self):
+        self.io_pool.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+def response_encoding(resp: "requests.Response", content: bytes) -> str:
+    """
+    响应正文的编码：Content-Type 声明了 charset 时使用声明，否则按内容探测
+
+    探测与 requests 的 apparent_encoding 相同，但只作用于已读取的 content（流式读取时不会再读完整个响应）。
+    """
+    if "charset" in resp.headers.get("Content-Type", "") and resp.encoding:
+        return resp.encoding
+    from requests.compat import chardet
+    return chardet.detect(content).get("encoding") or "utf-8"
+
+
+class SourcePlugin:
+    """
+    数据源插件基类
+
+    子类实现 fetch()，通过 self.get()/self.post() 发请求、self.map() 并发执行子任务。
+    concurrency / min_interval / cache_ttl 为默认策略，可在 config["sources"][name] 中覆盖。
+    """
+
+    name = ""
+    kind = ""
+    section = ""            # 提示词中的板块标题
+    concurrency = 4         # 同时进行的请求数
+    min_interval = 0.0      # 相邻请求的最小间隔（秒）
+    cache_ttl = 0           # 结果缓存时间（秒），0 表示不缓存
+
+    def __init__(self, config: dict, options: dict, scheduler: Scheduler):
+        self.config = config
+        self.options = options
+        self.scheduler = scheduler
+        self.cache_ttl = options.get("cache_ttl", self.cache_ttl)
+        self.throttle = Throttle(
+            options.get("concurrency", self.concurrency),
+            options.get("min_interval", self.min_interval),
+        )
+
+    def fetch(self) -> list[Item]:
+        raise NotImplementedError
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        """受限速控制的 GET 请求"""
+        kwargs.setdefault("timeout", 15)
+        with self.throttle:
+            resp = self.scheduler.session.get(url, **kwargs)
+        resp.raise_for_status()
+        return resp
+
+    def get_validated(self, url: str, **kwargs) -> bytes:
+        """
+        条件 GET：带上次响应的 ETag / Last-Modified 请求，服务端返回 304 时使用缓存的内容
+
+        config["sources"]["conditional_get"] 关闭时等同于 self.get(url).content。
+        """
+        if not self.config["sources"].get("conditional_get"):
+            return self.get(url, **kwargs).content
+
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        meta_path, body_path = HTTP_CACHE_DIR / f"{key}.json", HTTP_CACHE_DIR / f"{key}.body"
+        meta = {}
+        if meta_path.exists() and body_path.exists():
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        resp = self.get(url, headers=headers, **kwargs)
+        if resp.status_code == 304 and meta:
+            return body_path.read_bytes()
+
+        etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            atomic_write(body_path, resp.content)
+            atomic_write(meta_path, json.dumps({"url": url, "etag": etag, "last_modified": last_modified}))
+        return resp.content
+
+    def post(self, url: str, **kwargs) -> "requests.Response":
+        """受限速控制的 POST 请求"""
+        kwargs.setdefault("timeout", 15)
+        with self.throttle:
+            resp = self.scheduler.session.post(url, **kwargs)
+        resp.raise_for_status()
+        return resp
+
+    def map(self, fn, args: list) -> list:
+        """
+        在共享 I/O 线程池中并发执行子任务，按完成顺序返回成功结果
+
+        在途子任务不超过本插件的并发数，完成一个再提交下一个，
+        避免一次提交几百个任务占满共享线程池，让其他插件的请求排在后面。
+        """
+        pending = iter(args)
+        running = {self.scheduler.io_pool.submit(fn, arg) for arg in islice(pending, self.throttle.concurrency)}
+        results = []
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"[警告] {self.name} 子任务失败: {e}")
+                for arg in islice(pending, 1):
+                    running.add(self.scheduler.io_pool.submit(fn, arg))
+        return results
+
+    def load_cached(self) -> list[Item] | None:
+        """读取未过期的缓存结果"""
+        if self.cache_ttl <= 0:
+            return None
+        path = SOURCE_CACHE_DIR / f"{self.name}.json"
+        if not path.exists() or time.time() - path.stat().st_mtime > self.cache_ttl:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return [Item.from_dict(data) for data in json.load(f)]
+
+    def save_cached(self, items: list[Item]):
+        if self.cache_ttl <= 0:
+            return
+        SOURCE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(SOURCE_CACHE_DIR / f"{self.name}.json", "w", encoding="utf-8") as f:
+            json.dump([item.to_dict() for item in items], f, ensure_ascii=False)
+
+
+@register_source("v2ex")
+class V2EXSource(SourcePlugin):
+    """V2EX 热门话题"""
+
+    kind = "v2ex"
+    section = "V2EX 热门话题"
+    concurrency = 1
+
+    def fetch(self) -> list[Item]:
+        v2ex_config = self.config["v2ex"]
+        topics = json.loads(self.get_validated(v2ex_config["hot_url"]))
+
+        result = []
+        for topic in topics[:v2ex_config["max_topics"]]:
+            result.append(Item(
+                kind="v2ex",
+                source="V2EX",
+                title=topic.get("title", ""),
+                url=f"https://www.v2ex.com/t/{topic.get('id', '')}",
+                node=topic.get("node", {}).get("title", ""),
+                replies=topic.get("replies", 0),
+                created=topic.get("created"),
+            ))
+        return result
+
+
+@register_source("hackernews")
+class HackerNewsSource(SourcePlugin):
+    """
+    Hacker News 热门
+
+    先取 topstories 的 id 列表，再用批量接口（Algolia 搜索，按 story_<id> 标签）
+    一次取回一批故事的元数据；批量接口不可用或漏掉的条目回退到 Firebase 逐条请求。
+    config["hackernews"]["backend"]: "auto" / "bulk" / "firebase"
+
+    config["hackernews"]["item_cache_ttl"] 秒内取过的故事直接使用缓存的元数据，
+    同一天多次运行（如每小时增量更新）只为新上榜的故事发请求。
+    """
+
+    kind = "hn"
+    section = "Hacker News 热门"
+    concurrency = 8
+
+    def fetch(self) -> list[Item]:
+        hn_config = self.config["hackernews"]
+        backend = hn_config.get("backend", "auto")
+        story_ids = json.loads(self.get_validated(hn_config["top_url"]))[:hn_config["max_items"]]
+
+        item_cache = self.load_item_cache()
+        stories = {story_id: item_cache[story_id]["story"] for story_id in story_ids if story_id in item_cache}
+        to_fetch = [story_id for story_id in story_ids if story_id not in stories]
+        if stories:
+            print(f"      hackernews: {len(stories)} 条使用缓存，{len(to_fetch)} 条需要请求")
+
+        fetched = {}
+        if to_fetch and backend in ("auto", "bulk") and hn_config.get("bulk_url"):
+            try:
+                fetched = self.fetch_bulk(to_fetch)
+            except Exception as e:
+                if backend == "bulk":
+                    raise
+                print(f"[警告] HN 批量接口不可用（{type(e).__name__}），回退到逐条请求")
+
+        missing = [story_id for story_id in to_fetch if story_id not in fetched]
+        if missing and backend != "bulk":
+            for item in self.map(self.fetch_item, missing):
+                if item and item.get("title"):
+                    fetched[item["id"]] = item
+        if missing and len(missing) < len(to_fetch):
+            print(f"      hackernews: 批量接口缺失 {len(missing)} 条，已逐条补齐")
+        stories.update(fetched)
+        self.save_item_cache(item_cache, fetched)
+
+        result = []
+        for story in stories.values():
+            result.append(Item(
+                kind="hn",
+                source="Hacker News",
+                title=story.get("title", ""),
+                url=story.get("url") or f"https://news.ycombinator.com/item?id={story.get('id')}",
+                score=story.get("score") or 0,
+                comments=story.get("descendants") or 0,
+                created=story.get("time"),
+            ))
+
+        # 按分数排序
+        result.sort(key=lambda x: x.score, reverse=True)
+        return result
+
+    def load_item_cache(self) -> dict[int, dict]:
+        """未过期的故事缓存：id -> {"fetched_at", "story"}"""
+        ttl = self.config["hackernews"].get("item_cache_ttl", 0)
+        path = SOURCE_CACHE_DIR / "hn_items.json"
+        if ttl <= 0 or not path.exists():
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        now = time.time()
+        return {int(k): v for k, v in entries.items() if now - v["fetched_at"] <= ttl}
+
+    def save_item_cache(self, cache: dict[int, dict], fetched: dict[int, dict]):
+        """写回本次新取的故事，过期条目在 load_item_cache 时已丢弃"""
+        if self.config["hackernews"].get("item_cache_ttl", 0) <= 0 or not fetched:
+            return
+        now = time.time()
+        cache.update({story_id: {"fetched_at": now, "story": story} for story_id, story in fetched.items()})
+        atomic_write(SOURCE_CACHE_DIR / "hn_items.json", json.dumps({str(k): v for k, v in cache.items()}))
+
+    def fetch_item(self, story_id: int) -> dict:
+        """Firebase 单条故事"""
+        return self.get(self.config["hackernews"]["item_url"].format(story_id), timeout=10).json()
+
+    def fetch_bulk(self, story_ids: list[int]) -> dict[int, dict]:
+        """
+        批量接口按 bulk_batch_size 分批并发查询
+
+        Returns:
+            id -> Firebase 格式的故事字典
+        """
+        hn_config = self.config["hackernews"]
+        batch_size = hn_config.get("bulk_batch_size", 100)
+        batches = [story_ids[i:i + batch_size] for i in range(0, len(story_ids), batch_size)]
+
+        def fetch_batch(batch):
+            tags = ",".join(f"story_{story_id}" for story_id in batch)
+            url = hn_config["bulk_url"].format(tags=tags, limit=len(batch))
+            return self.get(url).json()["hits"]
+
+        # 任一批失败都视为批量接口不可用，交由调用方回退
+        futures = [self.scheduler.io_pool.submit(fetch_batch, batch) for batch in batches]
+        stories = {}
+        for future in futures:
+            for hit in future.result():
+                story_id = int(hit.get("story_id") or hit["objectID"])
+                stories[story_id] = {
+                    "id": story_id,
+                    "title": hit.get("title"),
+                    "url": hit.get("url"),
+                    "score": hit.get("points"),
+                    "descendants": hit.get("num_comments"),
+                    "time": hit.get("created_at_i"),
+                }
+        return stories
+
+
+@register_source("rss")
+class RSSSource(SourcePlugin):
+    """
+    RSS 源（config["rss_feeds"] 中的每个源并发抓取）
+
+    每个源记录上次读到的最新发布时间（高水位），按时间倒序读取条目时
+    遇到不晚于高水位的条目即停止。同一天重复运行时使用当天首次运行前的高水位，
+    保证重跑能拿到同样的条目。
+
+    抓取时新的高水位只暂存在 new_marks 中（由 fetch_all_sources 交给调用方），
+    当天简报保存成功后才由 commit_rss_marks 写入 rss_marks.json；
+    生成失败、回填或重新生成历史日期时不推进高水位，下次运行仍能读到这些条目。
+    """
+
+    kind = "rss"
+    concurrency = 6
+
+    def __init__(self, config: dict, options: dict, scheduler: Scheduler):
+        super().__init__(config, options, scheduler)
+        # 源名称 -> {"date", "base", "mark"}，使用缓存结果时为空
+        self.new_marks: dict[str, dict] = {}
+
+    def fetch(self) -> list[Item]:
+        import feedparser
+
+        today = datetime.now(SHANGHAI).strftime(self.config["output"]["date_format"])
+        marks = load_marks()
+        new_marks = self.new_marks
+
+        def fetch_single_feed(name_info):
+            name, feed_info = name_info
+            try:
+                feed = feedparser.parse(self.get_validated(feed_info["url"]))
+            except Exception as e:
+                print(f"[警告] RSS {name} 抓取失败: {e}")
+                return []
+
+            mark = marks.get(name, {})
+            base = mark.get("base") if mark.get("date") == today else mark.get("mark")
+            newest = base
+
+            items = []
+            for entry in feed.entries[:10]:
+                created = parse_published(entry)
+                if created is not None:
+                    if base is not None and created <= base:
+                        break
+                    newest = max(newest or created, created)
+                items.append(Item(
+                    kind="rss",
+                    source=feed_info["name"],
+                    title=entry.get("title", ""),
+                    url=entry.get("link", ""),
+                    category=feed_info["category"],
+                    created=created,
+                    summary=entry.get("summary", ""),
+                ))
+            new_marks[name] = {"date": today, "base": base, "mark": newest}
+            return items
+
+        result = []
+        for items in self.map(fetch_single_feed, list(self.config["rss_feeds"].items())):
+            result.extend(items)
+
+        # 摘要中的 HTML 统一交给进程池清洗，不占用抓取线程
+        summaries = clean_texts("summary", [item.summary for item in result], 200, self.config)
+        return [replace(item, summary=summary) for item, summary in zip(result, summaries)]
+
+
+def _marks_path() -> Path:
+    return SOURCE_CACHE_DIR / "rss_marks.json"
+
+
+def load_marks() -> dict:
+    """读取已提交的 RSS 高水位"""
+    path = _marks_path()
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def commit_rss_marks(marks: dict):
+    """
+    提交本次抓取暂存的 RSS 高水位（fetch_all_sources 的 marks）
+
+    只应在当天简报保存成功后调用。
+    """
+    if not marks:
+        return
+    atomic_write(_marks_path(), json.dumps({**load_marks(), **marks}, ensure_ascii=False, indent=2))
+
+
+@register_source("lobsters")
+class LobstersSource(SourcePlugin):
+    """Lobsters 热门"""
+
+    kind = "lobsters"
+    section = "Lobsters 热门"
+    concurrency = 1
+
+    def fetch(self) -> list[Item]:
+        stories = self.get(self.options["url"]).json()
+        result = []
+        for story in stories[:self.options.get("max_items", 20)]:
+            created = story.get("created_at")
+            result.append(Item(
+                kind="lobsters",
+                source="Lobsters",
+                title=story.get("title", ""),
+                url=story.get("url") or story.get("short_id_url", ""),
+                score=story.get("score", 0),
+                comments=story.get("comment_count", 0),
+                created=datetime.fromisoformat(created).timestamp() if created else None,
+            ))
+        return result
+
+
+@register_source("reddit")
+class RedditSource(SourcePlugin):
+    """Reddit 子版块热门（每个子版块一个请求）"""
+
+    kind = "reddit"
+    section = "Reddit 热门"
+    concurrency = 2
+    min_interval = 1.0
+
+    def fetch(self) -> list[Item]:
+        limit = self.options.get("max_items", 15)
+
+        def fetch_subreddit(subreddit):
+            url = self.options["url"].format(subreddit=subreddit, limit=limit)
+            children = self.get(url).json()["data"]["children"]
+            items = []
+            for child in children:
+                post = child["data"]
+                if post.get("stickied"):
+                    continue
+                items.append(Item(
+                    kind="reddit",
+                    source=f"r/{subreddit}",
+                    title=post.get("title", ""),
+                    url=post.get("url") or f"https://www.reddit.com{post.get('permalink', '')}",
+                    score=post.get("score", 0),
+                    comments=post.get("num_comments", 0),
+                    created=post.get("created_utc"),
+                ))
+            return items
+
+        result = []
+        for items in self.map(fetch_subreddit, self.options.get("subreddits", [])):
+            result.extend(items)
+        return result
+
+
+@register_source("github_trending")
+class GitHubTrendingSource(SourcePlugin):
+    """GitHub Trending（解析页面 HTML）"""
+
+    kind = "github"
+    section = "GitHub Trending"
+    concurrency = 1
+
+    def fetch(self) -> list[Item]:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(self.get(self.options["url"]).text, "html.parser")
+        result = []
+        for row in soup.select("article.Box-row")[:self.options.get("max_items", 15)]:
+            link = row.select_one("h2 a")
+            if not link:
+                continue
+            repo = "".join(link.get_text().split())
+            description = row.select_one("p")
+            stars_today = row.find(string=lambda s: s and "stars today" in s)
+            result.append(Item(
+                kind="github",
+                source="GitHub",
+                title=repo,
+                url=f"https://github.com{link.get('href', '')}",
+                score=_parse_int(stars_today),
+                summary=description.get_text().strip()[:200] if description else "",
+            ))
+        return result
+
+
+@register_source("juejin")
+class JuejinSource(SourcePlugin):
+    """掘金推荐文章"""
+
+    kind = "juejin"
+    section = "掘金热门"
+    concurrency = 1
+
+    def fetch(self) -> list[Item]:
+        payload = {
+            "id_type": 2,
+            "sort_type": 200,
+            "cursor": "0",
+            "limit": self.options.get("max_items", 20),
+        }
+        data = self.post(self.options["url"], json=payload).json().get("data") or []
+        result = []
+        for entry in data:
+            article = (entry.get("item_info") or entry).get("article_info")
+            if not article:
+                continue
+            ctime = article.get("ctime")
+            result.append(Item(
+                kind="juejin",
+                source="掘金",
+                title=article.get("title", ""),
+                url=f"https://juejin.cn/post/{article.get('article_id', '')}",
+                score=article.get("digg_count", 0),
+                comments=article.get("comment_count", 0),
+                created=float(ctime) if ctime else None,
+                summary=article.get("brief_content", "")[:200],
+            ))
+        return result
+
+
+def time_to_timestamp(parsed) -> float | None:
+    """feedparser 的 UTC struct_time 转为 Unix 时间戳"""
+    if not parsed:
+        return None
+    return float(calendar.timegm(parsed))
+
+
+def parse_published(entry) -> float | None:
+    """
+    解析 RSS/Atom 条目的发布时间为 Unix 时间戳
+
+    优先使用 feedparser 解析好的 UTC 时间，否则按 RFC 822 / ISO 8601 解析原始字符串，
+    不带时区的时间视为北京时间。
+    """
+    for key in ("published_parsed", "updated_parsed"):
+        if entry.get(key):
+            return time_to_timestamp(entry[key])
+
+    raw = (entry.get("published") or entry.get("updated") or "").strip()
+    if not raw:
+        return None
+    try:
+        parsed = parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=SHANGHAI)
+    return parsed.timestamp()
+
+
+def _parse_int(text) -> int:
+    digits = "".join(ch for ch in (text or "") if ch.isdigit())
+    return int(digits) if digits else 0
+
+
+def section_for(item: Item) -> str:
+    """条目在提示词中所属的板块标题"""
+    if item.kind == "rss":
+        return item.category or "其他"
+    for cls in SOURCE_REGISTRY.values():
+        if cls.kind == item.kind and cls.section:
+            return cls.section
+    return f"{item.source} 热门"
+
+
+def enabled_sources(config: dict) -> list[str]:
+    """config["sources"] 中启用的数据源名称"""
+    return [
+        name for name, options in config["sources"].items()
+        if isinstance(options, dict) and options.get("enabled")
+    ]
+
+
+def fetch_all_sources(config: dict, names: list[str] = None, scheduler: Scheduler = None,
+                      marks: dict = None) -> dict[str, list[Item]]:
+    """
+    并发运行所有启用的数据源
+
+    Args:
+        config: 全局配置
+        names: 指定运行的数据源，默认使用 config["sources"] 中启用的
+        scheduler: 共享调度器（由调用方关闭），默认临时创建一个
+        marks: 传入时收集 RSS 源暂存的新高水位，由调用方在当天简报保存后交给 commit_rss_marks
+
+    Returns:
+        数据源名称 -> 条目列表，失败的数据源返回空列表
+    """
+    names = names or enabled_sources(config)
+    owned = scheduler is None
+    if owned:
+        scheduler = Scheduler(config["sources"]["max_workers"])
+    plugins = []
+    for name in names:
+        if name not in SOURCE_REGISTRY:
+            print(f"[警告] 未知数据源: {name}")
+            continue
+        options = config["sources"].get(name, {})
+        plugins.append(SOURCE_REGISTRY[name](config, options, scheduler))
+
+    def run(plugin: SourcePlugin) -> tuple[list[Item], float, bool]:
+        start = time.perf_counter()
+        cached = plugin.load_cached()
+        if cached is not None:
+            return cached, time.perf_counter() - start, True
+        items = plugin.fetch()
+        plugin.save_cached(items)
+        return items, time.perf_counter() - start, False
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(len(plugins), 1)) as executor:
+            futures = {executor.submit(run, plugin): plugin for plugin in plugins}
+            for future in as_completed(futures):
+                plugin = futures[future]
+                try:
+                    items, elapsed, cached = future.result()
+                    results[plugin.name] = items
+                    note = "缓存" if cached else f"{elapsed:.1f}s"
+                    print(f"      {plugin.name}: {len(items)} 条 ({note})")
+                except Exception as e:
+                    print(f"[警告] {plugin.name} 抓取失败: {e}")
+                    results[plugin.name] = []
+    finally:
+        if owned:
+            scheduler.close()
+
+    if marks is not None:
+        for plugin in plugins:
+            if isinstance(plugin, RSSSource):
+                marks.update(plugin.new_marks)
+    return results
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+本地桩服务
+模拟外部数据源接口和 Anthropic 兼容的 LLM 接口，用于离线测试与压测抓取、生成流程
+
+用法:
+    python scripts/stub_servers.py --port 8765 --stories 500 --latency 0.05
+    python scripts/stub_servers.py --llm-latency 2 --llm-token-delay 0.01 --llm-429-rate 0.2
+
+启动后用 point_config_at(config, "http://127.0.0.1:8765") 将数据源指向桩服务，
+并设置 ANTHROPIC_BASE_URL=http://127.0.0.1:8765/llm 让 LLM 调用走模拟接口。
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+from digest_schema import SECTION_NAMES, render_markdown
+
+
+# 桩数据的基准时间，保证每次启动生成的数据一致
+BASE_TIME = 1772400000
+
+STORY_TAG = re.compile(r"story_(\d+)")
+PROMPT_LINK = re.compile(r"\[([^\[\]]+)\]\((https?://[^)\s]+)\)")
+PROMPT_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def make_stories(count: int, seed: int = 42) -> dict[int, dict]:
+    """生成 Firebase 格式的 HN 故事，按 id 索引"""
+    rng = random.Random(seed)
+    stories = {}
+    for rank in range(count):
+        story_id = 40000000 + rank * 7
+        stories[story_id] = {
+            "id": story_id,
+            "type": "story",
+            "by": f"user{rng.randrange(1000)}",
+            "title": f"HN story {rank}: {rng.choice(['Rust', 'Postgres', 'LLM', 'WebAssembly', 'Linux'])} "
+                     f"{rng.choice(['internals', 'in production', 'benchmarks', 'release notes'])}",
+            "url": f"https://example.com/hn/{story_id}",
+            "score": rng.randrange(10, 2000),
+            "descendants": rng.randrange(0, 800),
+            "time": BASE_TIME - rng.randrange(0, 48 * 3600),
+        }
+    return stories
+
+
+def to_algolia_hit(story: dict) -> dict:
+    """Firebase 格式转为 Algolia 搜索结果格式"""
+    return {
+        "objectID": str(story["id"]),
+        "story_id": story["id"],
+        "title": story["title"],
+        "url": story["url"],
+        "author": story["by"],
+        "points": story["score"],
+        "num_comments": story["descendants"],
+        "created_at_i": story["time"],
+    }
+
+
+def hour_start() -> int:
+    """当前整点的时间戳：V2EX / RSS 桩数据按小时变化，同一小时内内容不变（条件请求返回 304）"""
+    return int(time.time()) // 3600 * 3600
+
+
+def make_topics(count: int, seed: int = 42) -> list[dict]:
+    """生成 V2EX 热帖接口格式的话题"""
+    rng = random.Random(seed)
+    now = hour_start()
+    return [{
+        "id": 1000000 + i,
+        "title": f"V2EX 话题 {i}: {rng.choice(['求推荐', '讨论', '分享'])}"
+                 f"{rng.choice(['机械键盘', '独立开发', '远程工作', 'NAS 方案'])}",
+        "node": {"title": rng.choice(["分享创造", "程序员", "问与答", "酷工作"])},
+        "replies": rng.randrange(0, 300),
+        "created": now - rng.randrange(0, 24 * 3600),
+    } for i in range(count)]
+
+
+def make_feed(name: str, count: int) -> str:
+    """生成 RSS 2.0 订阅源，条目每半小时一条"""
+    now = hour_start()
+    items = "".join(
+        f"<item><title>{escape(name)} 文章 {i}</title>"
+        f"<link>https://example.com/rss/{name}/{now - i * 1800}</link>"
+        f"<description>&lt;p&gt;{escape(name)} 的第 {i} 篇文章摘要，讨论工具链与工程实践。&lt;/p&gt;</description>"
+        f"<pubDate>{formatdate(now - i * 1800, usegmt=True)}</pubDate></item>"
+        for i in range(count)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{escape(name)}</title><link>https://example.com/rss/{name}</link>{items}</channel></rss>"
+    )
+
+
+def mock_digest(prompt: str) -> dict:
+    """按提示词中的原始链接拼出一份结构化简报，链接依次分配到各板块"""
+    date = PROMPT_DATE.search(prompt)
+    links = list(dict.fromkeys(PROMPT_LINK.findall(prompt)))[:16]
+    if not links:
+        links = [("示例条目", "https://example.com/")]
+    per_section = max(len(links) // len(SECTION_NAMES), 1)
+    sections = []
+    for i, name in enumerate(SECTION_NAMES):
+        chunk = links[i * per_section:(i + 1) * per_section]
+        if chunk:
+            sections.append({"name": name, "items": [
+                {"title": title, "summary": "模拟摘要：说明这条内容为什么值得关注。",
+                 "links": [{"title": title, "url": url}]}
+                for title, url in chunk
+            ]})
+    return {
+        "date": date.group(0) if date else time.strftime("%Y-%m-%d"),
+        "title": f"{date.group(0) if date else time.strftime('%Y-%m-%d')} 科技简报",
+        "intro": f"模拟简报，收录 {len(links)} 条内容。",
+        "sections": sections,
+    }
+
+
+def mock_tool_input(name: str, prompt: str) -> dict:
+    """强制工具调用时的参数：简报工具返回拼好的简报，其他工具返回空对象"""
+    if name == "record_digest":
+        digest = mock_digest(prompt)
+        return {key: digest[key] for key in ("title", "intro", "sections")}
+    if name == "record_digest_update":
+        return {"intro": "", "sections": mock_digest(prompt)["sections"][:1]}
+    return {}
+
+
+def mock_message(payload: dict, message_id: str) -> dict:
+    """Anthropic Messages API 格式的模拟响应（非流式）"""
+    prompt = "".join(
+        message["content"] if isinstance(message["content"], str)
+        else "".join(block.get("text", "") for block in message["content"])
+        for message in payload.get("messages", [])
+    )
+    tool_choice = payload.get("tool_choice") or {}
+    if tool_choice.get("type") == "tool":
+        content = [{"type": "tool_use", "id": f"toolu_{message_id}", "name": tool_choice["name"],
+                    "input": mock_tool_input(tool_choice["name"], prompt)}]
+        stop_reason, output = "tool_use", json.dumps(content[0]["input"], ensure_ascii=False)
+    else:
+        output = render_markdown(mock_digest(prompt))
+        content, stop_reason = [{"type": "text", "text": output}], "end_turn"
+    return {
+        "id": f"msg_{message_id}",
+        "type": "message",
+        "role": "assistant",
+        "model": payload.get("model", "stub"),
+        "content": content,
+        "stop_reason": stop_reason,
+        "stop_sequence": None,
+        # 粗略按字符数估算 token
+        "usage": {"input_tokens": len(prompt) // 2 + 1, "output_tokens": len(output) // 2 + 1},
+    }
+
+
+def make_article(article_id: str, paragraphs: int = 20) -> str:
+    """生成带噪声区块的文章 HTML"""
+    body = "".join(
+        f"<p>第 {i} 段：文章 {article_id} 讨论了数据库索引、缓存失效与服务延迟之间的权衡，"
+        f"并给出了生产环境中的测量数据。Measured p99 latency dropped by {i * 3}%.</p>"
+        for i in range(paragraphs)
+    )
+    return (
+        "<html><head><title>Article</title><script>var tracking = 1;</script>"
+        "<style>p { color: #333; }</style></head><body>"
+        "<nav><ul><li>首页</li><li>关于我们以及其他很长很长的导航链接文字</li></ul></nav>"
+        f"<article><h1>文章 {article_id}</h1>{body}</article>"
+        "<footer><p>版权所有 © 示例站点，保留所有权利，未经许可不得转载。</p></footer>"
+        "</body></html>"
+    )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    路由:
+        /hn/v0/topstories.json        Firebase 热门 id 列表（支持 ETag 条件请求）
+        /hn/v0/item/{id}.json         Firebase 单条故事
+        /hn/api/v1/search?tags=...    Algolia 批量查询，支持 story,(story_1,story_2) 形式
+        /v2ex/api/topics/hot.json     V2EX 热帖（支持 ETag 条件请求）
+        /rss/{name}.xml               RSS 订阅源（支持 ETag 条件请求）
+        /article/{id}                 带导航、脚本和正文段落的文章页
+        POST /llm/v1/messages         Anthropic 兼容的 Messages API，支持流式（SSE）、强制工具调用，
+                                      可注入延迟、5xx/529 错误和 429 限流
+        POST /dingtalk/robot/send     钉钉机器人，按 access_token 限制每分钟 20 条
+        POST /wecom/webhook/send      企业微信机器人
+        POST /feishu/hook/{token}     飞书机器人
+        POST /telegram/bot{token}/sendMessage
+
+    fetch_fail_rate 作用于数据源 GET 请求（返回 503），fail_rate 作用于推送接口（返回 502）。
+    各类请求的计数记录在 stats 中。
+    """
+
+    stories: dict[int, dict] = {}
+    topics: list[dict] = []
+    rss_items = 10
+    latency = 0.0
+    bulk_enabled = True
+    fail_rate = 0.0
+    fetch_fail_rate = 0.0
+    llm_latency = 0.0
+    llm_token_delay = 0.0
+    llm_error_rate = 0.0
+    llm_429_rate = 0.0
+    llm_retry_after = 1.0
+    received: list[dict] = []
+    robot_sends: dict[str, list[float]] = {}
+    stats: dict[str, int] = {}
+    stats_lock = threading.Lock()
+
+    def count(self, key: str) -> int:
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+            return self.stats[key]
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, data, status: int = 200):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_validated(self, body: bytes, content_type: str):
+        """带 ETag 的响应，If-None-Match 命中时返回 304"""
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        parsed = urlparse(self.path)
+        path = parsed.path
+        self.count("get")
+
+        if random.random() < self.fetch_fail_rate:
+            self.count("get_failed")
+            self.send_json({"message": "injected failure"}, status=503)
+            return
+
+        if path == "/hn/v0/topstories.json":
+            ranked = sorted(self.stories.values(), key=lambda s: s["id"])
+            self.send_validated(json.dumps([story["id"] for story in ranked]).encode("utf-8"),
+                                "application/json; charset=utf-8")
+        elif path.startswith("/hn/v0/item/"):
+            story = self.stories.get(int(path.rsplit("/", 1)[-1].split(".")[0]))
+            self.send_json(story)
+        elif path == "/hn/api/v1/search":
+            if not self.bulk_enabled:
+                self.send_json({"message": "bulk endpoint disabled"}, status=503)
+                return
+            query = parse_qs(parsed.query)
+            ids = [int(i) for i in STORY_TAG.findall(query.get("tags", [""])[0])]
+            limit = int(query.get("hitsPerPage", ["20"])[0])
+            hits = [to_algolia_hit(self.stories[i]) for i in ids if i in self.stories][:limit]
+            self.send_json({"hits": hits, "nbHits": len(hits), "hitsPerPage": limit})
+        elif path == "/v2ex/api/topics/hot.json":
+            self.send_validated(json.dumps(self.topics, ensure_ascii=False).encode("utf-8"),
+                                "application/json; charset=utf-8")
+        elif path.startswith("/rss/") and path.endswith(".xml"):
+            name = path[len("/rss/"):-len(".xml")]
+            self.send_validated(make_feed(name, self.rss_items).encode("utf-8"), "application/rss+xml; charset=utf-8")
+        elif path.startswith("/article/"):
+            body = make_article(path.rsplit("/", 1)[-1]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_json({"message": "not found"}, status=404)
+
+
+    def do_POST(self):
+        if self.latency:
+            time.sleep(self.latency)
+        parsed = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if parsed.path == "/llm/v1/messages":
+            self.handle_llm(payload)
+            return
+
+        if random.random() < self.fail_rate:
+            self.send_json({"message": "injected failure"}, status=502)
+            return
+
+        if parsed.path == "/dingtalk/robot/send":
+            token = parse_qs(parsed.query).get("access_token", [""])[0]
+            now = time.time()
+            recent = [t for t in self.robot_sends.get(token, []) if now - t < 60]
+            if len(recent) >= 20:
+                self.send_json({"errcode": 130101, "errmsg": "send too fast"})
+                return
+            self.robot_sends[token] = recent + [now]
+            self.received.append({"channel": "dingtalk", "token": token, "payload": payload})
+            self.send_json({"errcode": 0, "errmsg": "ok"})
+        elif parsed.path == "/wecom/webhook/send":
+            token = parse_qs(parsed.query).get("key", [""])[0]
+            self.received.append({"channel": "wecom", "token": token, "payload": payload})
+            self.send_json({"errcode": 0, "errmsg": "ok"})
+        elif parsed.path.startswith("/feishu/hook/"):
+            token = parsed.path.rsplit("/", 1)[-1]
+            self.received.append({"channel": "feishu", "token": token, "payload": payload})
+            self.send_json({"code": 0, "msg": "success", "data": {}})
+        elif parsed.path.startswith("/telegram/bot") and parsed.path.endswith("/sendMessage"):
+            token = parsed.path[len("/telegram/bot"):].split("/", 1)[0]
+            self.received.append({"channel": "telegram", "token": token, "payload": payload})
+            self.send_json({"ok": True, "result": {"message_id": len(self.received)}})
+        else:
+            self.send_json({"message": "not found"}, status=404)
+
+    def send_llm_error(self, status: int, error_type: str, headers: dict = None):
+        self.send_response(status)
+        body = json.dumps({"type": "error", "error": {"type": error_type, "message": "injected by stub"}}).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_llm(self, payload: dict):
+        """模拟 Messages API：先按比例注入 429 / 5xx，再在延迟后返回完整响应或 SSE 流"""
+        request_no = self.count("llm_requests")
+        roll = random.random()
+        if roll < self.llm_429_rate:
+            self.count("llm_rate_limited")
+            self.send_llm_error(429, "rate_limit_error", {"retry-after": str(self.llm_retry_after)})
+            return
+        if roll < self.llm_429_rate + self.llm_error_rate:
+            self.count("llm_errors")
+            if random.random() < 0.5:
+                self.send_llm_error(529, "overloaded_error")
+            else:
+                self.send_llm_error(500, "api_error")
+            return
+
+        if self.llm_latency:
+            time.sleep(self.llm_latency)
+        message = mock_message(payload, f"stub_{request_no}")
+        if payload.get("stream"):
+            self.count("llm_streamed")
+            self.stream_message(message)
+        else:
+            self.send_json(message)
+        self.count("llm_ok")
+
+    def stream_message(self, message: dict):
+        """按 Messages API 的 SSE 事件顺序输出，每个分片之间等待 llm_token_delay 秒"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def event(name: str, data: dict):
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        usage = message["usage"]
+        event("message_start", {"type": "message_start", "message": {
+            **message, "content": [], "stop_reason": None, "usage": {**usage, "output_tokens": 1},
+        }})
+        for index, block in enumerate(message["content"]):
+            if block["type"] == "text":
+                event("content_block_start", {"type": "content_block_start", "index": index,
+                                              "content_block": {"type": "text", "text": ""}})
+                text, delta_type, key = block["text"], "text_delta", "text"
+            else:
+                event("content_block_start", {"type": "content_block_start", "index": index,
+                                              "content_block": {**block, "input": {}}})
+                text = json.dumps(block["input"], ensure_ascii=False)
+                delta_type, key = "input_json_delta", "partial_json"
+            for start in range(0, len(text), 20):
+                if self.llm_token_delay:
+                    time.sleep(self.llm_token_delay)
+                event("content_block_delta", {"type": "content_block_delta", "index": index,
+                                              "delta": {"type": delta_type, key: text[start:start + 20]}})
+            event("content_block_stop", {"type": "content_block_stop", "index": index})
+        event("message_delta", {"type": "message_delta",
+                                "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                                "usage": {"output_tokens": usage["output_tokens"]}})
+        event("message_stop", {"type": "message_stop"})
+
+
+def point_config_at(config: dict, base_url: str) -> dict:
+    """
+    将配置中的数据源地址指向桩服务（原地修改并返回）
+
+    多模型提供方的 base_url 同时指向模拟 LLM；单模型调用读取 ANTHROPIC_BASE_URL，需由调用方设置。
+    """
+    base_url = base_url.rstrip("/")
+    config["v2ex"]["hot_url"] = f"{base_url}/v2ex/api/topics/hot.json"
+    for name, feed in config["rss_feeds"].items():
+        feed["url"] = f"{base_url}/rss/{name}.xml"
+    for provider in config["claude"].get("multi_model", {}).get("providers", []):
+        provider["base_url"] = f"{base_url}/llm"
+    hn_config = config["hackernews"]
+    hn_config["top_url"] = f"{base_url}/hn/v0/topstories.json"
+    hn_config["item_url"] = f"{base_url}/hn/v0/item/{{}}.json"
+    hn_config["bulk_url"] = f"{base_url}/hn/api/v1/search?tags=story,({{tags}})&hitsPerPage={{limit}}"
+    channels = config.setdefault("notifications", {}).setdefault("channels", {})
+    channels.setdefault("telegram", {})["base_url"] = f"{base_url}/telegram"
+    return config
+
+
+def start_server(port: int, stories: int = 500, latency: float = 0.0, bulk: bool = True,
+                 fail_rate: float = 0.0, **options) -> ThreadingHTTPServer:
+    """
+    创建桩服务（调用方负责 serve_forever / shutdown）
+
+    options 覆盖 StubHandler 的其余类属性（如 topics、rss_items、fetch_fail_rate、llm_latency、
+    llm_token_delay、llm_error_rate、llm_429_rate、llm_retry_after）。
+    收到的推送消息记录在 server.RequestHandlerClass.received 中，请求计数在 stats 中。
+    """
+    unknown = set(options) - set(vars(StubHandler))
+    if unknown:
+        raise ValueError(f"未知的桩服务参数: {', '.join(sorted(unknown))}")
+    handler = type("Handler", (StubHandler,), {
+        "stories": make_stories(stories),
+        "topics": make_topics(20),
+        "latency": latency,
+        "bulk_enabled": bulk,
+        "fail_rate": fail_rate,
+        "received": [],
+        "robot_sends": {},
+        "stats": {},
+        "stats_lock": threading.Lock(),
+        **options,
+    })
+    return ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    """数据源与模拟 LLM 的参数（本脚本与 bench.py pipeline 共用）"""
+    parser.add_argument("--v2ex-topics", type=int, default=20, help="V2EX 热帖数量")
+    parser.add_argument("--rss-items", type=int, default=10, help="每个 RSS 源的条目数")
+    parser.add_argument("--fetch-fail-rate", type=float, default=0.0, help="数据源 GET 随机返回 503 的比例")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="LLM 首个响应前的延迟（秒）")
+    parser.add_argument("--llm-token-delay", type=float, default=0.0, help="流式响应每个分片的间隔（秒）")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="LLM 随机返回 500/529 的比例")
+    parser.add_argument("--llm-429-rate", type=float, default=0.0, help="LLM 随机返回 429 的比例")
+    parser.add_argument("--llm-retry-after", type=float, default=1.0, help="429 响应的 retry-after（秒）")
+
+
+def stub_options(args) -> dict:
+    """add_stub_arguments 解析结果转为 start_server 的参数"""
+    return {
+        "topics": make_topics(args.v2ex_topics),
+        "rss_items": args.rss_items,
+        "fetch_fail_rate": args.fetch_fail_rate,
+        "llm_latency": args.llm_latency,
+        "llm_token_delay": args.llm_token_delay,
+        "llm_error_rate": args.llm_error_rate,
+        "llm_429_rate": args.llm_429_rate,
+        "llm_retry_after": args.llm_retry_after,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动本地桩服务")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stories", type=int, default=500, help="HN 故事数量")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的额外延迟（秒）")
+    parser.add_argument("--no-bulk", action="store_true", help="批量接口返回 503，用于测试回退")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="推送接口随机返回 502 的比例")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.stories, args.latency, bulk=not args.no_bulk, fail_rate=args.fail_rate,
+                          **stub_options(args))
+    print(f"桩服务已启动: http://127.0.0.1:{args.port}")
+    print(f"模拟 LLM: export ANTHROPIC_BASE_URL=http://127.0.0.1:{args.port}/llm")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
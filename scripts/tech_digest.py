@@ -1,21 +1,27 @@
 #!/usr/bin/env python3
 """
 每日科技简报生成器
-整合 V2EX、Hacker News、RSS 源，使用 Claude 生成简报
+整合 V2EX、Hacker News、RSS 等数据源，使用 Claude 生成简报
 """
 
 import json
-import os
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-import anthropic
-import feedparser
-import pytz
-import requests
-from bs4 import BeautifulSoup
+from zoneinfo import ZoneInfo
+
+from atomic_io import atomic_symlink, atomic_write
+from digest_schema import (
+    DIGEST_TOOL,
+    digest_json_path,
+    normalize_digest,
+    parse_markdown_digest,
+    render_markdown,
+    save_digest_json,
+)
+from llm_client import call_llm, call_llm_tool
+from models import Item
+from sources import Scheduler, commit_rss_marks, fetch_all_sources, section_for
 
 
 # 项目根目录
@@ -29,170 +35,90 @@ def load_config() -> dict:
         return json.load(f)
 
 
-def fetch_v2ex_hot(config: dict) -> list[dict]:
-    """获取 V2EX 热门话题"""
-    try:
-        url = config["v2ex"]["hot_url"]
-        headers = {"User-Agent": "TechDigest/1.0"}
-        resp = requests.get(url, headers=headers, timeout=15)
-        resp.raise_for_status()
-        topics = resp.json()
-
-        result = []
-        for topic in topics[:config["v2ex"]["max_topics"]]:
-            result.append({
-                "title": topic.get("title", ""),
-                "url": f"https://www.v2ex.com/t/{topic.get('id', '')}",
-                "node": topic.get("node", {}).get("title", ""),
-                "replies": topic.get("replies", 0),
-                "source": "V2EX"
-            })
-        return result
-    except Exception as e:
-        print(f"[警告] V2EX 抓取失败: {e}")
-        return []
+def fetch_items(config: dict, scheduler: Scheduler = None, marks: dict = None) -> list[Item]:
+    """
+    并发抓取所有启用的数据源（见 sources.py 与 config["sources"]）
 
+    marks 传入时收集 RSS 暂存的新高水位，只有当天简报保存后才交给 commit_rss_marks。
+    """
+    results = fetch_all_sources(config, scheduler=scheduler, marks=marks)
+    return [item for items in results.values() for item in items]
 
-def fetch_hn_top(config: dict) -> list[dict]:
-    """获取 Hacker News 热门"""
-    try:
-        top_url = config["hackernews"]["top_url"]
-        item_url_template = config["hackernews"]["item_url"]
-        max_items = config["hackernews"]["max_items"]
-
-        resp = requests.get(top_url, timeout=15)
-        resp.raise_for_status()
-        story_ids = resp.json()[:max_items]
-
-        result = []
-
-        def fetch_item(story_id):
-            try:
-                item_resp = requests.get(
-                    item_url_template.format(story_id),
-                    timeout=10
-                )
-                item_resp.raise_for_status()
-                return item_resp.json()
-            except Exception:
-                return None
-
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {executor.submit(fetch_item, sid): sid for sid in story_ids}
-            for future in as_completed(futures):
-                item = future.result()
-                if item and item.get("title"):
-                    result.append({
-                        "title": item.get("title", ""),
-                        "url": item.get("url", f"https://news.ycombinator.com/item?id={item.get('id')}"),
-                        "score": item.get("score", 0),
-                        "comments": item.get("descendants", 0),
-                        "source": "Hacker News"
-                    })
-
-        # 按分数排序
-        result.sort(key=lambda x: x.get("score", 0), reverse=True)
-        return result
-    except Exception as e:
-        print(f"[警告] Hacker News 抓取失败: {e}")
-        return []
 
+def group_into_sections(items: list[Item]) -> dict[str, list[Item]]:
+    """
+    按板块分组，保持条目原有顺序
 
-def fetch_rss_feeds(config: dict) -> list[dict]:
-    """获取 RSS 源内容"""
-    feeds_config = config["rss_feeds"]
-    result = []
+    板块顺序: V2EX、Hacker News、其他社区来源、RSS 各分类
+    """
+    kind_order = {"v2ex": 0, "hn": 1, "rss": 3}
+    sections = {}
+    for item in sorted(items, key=lambda x: kind_order.get(x.kind, 2)):
+        sections.setdefault(section_for(item), []).append(item)
+    return sections
 
-    def fetch_single_feed(name, feed_info):
-        try:
-            feed = feedparser.parse(feed_info["url"])
-            items = []
-            for entry in feed.entries[:10]:
-                items.append({
-                    "title": entry.get("title", ""),
-                    "url": entry.get("link", ""),
-                    "published": entry.get("published", ""),
-                    "summary": BeautifulSoup(
-                        entry.get("summary", "")[:300], "html.parser"
-                    ).get_text()[:200],
-                    "source": feed_info["name"],
-                    "category": feed_info["category"]
-                })
-            return items
-        except Exception as e:
-            print(f"[警告] RSS {name} 抓取失败: {e}")
-            return []
 
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {
-            executor.submit(fetch_single_feed, name, info): name
-            for name, info in feeds_config.items()
-        }
-        for future in as_completed(futures):
-            items = future.result()
-            result.extend(items)
-
-    return result
+def format_item(item: Item) -> str:
+    """单个条目在提示词中的格式"""
+    if item.kind == "v2ex":
+        meta = f"节点: {item.node}, 回复: {item.replies}"
+    elif item.kind == "hn":
+        meta = f"得分: {item.score}, 评论: {item.comments}"
+    elif item.kind == "rss":
+        meta = item.source
+    else:
+        meta = f"{item.source}, 得分: {item.score}, 评论: {item.comments}"
+    line = f"- [{item.title}]({item.url}) [{meta}]"
+    if item.body:
+        line += "\n  正文摘录: " + item.body.replace("\n", " ")
+    return line
 
 
-def prepare_content_for_claude(v2ex: list, hn: list, rss: list) -> str:
+def prepare_content_for_claude(items: list[Item], per_category_limit: int = 8) -> str:
     """准备发送给 Claude 的内容"""
     sections = []
-
-    # V2EX 部分
-    if v2ex:
-        v2ex_items = []
-        for item in v2ex:
-            v2ex_items.append(f"- [{item['title']}]({item['url']}) [节点: {item['node']}, 回复: {item['replies']}]")
-        sections.append("## V2EX 热门话题\n" + "\n".join(v2ex_items))
-
-    # Hacker News 部分
-    if hn:
-        hn_items = []
-        for item in hn:
-            hn_items.append(f"- [{item['title']}]({item['url']}) [得分: {item['score']}, 评论: {item['comments']}]")
-        sections.append("## Hacker News 热门\n" + "\n".join(hn_items))
-
-    # RSS 部分 - 按分类分组
-    if rss:
-        by_category = {}
-        for item in rss:
-            cat = item.get("category", "其他")
-            if cat not in by_category:
-                by_category[cat] = []
-            by_category[cat].append(item)
-
-        for cat, items in by_category.items():
-            cat_items = []
-            for item in items[:8]:  # 每分类最多8条
-                cat_items.append(f"- [{item['title']}]({item['url']}) [{item['source']}]")
-            sections.append(f"## {cat}\n" + "\n".join(cat_items))
+    for title, section_items in group_into_sections(items).items():
+        if section_items[0].kind == "rss":
+            section_items = section_items[:per_category_limit]  # RSS 每分类最多8条
+        sections.append(f"## {title}\n" + "\n".join(format_item(item) for item in section_items))
 
     return "\n\n".join(sections)
 
 
-def generate_digest_with_claude(content: str, config: dict, today: str) -> str:
-    """使用 Claude/GLM 生成简报"""
-    # API 配置
-    # 注意：请通过环境变量设置 API Key，不要硬编码
-    # 示例：export ANTHROPIC_API_KEY="your-api-key-here"
-    # 智谱 BigModel 兼容 API 示例：
-    #   export ANTHROPIC_API_KEY="your-key"
-    #   export ANTHROPIC_BASE_URL="https://open.bigmodel.cn/api/anthropic"
-
-    api_key = os.environ.get("ANTHROPIC_API_KEY")
-    if not api_key:
-        raise ValueError("请设置 ANTHROPIC_API_KEY 环境变量")
-
-    base_url = os.environ.get("ANTHROPIC_BASE_URL")
-
-    # 如果设置了 base_url，则使用兼容 API（如智谱 BigModel）
-    if base_url:
-        client = anthropic.Anthropic(api_key=api_key, base_url=base_url)
+def window_end(config: dict, today: str) -> float:
+    """新鲜度窗口终点：当天结束时刻（北京时间）与当前时间中较早的一个"""
+    tz = ZoneInfo("Asia/Shanghai")
+    day = datetime.strptime(today, config["output"]["date_format"])
+    end_of_day = (day + timedelta(days=1)).replace(tzinfo=tz).timestamp()
+    return min(end_of_day, datetime.now(tz).timestamp())
+
+
+def select_items(items: list[Item], config: dict, today: str, scheduler: Scheduler = None) -> list[Item]:
+    """
+    剔除过期及近几天简报已覆盖的条目，再排序挑选进入简报的条目
+
+    候选条目达到 claude.map_reduce.threshold 时改用 map_reduce.max_items 作为上限，
+    generate_digest 据此走 map-reduce；启用 config["enrichment"] 时为排名靠前的条目补全原文正文。
+    """
+    # 依赖 numpy，只在需要筛选时导入
+    from enrichment import enrich_items
+    from novelty_index import filter_covered_items
+    from ranking import filter_stale_items, select_top_items
+
+    items = filter_stale_items(items, config, window_end(config, today))
+    items = filter_covered_items(items, config, today)
+    mr_config = config["claude"]["map_reduce"]
+    if len(items) >= mr_config["threshold"]:
+        print(f"      候选条目较多 ({len(items)} 条)，最多保留 {mr_config['max_items']} 条")
+        items = select_top_items(items, config, mr_config["max_items"])
     else:
-        client = anthropic.Anthropic(api_key=api_key)
+        items = select_top_items(items, config)
+    return enrich_items(items, config, scheduler)
+
 
-    prompt = f"""你是一位资深科技编辑，需要根据以下原始内容生成一份精炼的中文科技简报。
+def build_digest_prompt(content: str, today: str) -> str:
+    """构建简报生成提示词"""
+    return f"""你是一位资深科技编辑，需要根据以下原始内容生成一份精炼的中文科技简报。
 
 今天日期: {today}
 
@@ -215,84 +141,172 @@ def generate_digest_with_claude(content: str, config: dict, today: str) -> str:
 
 直接输出简报内容，不需要额外说明。"""
 
-    message = client.messages.create(
-        model=config["claude"]["model"],
-        max_tokens=config["claude"]["max_tokens"],
-        messages=[
-            {"role": "user", "content": prompt}
-        ]
-    )
 
-    return message.content[0].text
+def generate_digest_with_claude(content: str, config: dict, today: str) -> tuple[str, dict | None]:
+    """
+    使用 Claude/GLM 生成简报
 
+    Returns:
+        (简报 Markdown, 结构化简报)；退回文本输出时结构化简报为 None，保存时再从 Markdown 解析
+    """
+    # API 配置
+    # 注意：请通过环境变量设置 API Key，不要硬编码
+    # 示例：export ANTHROPIC_API_KEY="your-api-key-here"
+    # 智谱 BigModel 兼容 API 示例：
+    #   export ANTHROPIC_API_KEY="your-key"
+    #   export ANTHROPIC_BASE_URL="https://open.bigmodel.cn/api/anthropic"
+    #
+    # 启用 config["claude"]["multi_model"] 后会并发请求多个提供方
+    prompt = build_digest_prompt(content, today)
+    multi_enabled = config["claude"].get("multi_model", {}).get("enabled")
+    if config["claude"].get("structured_output") == "tool" and not multi_enabled:
+        # 通过工具调用直接拿到结构化简报，再渲染为 Markdown；失败时退回文本输出
+        try:
+            digest = normalize_digest(call_llm_tool(prompt, config, DIGEST_TOOL), today)
+            return render_markdown(digest), digest
+        except Exception as e:
+            print(f"[警告] 结构化输出失败，改用 Markdown 输出: {e}")
+    return call_llm(prompt, config), None
+
+
+def generate_digest(items: list[Item], config: dict, today: str) -> tuple[str, dict | None]:
+    """
+    生成简报，内容过多时自动切换为 map-reduce 模式，返回值同 generate_digest_with_claude
+
+    只有 select_items 按 map_reduce.max_items 放宽上限时条目才会超过 ranking.max_items，
+    正常规模的筛选结果只调用一次模型。
+    """
+    if len(items) > config["ranking"]["max_items"]:
+        from map_reduce import generate_digest_map_reduce
+        print(f"      内容较多 ({len(items)} 条)，使用 map-reduce 模式生成")
+        return generate_digest_map_reduce(items, config, today)
 
-def save_digest(content: str, config: dict, today: str):
-    """保存简报文件"""
+    raw_content = prepare_content_for_claude(items)
+    return generate_digest_with_claude(raw_content, config, today)
+
+
+def save_digest(content: str, config: dict, today: str, update_latest: bool = True, digest: dict = None):
+    """
+    保存简报文件
+
+    Args:
+        content: 简报内容
+        config: 全局配置
+        today: 日期字符串
+        update_latest: 是否同时更新 latest.md（重新生成历史日期时应为 False）
+        digest: 已校验的结构化简报（工具调用输出）；为 None 时从 Markdown 解析
+    """
     digests_dir = PROJECT_ROOT / config["output"]["digests_dir"]
     digests_dir.mkdir(exist_ok=True)
 
-    # 保存日期文件
+    # 保存日期文件（原子写入，内容未变化时跳过）
     date_file = digests_dir / f"{today}.md"
-    with open(date_file, "w", encoding="utf-8") as f:
-        f.write(content)
-    print(f"[完成] 已保存: {date_file}")
+    report_write(date_file, atomic_write(date_file, content))
 
-    # 更新 latest.md
+    # 结构化简报，供通知、页面和趋势分析直接读取
+    try:
+        if digest is None:
+            digest = parse_markdown_digest(content, today)
+        report_write(digest_json_path(today, digests_dir), save_digest_json(digest, digests_dir))
+    except ValueError as e:
+        print(f"[警告] 简报结构解析失败，未生成 JSON: {e}")
+
+    if not update_latest:
+        return
+
+    # latest.md 是指向当天简报的符号链接，不再保存第二份全文
     latest_file = digests_dir / "latest.md"
-    with open(latest_file, "w", encoding="utf-8") as f:
-        f.write(content)
-    print(f"[完成] 已更新: {latest_file}")
+    report_write(latest_file, atomic_symlink(date_file, latest_file))
 
 
-def main():
-    """主函数"""
-    print("=" * 50)
-    print("每日科技简报生成器")
-    print("=" * 50)
+def report_write(path: Path, written: bool):
+    """打印写入结果"""
+    if written:
+        print(f"[完成] 已保存: {path}")
+    else:
+        print(f"[跳过] 内容未变化: {path}")
 
-    # 加载配置
-    config = load_config()
 
-    # 获取北京时间日期
-    tz = pytz.timezone("Asia/Shanghai")
-    today = datetime.now(tz).strftime(config["output"]["date_format"])
-    print(f"\n日期: {today}")
+def today_str(config: dict) -> str:
+    """北京时间今天的日期字符串"""
+    return datetime.now(ZoneInfo("Asia/Shanghai")).strftime(config["output"]["date_format"])
 
-    # 抓取数据
-    print("\n[1/4] 正在抓取 V2EX 热门...")
-    v2ex = fetch_v2ex_hot(config)
-    print(f"      获取 {len(v2ex)} 条")
 
-    print("[2/4] 正在抓取 Hacker News...")
-    hn = fetch_hn_top(config)
-    print(f"      获取 {len(hn)} 条")
+def run_pipeline(config: dict, today: str) -> str:
+    """
+    抓取 → 筛选 → 生成 → 保存
 
-    print("[3/4] 正在抓取 RSS 源...")
-    rss = fetch_rss_feeds(config)
-    print(f"      获取 {len(rss)} 条")
+    Returns:
+        简报内容；未获取到任何内容时退出进程
+    """
+    # 抓取数据
+    print("\n[1/4] 正在抓取数据源...")
+    marks = {}
+    items = fetch_items(config, marks=marks)
+    print(f"      共获取 {len(items)} 条")
 
     # 检查是否有内容
-    if not v2ex and not hn and not rss:
+    if not items:
         print("\n[错误] 未获取到任何内容，退出")
         sys.exit(1)
 
-    # 准备内容
-    raw_content = prepare_content_for_claude(v2ex, hn, rss)
+    # 保存原始数据快照
+    try:
+        from snapshot_store import save_snapshot
+        save_snapshot(config, today, items)
+    except Exception as e:
+        print(f"[警告] 原始数据快照保存失败: {e}")
+
+    # 排序挑选
+    print("[2/4] 正在筛选排序...")
+    items = select_items(items, config, today)
+    print(f"      保留 {len(items)} 条")
 
     # 生成简报
-    print("[4/4] 正在使用 Claude 生成简报...")
-    digest = generate_digest_with_claude(raw_content, config, today)
+    print("[3/4] 正在使用 Claude 生成简报...")
+    digest, structured = generate_digest(items, config, today)
 
-    # 保存
-    save_digest(digest, config, today)
+    # 保存，简报落盘后才推进 RSS 高水位
+    save_digest(digest, config, today, digest=structured)
+    commit_rss_marks(marks)
+    return digest
 
-    # 发送钉钉通知
-    print("\n[5/5] 正在发送钉钉通知...")
+
+def start_notify(digest: str, config: dict, today: str):
+    """
+    在后台开始发送通知（各渠道并行发送，失败的消息进入发件箱，下次运行补发）
+
+    Returns:
+        分发器，调用方在退出前 wait()；没有可用渠道或启动失败时为 None
+    """
     try:
-        from dingtalk_notifier import send_dingtalk_digest
-        send_dingtalk_digest(digest, today)
+        from notifiers import start_notifications
+        return start_notifications(digest, today, config.get("notifications"))
     except Exception as e:
-        print(f"[警告] 钉钉通知发送失败: {e}")
+        print(f"[警告] 通知发送失败: {e}")
+        return None
+
+
+def main():
+    """主函数"""
+    print("=" * 50)
+    print("每日科技简报生成器")
+    print("=" * 50)
+
+    # 加载配置
+    config = load_config()
+
+    # 获取北京时间日期
+    today = today_str(config)
+    print(f"\n日期: {today}")
+
+    digest = run_pipeline(config, today)
+
+    # 发送通知
+    print("\n[4/4] 正在发送通知...")
+    dispatcher = start_notify(digest, config, today)
+    if dispatcher:
+        dispatcher.wait()
 
     print("\n" + "=" * 50)
     print("生成完成!")
@@ -9,10 +9,15 @@
 2. 需要将 Skill 文件放置在正确位置
 3. 需要设置 ANTHROPIC_API_KEY
 
+--hybrid 时不再让 Agent 通过 Bash 运行 tech_digest.py，而是调用进程内 MCP 工具
+（digest_tools.py 中的 抓取 / 生成 / 保存），未完成的步骤直接执行补齐。
+
 参考文档: https://docs.anthropic.com/en/docs/agent-sdk/skills
 """
 
+import argparse
 import asyncio
+import json
 import os
 import shutil
 from pathlib import Path
@@ -129,8 +134,26 @@ async def generate_digest_with_skill():
             print(message)
 
 
+async def generate_digest_with_tools():
+    """Agent 调用进程内工具生成科技简报"""
+    from digest import DigestContext
+    from digest_tools import run_hybrid
+
+    print("\n[生成] 正在通过进程内工具生成科技简报...")
+    ctx = DigestContext()
+    try:
+        results = await run_hybrid(ctx)
+    finally:
+        ctx.close()
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
 async def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="Claude Agent SDK - Skills 使用演示")
+    parser.add_argument("--hybrid", action="store_true", help="Agent 调用进程内工具，而不是通过 Bash 运行脚本")
+    args = parser.parse_args()
+
     api_key = os.environ.get("ANTHROPIC_API_KEY")
     if not api_key:
         print("错误: 请设置 ANTHROPIC_API_KEY 环境变量")
@@ -151,7 +174,10 @@ async def main():
 
     # 3. 使用 Skill 生成简报
     print("\n[3] 使用 Skill 生成简报...")
-    await generate_digest_with_skill()
+    if args.hybrid:
+        await generate_digest_with_tools()
+    else:
+        await generate_digest_with_skill()
 
     print("\n" + "=" * 60)
     print("演示完成!")
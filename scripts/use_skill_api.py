@@ -8,30 +8,128 @@
 1. 需要 Anthropic API Key
 2. 需要启用 code-execution 和 skills beta 功能
 
+Skill 按内容哈希缓存（.cache/skill_api.json）：SKILL.md 和脚本未变化时直接复用已上传的版本，
+变化时只为同一个 Skill 新建版本；代码执行容器在有效期内跨运行复用，省去冷启动和依赖安装。
+pause_turn 时在同一段对话上续跑（历史前缀走提示缓存），每轮流式输出并记录用量，超出轮数/耗时/token 预算时提前停止。
+
 参考文档: https://docs.anthropic.com/en/docs/agents-and-tools/agent-skills/api-integration
 """
 
+import argparse
+import hashlib
+import json
 import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
 
 import anthropic
-from anthropic.lib import files_from_dir
 
 
-def create_skill(client: anthropic.Anthropic, skill_dir: Path) -> dict:
+PROJECT_ROOT = Path(__file__).parent.parent
+SKILL_CACHE_PATH = PROJECT_ROOT / ".cache" / "skill_api.json"
+
+# 上传到 Skill 的文件；简报、数据和缓存每天都在变，不属于 Skill 内容
+SKILL_FILES = ["SKILL.md", "requirements.txt", "scripts/*.py", "scripts/config.json"]
+
+# 容器剩余有效期不足该秒数时不再复用
+CONTAINER_MIN_TTL = 300
+
+MODEL = "claude-sonnet-4-5-20250929"
+MAX_TOKENS = 4096
+BETAS = ["code-execution-2025-08-25", "skills-2025-10-02"]
+CODE_EXECUTION_TOOL = {"type": "code_execution_20250825", "name": "code_execution"}
+DIGEST_PROMPT = ("请使用 daily-tech-digest Skill 生成今日科技简报。"
+                 "请抓取 V2EX、Hacker News 和 RSS 源的内容，然后生成一份精炼的中文简报。")
+
+# pause_turn 续跑预算：最多轮数、总耗时（秒）、累计 token（输入 + 输出 + 缓存读写）
+DEFAULT_BUDGET = {"max_turns": 10, "max_seconds": 900, "max_tokens": 500_000}
+
+
+@dataclass
+class TurnUsage:
+    """单轮请求的用量"""
+    turn: int
+    stop_reason: str
+    input_tokens: int
+    output_tokens: int
+    cache_read_tokens: int
+    cache_write_tokens: int
+    seconds: float
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens + self.cache_read_tokens + self.cache_write_tokens
+
+    def __str__(self) -> str:
+        return (f"[第 {self.turn} 轮] {self.stop_reason}，输入 {self.input_tokens}"
+                f"（缓存读 {self.cache_read_tokens} / 写 {self.cache_write_tokens}），"
+                f"输出 {self.output_tokens}，耗时 {self.seconds:.1f}s")
+
+
+@dataclass
+class SkillRun:
+    """一次 Skill 调用的结果"""
+    text: str
+    container_id: str | None = None
+    container_expires_at: str | None = None
+    turns: list[TurnUsage] = field(default_factory=list)
+    # 最后一轮的 stop_reason，或提前停止时超出的预算项
+    stop_reason: str = ""
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(turn.total_tokens for turn in self.turns)
+
+
+def collect_skill_files(skill_dir: Path) -> list[tuple[str, bytes]]:
+    """
+    收集需要上传的 Skill 文件
+
+    路径以 Skill 目录名为前缀（与 files_from_dir 一致），按路径排序，保证哈希稳定。
+    """
+    paths = sorted({path for pattern in SKILL_FILES for path in skill_dir.glob(pattern) if path.is_file()})
+    return [(path.relative_to(skill_dir.parent).as_posix(), path.read_bytes()) for path in paths]
+
+
+def content_hash(files: list[tuple[str, bytes]]) -> str:
+    """Skill 文件的内容哈希（路径 + 内容）"""
+    digest = hashlib.sha256()
+    for name, data in files:
+        digest.update(name.encode("utf-8") + b"\0")
+        digest.update(hashlib.sha256(data).digest())
+    return digest.hexdigest()
+
+
+def load_skill_cache(path: Path = SKILL_CACHE_PATH) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_skill_cache(cache: dict, path: Path = SKILL_CACHE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+
+
+def create_skill(client: anthropic.Anthropic, skill_dir: Path, files: list = None) -> dict:
     """
-    创建或更新 Skill
+    创建 Skill
 
     Args:
         client: Anthropic 客户端
         skill_dir: Skill 目录路径
+        files: 要上传的文件，默认为 collect_skill_files(skill_dir)
 
     Returns:
         创建的 Skill 信息
     """
     skill = client.beta.skills.create(
         display_title="每日科技简报生成器",
-        files=files_from_dir(str(skill_dir)),
+        files=files or collect_skill_files(skill_dir),
         betas=["skills-2025-10-02"]
     )
     print(f"[完成] 创建 Skill: {skill.id}")
@@ -39,6 +137,53 @@ def create_skill(client: anthropic.Anthropic, skill_dir: Path) -> dict:
     return skill
 
 
+def ensure_skill(client: anthropic.Anthropic, skill_dir: Path, cache: dict, force: bool = False) -> tuple[str, str]:
+    """
+    按内容哈希复用或更新 Skill
+
+    内容未变化时不发任何请求；变化时为缓存中的 Skill 新建版本，没有缓存时创建新 Skill。
+    调用方负责保存 cache。
+
+    Returns:
+        (skill_id, 版本号)
+    """
+    files = collect_skill_files(skill_dir)
+    current = content_hash(files)
+    if not force and cache.get("skill_id") and cache.get("hash") == current:
+        print(f"[缓存] Skill 内容未变化，复用 {cache['skill_id']} 版本 {cache['version']}")
+        return cache["skill_id"], cache["version"]
+
+    start = time.perf_counter()
+    if cache.get("skill_id"):
+        version = client.beta.skills.versions.create(
+            skill_id=cache["skill_id"],
+            files=files,
+            betas=["skills-2025-10-02"]
+        )
+        skill_id, version_id = cache["skill_id"], version.version
+        print(f"[完成] Skill 内容有变化，新建版本: {version_id}")
+    else:
+        skill = create_skill(client, skill_dir, files)
+        skill_id, version_id = skill.id, skill.latest_version
+
+    print(f"       上传 {len(files)} 个文件，耗时 {time.perf_counter() - start:.1f}s")
+    cache.update(skill_id=skill_id, version=version_id, hash=current)
+    # 新版本的 Skill 需要重新装载，旧容器不再复用
+    cache.pop("container", None)
+    return skill_id, version_id
+
+
+def reusable_container(cache: dict) -> str | None:
+    """缓存中仍在有效期内的容器 ID"""
+    container = cache.get("container") or {}
+    if not container.get("id") or not container.get("expires_at"):
+        return None
+    expires_at = datetime.fromisoformat(container["expires_at"].replace("Z", "+00:00"))
+    if expires_at.timestamp() - time.time() < CONTAINER_MIN_TTL:
+        return None
+    return container["id"]
+
+
 def list_skills(client: anthropic.Anthropic) -> list:
     """列出所有可用的 Skills"""
     skills = client.beta.skills.list(
@@ -48,83 +193,130 @@ def list_skills(client: anthropic.Anthropic) -> list:
     return skills.data
 
 
+def _block_param(block) -> dict:
+    """响应中的内容块原样转为请求参数（去掉空字段）"""
+    if isinstance(block, dict):
+        return dict(block)
+    return block.model_dump(mode="json", exclude_none=True)
+
+
+def _move_cache_breakpoint(messages: list[dict]):
+    """
+    缓存断点只放在对话的最后一个内容块上
+
+    续跑时整段历史原样重发，上一轮的前缀按缓存读取计费；旧断点移除，避免超过 4 个断点的上限。
+    """
+    for message in messages:
+        if isinstance(message["content"], list):
+            for block in message["content"]:
+                block.pop("cache_control", None)
+    last = messages[-1]
+    if isinstance(last["content"], str):
+        last["content"] = [{"type": "text", "text": last["content"]}]
+    if last["content"]:
+        last["content"][-1]["cache_control"] = {"type": "ephemeral"}
+
+
+def _stream_turn(client: anthropic.Anthropic, request: dict, timeout: float):
+    """流式发送一轮请求，边接收边打印进度，返回完整响应"""
+    with client.beta.messages.stream(**request, timeout=timeout) as stream:
+        for event in stream:
+            if event.type == "content_block_start" and event.content_block.type == "server_tool_use":
+                print(f"\n      [工具] {event.content_block.name}", flush=True)
+            elif event.type == "text":
+                print(event.text, end="", flush=True)
+        print()
+        return stream.get_final_message()
+
+
+def _turn_usage(turn: int, response, seconds: float) -> TurnUsage:
+    usage = response.usage
+    return TurnUsage(
+        turn=turn,
+        stop_reason=response.stop_reason or "",
+        input_tokens=usage.input_tokens or 0,
+        output_tokens=usage.output_tokens or 0,
+        cache_read_tokens=usage.cache_read_input_tokens or 0,
+        cache_write_tokens=usage.cache_creation_input_tokens or 0,
+        seconds=seconds,
+    )
+
+
+def _over_budget(turns: list[TurnUsage], elapsed: float, budget: dict) -> str | None:
+    """超出哪一项预算（未超出时为 None）"""
+    if len(turns) >= budget["max_turns"]:
+        return "max_turns"
+    if elapsed >= budget["max_seconds"]:
+        return "time_budget"
+    if sum(t.total_tokens for t in turns) >= budget["max_tokens"]:
+        return "token_budget"
+    return None
+
+
 def use_skill_to_generate_digest(
     client: anthropic.Anthropic,
     skill_id: str,
-    skill_version: str = "latest"
-) -> str:
+    skill_version: str = "latest",
+    container_id: str = None,
+    budget: dict = None
+) -> SkillRun:
     """
     使用 Skill 生成科技简报
 
+    服务端工具循环过长时响应以 pause_turn 结束：把助手内容原样追加到同一段对话后续跑，
+    每轮流式接收并记录用量；达到轮数、耗时或 token 预算时提前停止，返回已有的结果。
+
     Args:
         client: Anthropic 客户端
         skill_id: Skill ID
         skill_version: Skill 版本
+        container_id: 复用的容器 ID（上次运行留下的），默认新建容器
+        budget: 续跑预算，缺省项取 DEFAULT_BUDGET
 
     Returns:
-        生成的简报内容
+        生成的简报内容、所用容器及每轮用量
     """
-    response = client.beta.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=4096,
-        betas=["code-execution-2025-08-25", "skills-2025-10-02"],
-        container={
-            "skills": [
-                {
-                    "type": "custom",
-                    "skill_id": skill_id,
-                    "version": skill_version
-                }
-            ]
-        },
-        messages=[{
-            "role": "user",
-            "content": "请使用 daily-tech-digest Skill 生成今日科技简报。"
-                       "请抓取 V2EX、Hacker News 和 RSS 源的内容，然后生成一份精炼的中文简报。"
-        }],
-        tools=[{
-            "type": "code_execution_20250825",
-            "name": "code_execution"
-        }]
-    )
-
-    # 处理可能的 pause_turn
-    max_retries = 10
-    messages = [{"role": "user", "content": "请使用 daily-tech-digest Skill 生成今日科技简报。"}]
-
-    for _ in range(max_retries):
+    budget = {**DEFAULT_BUDGET, **(budget or {})}
+    skills = [{"type": "custom", "skill_id": skill_id, "version": skill_version}]
+    messages = [{"role": "user", "content": DIGEST_PROMPT}]
+    turns: list[TurnUsage] = []
+    start = time.perf_counter()
+
+    while True:
+        _move_cache_breakpoint(messages)
+        request = {
+            "model": MODEL,
+            "max_tokens": MAX_TOKENS,
+            "betas": BETAS,
+            "container": {**({"id": container_id} if container_id else {}), "skills": skills},
+            "messages": messages,
+            "tools": [CODE_EXECUTION_TOOL],
+        }
+        remaining = budget["max_seconds"] - (time.perf_counter() - start)
+        turn_start = time.perf_counter()
+        response = _stream_turn(client, request, timeout=max(remaining, 60))
+        turns.append(_turn_usage(len(turns) + 1, response, time.perf_counter() - turn_start))
+        print(f"      {turns[-1]}")
+
+        if response.container is not None:
+            container_id = response.container.id
         if response.stop_reason != "pause_turn":
+            stop_reason = response.stop_reason or ""
             break
+        stop_reason = _over_budget(turns, time.perf_counter() - start, budget)
+        if stop_reason:
+            print(f"[警告] 达到预算上限（{stop_reason}），停止续跑")
+            break
+        # 同一段对话续跑：助手内容原样追加，不新增用户消息
+        messages.append({"role": "assistant", "content": [_block_param(b) for b in response.content]})
 
-        messages.append({"role": "assistant", "content": response.content})
-        response = client.beta.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=4096,
-            betas=["code-execution-2025-08-25", "skills-2025-10-02"],
-            container={
-                "id": response.container.id,
-                "skills": [
-                    {
-                        "type": "custom",
-                        "skill_id": skill_id,
-                        "version": skill_version
-                    }
-                ]
-            },
-            messages=messages,
-            tools=[{
-                "type": "code_execution_20250825",
-                "name": "code_execution"
-            }]
-        )
-
-    # 提取文本内容
-    result = ""
-    for item in response.content:
-        if hasattr(item, "text"):
-            result += item.text
-
-    return result
+    result = "".join(block.text for block in response.content if block.type == "text")
+    run = SkillRun(result, turns=turns, stop_reason=stop_reason)
+    if response.container is not None:
+        expires_at = response.container.expires_at
+        run.container_id = response.container.id
+        run.container_expires_at = expires_at.isoformat() if isinstance(expires_at, datetime) else expires_at
+    return run
 
 
 def delete_skill(client: anthropic.Anthropic, skill_id: str):
@@ -151,40 +343,100 @@ def delete_skill(client: anthropic.Anthropic, skill_id: str):
     print(f"[完成] 删除 Skill: {skill_id}")
 
 
+def skill_exists(client: anthropic.Anthropic, skill_id: str) -> bool:
+    """Skill 是否仍存在于远端"""
+    try:
+        client.beta.skills.retrieve(skill_id, betas=["skills-2025-10-02"])
+    except anthropic.NotFoundError:
+        return False
+    return True
+
+
+def generate_with_cache(client: anthropic.Anthropic, skill_dir: Path, cache: dict,
+                        force_upload: bool = False, new_container: bool = False,
+                        budget: dict = None) -> SkillRun:
+    """
+    复用缓存的 Skill 版本和容器生成简报
+
+    缓存的容器不可用时只丢弃容器缓存，用同一 Skill 版本新建容器重试；
+    只有确认缓存的 Skill 已在远端删除（404）时才重新上传。
+    """
+    cached_skill = bool(cache.get("skill_id"))
+    skill_id, version = ensure_skill(client, skill_dir, cache, force=force_upload)
+    container_id = None if new_container else reusable_container(cache)
+    if container_id:
+        print(f"[缓存] 复用容器 {container_id}")
+
+    try:
+        try:
+            run = use_skill_to_generate_digest(client, skill_id, version, container_id, budget)
+        except (anthropic.NotFoundError, anthropic.BadRequestError) as e:
+            if not container_id:
+                raise
+            print(f"[警告] 缓存的容器不可用（{type(e).__name__}），新建容器重试")
+            cache.pop("container", None)
+            run = use_skill_to_generate_digest(client, skill_id, version, budget=budget)
+    except anthropic.NotFoundError:
+        if not cached_skill or skill_exists(client, skill_id):
+            raise
+        print(f"[警告] 缓存的 Skill {skill_id} 已在远端删除，重新上传")
+        cache.clear()
+        skill_id, version = ensure_skill(client, skill_dir, cache)
+        run = use_skill_to_generate_digest(client, skill_id, version, budget=budget)
+
+    if run.container_id:
+        cache["container"] = {"id": run.container_id, "expires_at": run.container_expires_at}
+    return run
+
+
 def main():
     """演示 Skills API 使用"""
+    parser = argparse.ArgumentParser(description="通过 Skills API 生成简报")
+    parser.add_argument("--force-upload", action="store_true", help="忽略内容哈希，强制上传新版本")
+    parser.add_argument("--new-container", action="store_true", help="不复用上次的容器")
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_BUDGET["max_turns"], help="pause_turn 最多续跑轮数")
+    parser.add_argument("--time-budget", type=float, default=DEFAULT_BUDGET["max_seconds"], help="总耗时上限（秒）")
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_BUDGET["max_tokens"], help="累计 token 上限")
+    parser.add_argument("--list", action="store_true", help="列出所有自定义 Skills")
+    parser.add_argument("--delete", action="store_true", help="删除缓存的 Skill 及其所有版本")
+    args = parser.parse_args()
+
     api_key = os.environ.get("ANTHROPIC_API_KEY")
     if not api_key:
         print("错误: 请设置 ANTHROPIC_API_KEY 环境变量")
         return
 
     client = anthropic.Anthropic(api_key=api_key)
-    project_root = Path(__file__).parent.parent
+    cache = load_skill_cache()
 
     print("=" * 60)
     print("Anthropic Skills API 演示")
     print("=" * 60)
 
-    # 1. 创建 Skill
-    print("\n[1] 创建 Skill...")
-    skill = create_skill(client, project_root)
+    if args.list:
+        print("\n所有自定义 Skills:")
+        for s in list_skills(client):
+            print(f"    - {s.id}: {s.display_title}")
+        return
 
-    # 2. 列出 Skills
-    print("\n[2] 列出所有自定义 Skills...")
-    skills = list_skills(client)
-    for s in skills:
-        print(f"    - {s.id}: {s.display_title}")
+    if args.delete:
+        if cache.get("skill_id"):
+            delete_skill(client, cache["skill_id"])
+        save_skill_cache({})
+        return
 
-    # 3. 使用 Skill 生成简报
-    print("\n[3] 使用 Skill 生成简报...")
-    digest = use_skill_to_generate_digest(client, skill.id)
-    print("\n生成的简报:")
+    # 1. 按内容哈希复用或上传 Skill，2. 使用 Skill 生成简报
+    print("\n[1] 使用 Skill 生成简报...")
+    start = time.perf_counter()
+    try:
+        budget = {"max_turns": args.max_turns, "max_seconds": args.time_budget, "max_tokens": args.token_budget}
+        run = generate_with_cache(client, PROJECT_ROOT, cache, args.force_upload, args.new_container, budget)
+    finally:
+        save_skill_cache(cache)
+    print(f"\n生成的简报（{len(run.turns)} 轮，{run.total_tokens} tokens，"
+          f"{run.stop_reason}，耗时 {time.perf_counter() - start:.1f}s）:")
     print("-" * 40)
-    print(digest[:1000] + "..." if len(digest) > 1000 else digest)
-
-    # 4. 清理（可选）
-    # print("\n[4] 清理 Skill...")
-    # delete_skill(client, skill.id)
+    print(run.text[:1000] + "..." if len(run.text) > 1000 else run.text)
 
     print("\n" + "=" * 60)
     print("演示完成!")
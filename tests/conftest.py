@@ -0,0 +1,21 @@
+"""
+测试公共设置
+scripts/ 下的模块以脚本方式互相导入，测试时同样把该目录加入 sys.path
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+@pytest.fixture
+def config() -> dict:
+    """每个测试独立的一份 config.json"""
+    with open(SCRIPTS_DIR / "config.json", "r", encoding="utf-8") as f:
+        return json.load(f)
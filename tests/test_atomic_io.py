@@ -0,0 +1,59 @@
+import os
+
+from atomic_io import atomic_symlink, atomic_write
+
+
+def test_atomic_write_creates_and_skips_identical(tmp_path):
+    path = tmp_path / "sub" / "digest.md"
+    assert atomic_write(path, "内容") is True
+    assert path.read_text(encoding="utf-8") == "内容"
+
+    mtime = path.stat().st_mtime_ns
+    assert atomic_write(path, "内容") is False
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_atomic_write_replaces_content_without_leftovers(tmp_path):
+    path = tmp_path / "page.html"
+    atomic_write(path, b"old")
+    assert atomic_write(path, b"new") is True
+    assert path.read_bytes() == b"new"
+    assert [p.name for p in tmp_path.iterdir()] == ["page.html"]
+
+
+def test_atomic_write_replaces_symlink_with_file(tmp_path):
+    target = tmp_path / "2026-03-02.md"
+    target.write_text("简报", encoding="utf-8")
+    link = tmp_path / "latest.md"
+    os.symlink(target.name, link)
+
+    # 内容相同也要写入：链接需要变成普通文件，且不能改动其指向的文件
+    assert atomic_write(link, "简报") is True
+    assert not link.is_symlink()
+    assert target.read_text(encoding="utf-8") == "简报"
+
+
+def test_atomic_symlink_points_relative_and_is_idempotent(tmp_path):
+    first, second = tmp_path / "2026-03-01.md", tmp_path / "2026-03-02.md"
+    first.write_text("一", encoding="utf-8")
+    second.write_text("二", encoding="utf-8")
+    link = tmp_path / "latest.md"
+
+    assert atomic_symlink(first, link) is True
+    assert os.readlink(link) == "2026-03-01.md"
+    assert atomic_symlink(first, link) is False
+
+    assert atomic_symlink(second, link) is True
+    assert link.read_text(encoding="utf-8") == "二"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["2026-03-01.md", "2026-03-02.md", "latest.md"]
+
+
+def test_atomic_symlink_replaces_regular_file(tmp_path):
+    target = tmp_path / "2026-03-02.md"
+    target.write_text("简报", encoding="utf-8")
+    link = tmp_path / "latest.md"
+    link.write_text("旧副本", encoding="utf-8")
+
+    assert atomic_symlink(target, link) is True
+    assert link.is_symlink()
+    assert link.read_text(encoding="utf-8") == "简报"
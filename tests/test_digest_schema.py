@@ -0,0 +1,88 @@
+import pytest
+
+from digest_schema import (
+    digest_json_path,
+    load_digest,
+    normalize_digest,
+    parse_markdown_digest,
+    render_markdown,
+    save_digest_json,
+)
+
+
+DATE = "2026-03-02"
+
+
+def sample_digest() -> dict:
+    return normalize_digest({
+        "title": "2026-03-02 科技简报",
+        "intro": "今天的重点是本地模型。",
+        "sections": [
+            {"name": "今日热点", "items": [
+                {"title": "本地模型跑进浏览器", "summary": "WebGPU 推理速度提升明显。",
+                 "links": [{"title": "原文", "url": "https://www.example.com/a"}]},
+                {"title": "V2EX 讨论远程办公", "summary": "开发者分享经验。",
+                 "links": [{"title": "帖子", "url": "https://v2ex.com/t/1"}]},
+            ]},
+            {"name": "推荐阅读", "items": [
+                {"title": "数据库索引入门", "summary": "从 B+ 树讲起。",
+                 "links": [{"title": "数据库索引入门", "url": "https://blog.example.org/index"}]},
+            ]},
+        ],
+    }, DATE)
+
+
+def test_normalize_derives_sources_from_links():
+    digest = sample_digest()
+    assert digest["date"] == DATE
+    assert digest["sections"][0]["items"][0]["sources"] == ["example.com"]
+
+
+def test_json_round_trip(tmp_path):
+    digest = sample_digest()
+    assert save_digest_json(digest, tmp_path) is True
+    assert save_digest_json(digest, tmp_path) is False
+    assert digest_json_path(DATE, tmp_path).read_text(encoding="utf-8").endswith("}\n")
+    assert load_digest(DATE, tmp_path) == digest
+
+
+def test_markdown_round_trip_keeps_structure():
+    digest = sample_digest()
+    parsed = parse_markdown_digest(render_markdown(digest), DATE)
+    assert parsed["intro"] == digest["intro"]
+    assert [s["name"] for s in parsed["sections"]] == [s["name"] for s in digest["sections"]]
+    for ours, theirs in zip(digest["sections"], parsed["sections"]):
+        assert [i["title"] for i in theirs["items"]] == [i["title"] for i in ours["items"]]
+        assert [i["links"][0]["url"] for i in theirs["items"]] == [i["links"][0]["url"] for i in ours["items"]]
+
+
+def test_load_digest_falls_back_to_markdown(tmp_path):
+    (tmp_path / f"{DATE}.md").write_text(render_markdown(sample_digest()), encoding="utf-8")
+    loaded = load_digest(DATE, tmp_path)
+    assert loaded is not None
+    assert loaded["sections"][0]["items"][0]["title"] == "本地模型跑进浏览器"
+
+
+def test_load_digest_missing_or_unparseable(tmp_path):
+    assert load_digest(DATE, tmp_path) is None
+    (tmp_path / f"{DATE}.md").write_text("没有任何结构", encoding="utf-8")
+    assert load_digest(DATE, tmp_path) is None
+
+
+def test_normalize_rejects_non_http_links():
+    with pytest.raises(ValueError):
+        normalize_digest({"sections": [{"name": "今日热点", "items": [
+            {"title": "坏链接", "links": [{"url": "javascript:alert(1)"}]},
+        ]}]}, DATE)
+
+
+def test_save_digest_uses_tool_output_without_parsing(tmp_path, config):
+    import tech_digest
+
+    config["output"]["digests_dir"] = str(tmp_path)
+    digest = sample_digest()
+
+    # Markdown 无法解析也不影响：结构化结果直接写入 JSON
+    tech_digest.save_digest("无法解析的正文", config, DATE, update_latest=False, digest=digest)
+    assert load_digest(DATE, tmp_path) == digest
+    assert (tmp_path / f"{DATE}.md").read_text(encoding="utf-8") == "无法解析的正文"
@@ -0,0 +1,23 @@
+import re
+
+from generate_html import generate_html
+
+
+FILES = [{"date": "2026-03-02", "title": "2026-03-02 科技简报", "filename": "2026-03-02.md"}]
+
+
+def test_index_shows_generation_time_and_skips_unchanged_pages(tmp_path):
+    output = tmp_path / "index.html"
+    generate_html(FILES, output)
+    html = output.read_text(encoding="utf-8")
+    assert re.search(r"最后更新: \d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}", html)
+
+    # 只有生成时间不同：不重写
+    stale = html.replace(re.search(r"最后更新: [^<]*", html).group(0), "最后更新: 2000-01-01 00:00:00")
+    output.write_text(stale, encoding="utf-8")
+    generate_html(FILES, output)
+    assert output.read_text(encoding="utf-8") == stale
+
+    # 简报列表变化：重写并更新时间
+    generate_html(FILES + [{**FILES[0], "date": "2026-03-01", "filename": "2026-03-01.md"}], output)
+    assert "2000-01-01 00:00:00" not in output.read_text(encoding="utf-8")
@@ -0,0 +1,103 @@
+from digest_schema import normalize_digest, parse_markdown_digest, render_markdown
+from incremental import link_key, merge_update, update_markdown
+
+
+DATE = "2026-03-02"
+
+
+def item(title: str, url: str, summary: str = "摘要") -> dict:
+    return {"title": title, "summary": summary, "links": [{"title": title, "url": url}]}
+
+
+def base_digest() -> dict:
+    return normalize_digest({
+        "title": "今日简报",
+        "intro": "原导语",
+        "sections": [
+            {"name": "今日热点", "items": [item("A", "https://a.example/1"), item("B", "https://b.example/2")]},
+        ],
+    }, DATE)
+
+
+def titles(digest: dict, name: str) -> list[str]:
+    section = next(s for s in digest["sections"] if s["name"] == name)
+    return [i["title"] for i in section["items"]]
+
+
+def test_link_key_prefers_first_link():
+    assert link_key(item("A", "https://a.example/1")) == "https://a.example/1"
+    assert link_key({"title": " 无链接 ", "links": []}) == "无链接"
+
+
+def test_update_matches_by_link_even_when_title_changes():
+    update = {"sections": [{"name": "今日热点", "items": [item("A（更新）", "https://a.example/1", "新进展")]}]}
+    merged, added, updated = merge_update(base_digest(), update, max_items=6)
+    assert (added, updated) == (0, 1)
+    assert titles(merged, "今日热点") == ["A（更新）", "B"]
+    assert merged["sections"][0]["items"][0]["summary"] == "新进展"
+
+
+def test_same_title_different_link_is_a_new_item():
+    update = {"sections": [{"name": "今日热点", "items": [item("A", "https://other.example/a")]}]}
+    merged, added, updated = merge_update(base_digest(), update, max_items=6)
+    assert (added, updated) == (1, 0)
+    assert titles(merged, "今日热点") == ["A", "B", "A"]
+
+
+def test_new_items_respect_section_cap():
+    update = {"sections": [{"name": "今日热点", "items": [
+        item("B2", "https://b.example/2"),
+        item("C", "https://c.example/3"),
+        item("D", "https://d.example/4"),
+    ]}]}
+    merged, added, updated = merge_update(base_digest(), update, max_items=3)
+    # 已发布条目优先：B 原位更新，C 占满名额，D 被丢弃
+    assert (added, updated) == (1, 1)
+    assert titles(merged, "今日热点") == ["A", "B2", "C"]
+
+
+def test_new_sections_follow_standard_order_and_unknown_are_ignored():
+    update = {
+        "intro": "新导语",
+        "sections": [
+            {"name": "推荐阅读", "items": [item("R", "https://r.example/1")]},
+            {"name": "随便聊聊", "items": [item("X", "https://x.example/1")]},
+            {"name": "技术趋势", "items": [item("T", "https://t.example/1")]},
+        ],
+    }
+    merged, added, updated = merge_update(base_digest(), update, max_items=6)
+    assert (added, updated) == (2, 0)
+    assert [s["name"] for s in merged["sections"]] == ["今日热点", "技术趋势", "推荐阅读"]
+    assert merged["intro"] == "新导语"
+
+
+def test_empty_update_keeps_digest():
+    digest = base_digest()
+    merged, added, updated = merge_update(digest, {"intro": "", "sections": []}, max_items=6)
+    assert (added, updated) == (0, 0)
+    assert merged == digest
+
+
+def test_model_written_markdown_only_gets_appended():
+    markdown = "# 今日简报\n\n> 原导语\n\n### 🔥 今日热点\n\n- **A** — 摘要 [原文](https://a.example/1)\n"
+    digest = parse_markdown_digest(markdown, DATE)
+    update = {"sections": [{"name": "今日热点", "items": [
+        item("A", "https://a.example/1", "新进展"),
+        item("C", "https://c.example/3"),
+    ]}]}
+    merged, added, updated = merge_update(digest, update, max_items=6)
+    assert (added, updated) == (1, 1)
+
+    content = update_markdown(markdown, digest, merged, "14:00")
+    assert content.startswith(markdown)
+    appended = content[len(markdown):]
+    assert "### 今日热点（14:00 更新）" in appended
+    assert "**A**" in appended and "新进展" in appended
+    assert "[C](https://c.example/3)" in appended
+
+
+def test_rendered_markdown_is_re_rendered():
+    digest = base_digest()
+    update = {"sections": [{"name": "今日热点", "items": [item("C", "https://c.example/3")]}]}
+    merged, _, _ = merge_update(digest, update, max_items=6)
+    assert update_markdown(render_markdown(digest), digest, merged, "14:00") == render_markdown(merged)
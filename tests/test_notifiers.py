@@ -0,0 +1,127 @@
+import json
+import time
+
+import pytest
+
+from notifiers import Channel, DigestMessage, NotificationDispatcher, Outbox, RetryableError, target_id
+
+
+class FakeChannel(Channel):
+    """按预设结果依次响应的渠道：True 成功，异常实例则抛出"""
+
+    name = "fake"
+    rate_per_minute = 1000
+
+    def __init__(self, targets: list[str], outcomes: list = None):
+        super().__init__({}, timeout=1)
+        self._targets = targets
+        self.outcomes = list(outcomes or [])
+        self.sent = []
+
+    def targets(self) -> list[str]:
+        return self._targets
+
+    def send(self, target: str, message: DigestMessage):
+        outcome = self.outcomes.pop(0) if self.outcomes else True
+        if isinstance(outcome, Exception):
+            raise outcome
+        self.sent.append((target, message.title))
+
+
+OPTIONS = {"max_retries": 2, "backoff": 0.0, "wait_timeout": 5, "outbox_max_age_hours": 48}
+
+
+@pytest.fixture
+def outbox(tmp_path) -> Outbox:
+    return Outbox(tmp_path / "outbox" / "notifications.json")
+
+
+def run(channel: FakeChannel, outbox: Outbox, message: DigestMessage = None) -> bool:
+    dispatcher = NotificationDispatcher([channel], OPTIONS, outbox)
+    if message:
+        dispatcher.enqueue(message)
+    return dispatcher.start().wait()
+
+
+def saved(outbox: Outbox) -> list[dict]:
+    if not outbox.path.exists():
+        return []
+    return json.loads(outbox.path.read_text(encoding="utf-8"))
+
+
+def test_retryable_error_is_retried_then_delivered(outbox):
+    channel = FakeChannel(["t1"], [RetryableError("429"), RetryableError("503"), True])
+    assert run(channel, outbox, DigestMessage("标题", "内容")) is True
+    assert channel.sent == [("t1", "标题")]
+    assert saved(outbox) == []
+
+
+def test_exhausted_retries_go_to_outbox_and_are_resent(outbox):
+    failing = FakeChannel(["t1"], [RetryableError("429")] * 3)
+    assert run(failing, outbox, DigestMessage("标题", "内容")) is False
+    pending = saved(outbox)
+    assert len(pending) == 1
+    assert pending[0]["target"] == "t1" and pending[0]["attempts"] == 1
+
+    # 下次运行时发件箱中的消息与新消息一起发送
+    healthy = FakeChannel(["t1"])
+    assert run(healthy, outbox, DigestMessage("新标题", "新内容")) is True
+    assert healthy.sent == [("t1", "标题"), ("t1", "新标题")]
+    assert saved(outbox) == []
+
+
+def test_non_retryable_error_is_dropped(outbox):
+    channel = FakeChannel(["t1"], [RuntimeError("token 无效")])
+    assert run(channel, outbox, DigestMessage("标题", "内容")) is True
+    assert channel.sent == []
+    assert saved(outbox) == []
+
+
+def test_expired_messages_are_discarded(outbox):
+    now = time.time()
+    outbox.save([
+        {"id": "old", "channel": "fake", "target": "t1", "title": "旧", "markdown": "",
+         "attempts": 3, "created": now - 49 * 3600},
+        {"id": "new", "channel": "fake", "target": "t1", "title": "新", "markdown": "",
+         "attempts": 1, "created": now - 3600},
+    ])
+    assert [m["id"] for m in outbox.load(48)] == ["new"]
+
+    channel = FakeChannel(["t1"])
+    assert run(channel, outbox) is True
+    assert channel.sent == [("t1", "新")]
+    assert saved(outbox) == []
+
+
+def test_messages_for_unconfigured_targets_stay_in_outbox(outbox):
+    outbox.save([{"id": "x", "channel": "fake", "target": "gone", "title": "T", "markdown": "",
+                  "attempts": 1, "created": time.time()}])
+    channel = FakeChannel(["t1"])
+    assert run(channel, outbox) is False
+    assert channel.sent == []
+    assert [m["id"] for m in saved(outbox)] == ["x"]
+
+
+def test_telegram_outbox_keeps_only_hashed_chat_ids(outbox, monkeypatch):
+    from notifiers import TelegramChannel
+
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "123:abc")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "-100200300, 42")
+    channel = TelegramChannel({"base_url": "http://127.0.0.1:9"}, timeout=0.1)
+    assert sorted(channel.targets()) == sorted([target_id("-100200300"), target_id("42")])
+    assert channel.chats[target_id("42")] == "42"
+
+    dispatcher = NotificationDispatcher([channel], {**OPTIONS, "max_retries": 0}, outbox)
+    dispatcher.enqueue(DigestMessage("标题", "内容"))
+    dispatcher.start().wait()
+    raw = outbox.path.read_text(encoding="utf-8")
+    assert "-100200300" not in raw and '"42"' not in raw
+
+
+def test_other_channels_in_outbox_are_kept_and_not_judged(outbox):
+    outbox.save([{"id": "mail", "channel": "email", "target": "t9", "title": "T", "markdown": "",
+                  "attempts": 1, "created": time.time()}])
+    channel = FakeChannel(["t1"])
+    assert run(channel, outbox, DigestMessage("标题", "内容")) is True
+    assert channel.sent == [("t1", "标题")]
+    assert [m["id"] for m in saved(outbox)] == ["mail"]
@@ -0,0 +1,93 @@
+from models import Item
+from ranking import score_items, select_top_items
+
+
+NOW = 1_772_400_000.0
+
+
+def hn(i: int, score: int) -> Item:
+    return Item(kind="hn", source="Hacker News", title=f"hn-{i}", url=f"https://hn.example/{i}",
+                score=score, comments=score // 2, created=NOW - i * 60)
+
+
+def rss(i: int) -> Item:
+    return Item(kind="rss", source="冷门博客", title=f"rss-{i}", url=f"https://rss.example/{i}",
+                category="博客", created=NOW - 36 * 3600 - i * 60)
+
+
+def setup_config(config: dict, max_items: int, min_per_kind: int) -> dict:
+    config["ranking"].update(max_items=max_items, min_per_kind=min_per_kind)
+    # RSS 来源权重压低，没有保底名额时不会进入前列
+    config["ranking"]["source_weights"]["冷门博客"] = 0.05
+    return config
+
+
+def test_total_is_capped_and_sorted_by_score(config):
+    setup_config(config, max_items=10, min_per_kind=0)
+    items = [hn(i, 1000 - i * 10) for i in range(30)] + [rss(i) for i in range(10)]
+
+    chosen = select_top_items(items, config)
+    assert len(chosen) == 10
+    assert all(item.kind == "hn" for item in chosen)
+
+    scores = score_items(chosen, config)
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_min_per_kind_guarantees_low_scoring_source(config):
+    setup_config(config, max_items=10, min_per_kind=3)
+    items = [hn(i, 1000 - i * 10) for i in range(30)] + [rss(i) for i in range(10)]
+
+    chosen = select_top_items(items, config)
+    kinds = [item.kind for item in chosen]
+    assert len(chosen) == 10
+    assert kinds.count("rss") == 3
+    assert kinds.count("hn") == 7
+    # 保底的是该来源内得分最高的条目
+    assert {item.title for item in chosen if item.kind == "rss"} == {"rss-0", "rss-1", "rss-2"}
+
+
+def test_quota_larger_than_source_takes_all_of_it(config):
+    setup_config(config, max_items=10, min_per_kind=5)
+    items = [hn(i, 500 - i) for i in range(20)] + [rss(i) for i in range(2)]
+
+    chosen = select_top_items(items, config)
+    assert sum(item.kind == "rss" for item in chosen) == 2
+    assert len(chosen) == 10
+
+
+def test_fewer_items_than_cap_keeps_everything(config):
+    setup_config(config, max_items=80, min_per_kind=10)
+    items = [hn(i, 100 + i) for i in range(5)] + [rss(i) for i in range(3)]
+    assert len(select_top_items(items, config)) == 8
+    assert select_top_items([], config) == []
+
+
+def count_llm_calls(monkeypatch, config, tmp_path, candidates: int) -> list[str]:
+    """对 candidates 条候选执行筛选与生成，返回依次调用的模型接口"""
+    import map_reduce
+    import tech_digest
+
+    calls = []
+    digest = {"sections": [{"name": "今日热点", "items": [{"title": "T", "summary": "S", "links": []}]}]}
+    monkeypatch.setattr(tech_digest, "call_llm_tool", lambda *a, **k: calls.append("tool") or digest)
+    monkeypatch.setattr(tech_digest, "call_llm", lambda *a, **k: calls.append("text") or "## 今日热点")
+    monkeypatch.setattr(map_reduce, "call_llm", lambda *a, **k: calls.append("map") or "- 摘要")
+    config["output"]["digests_dir"] = str(tmp_path)
+
+    items = [hn(i, 1000 - i) for i in range(candidates)]
+    selected = tech_digest.select_items(items, config, "2026-03-02")
+    tech_digest.generate_digest(selected, config, "2026-03-02")
+    return calls
+
+
+def test_normal_day_makes_a_single_llm_call(config, tmp_path, monkeypatch):
+    # 日常候选量（数百条）截到 max_items 后只调用一次模型
+    calls = count_llm_calls(monkeypatch, config, tmp_path, candidates=380)
+    assert calls == ["tool"]
+
+
+def test_large_day_uses_map_reduce(config, tmp_path, monkeypatch):
+    threshold = config["claude"]["map_reduce"]["threshold"]
+    calls = count_llm_calls(monkeypatch, config, tmp_path, candidates=threshold + 50)
+    assert calls.count("map") > 1
@@ -0,0 +1,84 @@
+import pytest
+
+from models import Item
+from snapshot_store import list_snapshot_dates, load_snapshot, save_snapshot, snapshot_path
+
+
+DATE = "2026-03-02"
+
+
+@pytest.fixture
+def snap_config(config, tmp_path):
+    config["output"]["snapshots_dir"] = str(tmp_path / "snapshots")
+    return config
+
+
+def test_missing_snapshot_is_none(snap_config):
+    assert load_snapshot(snap_config, DATE) is None
+
+
+def test_round_trip_keeps_fields(snap_config):
+    item = Item(kind="hn", source="Hacker News", title="标题", url="https://a.example/1",
+                score=120, comments=30, created=1_772_400_000.0, summary="摘要")
+    assert save_snapshot(snap_config, DATE, [item]) == 1
+    assert load_snapshot(snap_config, DATE) == [item]
+
+
+def test_repeated_runs_dedupe_and_keep_latest(snap_config):
+    first = [
+        Item(kind="hn", source="Hacker News", title="A", url="https://a.example/1", score=10),
+        Item(kind="v2ex", source="V2EX", title="B", url="https://v2ex.com/t/2", replies=3),
+    ]
+    second = [
+        Item(kind="hn", source="Hacker News", title="A", url="https://a.example/1", score=99),
+        Item(kind="rss", source="博客", title="C", url="https://c.example/3", category="博客"),
+    ]
+    save_snapshot(snap_config, DATE, first)
+    save_snapshot(snap_config, DATE, second)
+
+    items = load_snapshot(snap_config, DATE)
+    assert [item.title for item in items] == ["B", "A", "C"]
+    assert next(item for item in items if item.title == "A").score == 99
+
+
+def test_same_url_different_kind_is_kept(snap_config):
+    url = "https://shared.example/post"
+    save_snapshot(snap_config, DATE, [
+        Item(kind="hn", source="Hacker News", title="X", url=url),
+        Item(kind="rss", source="博客", title="X", url=url, category="博客"),
+    ])
+    assert len(load_snapshot(snap_config, DATE)) == 2
+
+
+def test_items_without_url_dedupe_by_title(snap_config):
+    save_snapshot(snap_config, DATE, [Item(kind="rss", source="博客", title="无链接", url="")])
+    save_snapshot(snap_config, DATE, [Item(kind="rss", source="博客", title="无链接", url="", summary="新")])
+    items = load_snapshot(snap_config, DATE)
+    assert len(items) == 1 and items[0].summary == "新"
+
+
+def test_truncated_last_line_is_skipped(snap_config):
+    save_snapshot(snap_config, DATE, [Item(kind="hn", source="Hacker News", title="A", url="https://a.example/1")])
+    with open(snapshot_path(snap_config, DATE), "a", encoding="utf-8") as f:
+        f.write('["hn","Hacker News","半行')
+    assert [item.title for item in load_snapshot(snap_config, DATE)] == ["A"]
+
+
+def test_list_snapshot_dates(snap_config):
+    for date in ("2026-03-02", "2026-03-01"):
+        save_snapshot(snap_config, date, [Item(kind="hn", source="Hacker News", title=date, url=f"https://x/{date}")])
+    assert list_snapshot_dates(snap_config) == ["2026-03-01", "2026-03-02"]
+
+
+def test_past_date_without_snapshot_is_not_fetched_live(snap_config, monkeypatch):
+    import digest
+
+    monkeypatch.setattr(digest, "fetch_items", lambda config, scheduler: pytest.fail("不应现场抓取"))
+    ctx = digest.DigestContext(snap_config)
+    ctx.today = "2026-03-03"
+    with pytest.raises(ValueError, match="--allow-live"):
+        ctx.items_for(DATE)
+
+    # 有快照时照常读取
+    save_snapshot(snap_config, DATE, [Item(kind="hn", source="Hacker News", title="A", url="https://a.example/1")])
+    assert [item.title for item in ctx.items_for(DATE)] == ["A"]
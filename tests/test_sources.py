@@ -0,0 +1,85 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+import sources
+from sources import RSSSource, Scheduler, SourcePlugin, commit_rss_marks, load_marks, parse_published
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler(16)
+    yield scheduler
+    scheduler.close()
+
+
+def test_map_keeps_in_flight_tasks_within_concurrency(config, scheduler):
+    plugin = SourcePlugin(config, {"concurrency": 3}, scheduler)
+    lock = threading.Lock()
+    in_flight, peak = 0, 0
+
+    def task(arg):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.005)
+        with lock:
+            in_flight -= 1
+        if arg == 5:
+            raise RuntimeError("失败的子任务")
+        return arg
+
+    results = plugin.map(task, list(range(40)))
+    assert sorted(results) == [i for i in range(40) if i != 5]
+    assert peak <= 3
+
+
+def test_parse_published_formats():
+    utc = datetime.fromisoformat("2026-03-02T08:00:00+00:00").timestamp()
+    assert parse_published({"published_parsed": time.strptime("2026-03-02 08:00:00", "%Y-%m-%d %H:%M:%S")}) == utc
+    assert parse_published({"published": "Mon, 02 Mar 2026 08:00:00 GMT"}) == utc
+    assert parse_published({"updated": "2026-03-02T08:00:00Z"}) == utc
+    # 不带时区的时间按北京时间处理
+    assert parse_published({"published": "2026-03-02T16:00:00"}) == utc
+    assert parse_published({"published": "不是时间"}) is None
+    assert parse_published({}) is None
+
+
+def feed_xml(hours: list[int]) -> bytes:
+    """按时间倒序排列的 RSS，条目 i 发布于 2026-03-02 {hours[i]}:00 UTC"""
+    entries = "".join(
+        f"<item><title>post-{hour}</title><link>https://blog.example/{hour}</link>"
+        f"<pubDate>Mon, 02 Mar 2026 {hour:02d}:00:00 GMT</pubDate></item>"
+        for hour in hours
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>博客</title>{entries}</channel></rss>'.encode()
+
+
+def fetch_feed(config, scheduler, body: bytes) -> tuple[list[str], dict]:
+    plugin = RSSSource(config, {}, scheduler)
+    plugin.get_validated = lambda url, **kwargs: body
+    titles = [item.title for item in plugin.fetch()]
+    return titles, plugin.new_marks
+
+
+def test_rss_stops_at_high_water_mark_until_committed(config, scheduler, tmp_path, monkeypatch):
+    monkeypatch.setattr(sources, "SOURCE_CACHE_DIR", tmp_path)
+    config["rss_feeds"] = {"blog": {"url": "https://blog.example/feed", "name": "博客", "category": "博客"}}
+
+    titles, marks = fetch_feed(config, scheduler, feed_xml([10, 9, 8]))
+    assert titles == ["post-10", "post-9", "post-8"]
+    # 未提交时高水位不变，重跑（如生成失败后）仍拿到全部条目
+    assert load_marks() == {}
+    assert fetch_feed(config, scheduler, feed_xml([10, 9, 8]))[0] == titles
+
+    commit_rss_marks(marks)
+    mark = load_marks()["blog"]
+    assert mark["mark"] == datetime.fromisoformat("2026-03-02T10:00:00+00:00").timestamp()
+
+    # 同一天重跑使用当天首次运行前的高水位；改为次日后遇到不晚于高水位的条目即停止
+    assert fetch_feed(config, scheduler, feed_xml([12, 11, 10, 9]))[0] == ["post-12", "post-11", "post-10", "post-9"]
+    commit_rss_marks({"blog": {**mark, "date": "2000-01-01"}})
+    assert fetch_feed(config, scheduler, feed_xml([12, 11, 10, 9]))[0] == ["post-12", "post-11"]